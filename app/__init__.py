@@ -61,6 +61,18 @@ def create_app(config_name='default'):
     except ImportError:
         print("Admin blueprint not found - skipping")
 
+    # Background job pipeline
+    if app.config.get('JOB_BACKEND') == 'celery':
+        try:
+            from app.celery_app import make_celery
+            make_celery(app)
+        except ImportError:
+            print("Celery not installed - background jobs will fail to dispatch")
+    elif app.config.get('JOB_SCHEDULER_ENABLED'):
+        from app.services.job_queue import get_job_queue
+        with app.app_context():
+            get_job_queue().start_scheduler(app, app.config.get('JOB_SCHEDULE_INTERVAL', 60))
+
     # Add error handlers
     @app.errorhandler(404)
     def not_found(error):
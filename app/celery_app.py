@@ -0,0 +1,29 @@
+from celery import Celery, Task
+
+
+def make_celery(app) -> Celery:
+    """Create the Celery app for a Flask app; every task runs inside its app context"""
+
+    class FlaskTask(Task):
+        def __call__(self, *args, **kwargs):
+            with app.app_context():
+                return self.run(*args, **kwargs)
+
+    celery = Celery(app.import_name, task_cls=FlaskTask)
+    celery.conf.update(
+        broker_url=app.config['CELERY_BROKER_URL'],
+        result_backend=app.config['CELERY_RESULT_BACKEND'],
+        task_acks_late=True,
+        worker_prefetch_multiplier=1,
+        beat_schedule={
+            'dispatch-monitoring-schedules': {
+                'task': 'zenith.dispatch_monitoring_schedules',
+                'schedule': app.config.get('JOB_SCHEDULE_INTERVAL', 60)
+            }
+        }
+    )
+    celery.set_default()
+    app.extensions['celery'] = celery
+
+    from app import tasks  # noqa: F401  (registers the shared tasks)
+    return celery
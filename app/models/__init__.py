@@ -9,6 +9,10 @@ from .user import User
 from .user_preference import UserPreference
 from .user_activity import UserActivity
 from .brand import Brand, BrandQuery
+from .content_blob import ContentBlob
 from .search_query import SearchQuery, SearchResult
 from .analytics import AnalyticsData, CompetitorData
-from .ai_overview import AIOverview, SearchCache
\ No newline at end of file
+from .ai_overview import AIOverview, SearchCache
+from .batch_job import BatchRun, BatchJob
+from .background_job import BackgroundJob, CompetitorAnalysisCell, MonitoringSchedule
+from .backfill import BackfillCheckpoint
\ No newline at end of file
@@ -1,4 +1,5 @@
 from app.models import db
+from .content_blob import BlobAttribute
 from datetime import datetime
 
 class AIOverview(db.Model):
@@ -7,12 +8,21 @@ class AIOverview(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     search_query = db.Column(db.String(500), nullable=False)  # Changed from 'query' to 'search_query'
-    overview_text = db.Column(db.Text, nullable=False)
+    inline_overview_text = db.Column('overview_text', db.Text)  # Rows stored before the blob store
+    overview_hash = db.Column(db.String(64), db.ForeignKey('content_blobs.hash'))
     sources_used = db.Column(db.JSON)  # List of source URLs and titles
-    search_results = db.Column(db.JSON)  # Original search results
+    inline_search_results = db.Column('search_results', db.JSON)
+    search_results_hash = db.Column(db.String(64), db.ForeignKey('content_blobs.hash'))  # Original search results
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     processing_time = db.Column(db.Float)  # Time taken to generate
 
+    # Relationships
+    overview_blob = db.relationship('ContentBlob', foreign_keys=[overview_hash], lazy='select')
+    search_results_blob = db.relationship('ContentBlob', foreign_keys=[search_results_hash], lazy='select')
+
+    overview_text = BlobAttribute('overview_blob', 'inline_overview_text')
+    search_results = BlobAttribute('search_results_blob', 'inline_search_results', as_json=True)
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -28,8 +38,8 @@ class SearchCache(db.Model):
     __tablename__ = 'search_cache'
 
     id = db.Column(db.Integer, primary_key=True)
-    query_hash = db.Column(db.String(64), unique=True, nullable=False)
+    query_hash = db.Column(db.String(64), unique=True, nullable=False)  # sha256 of the normalized query
     search_query = db.Column(db.String(500), nullable=False)  # Changed from 'query' to 'search_query'
     results = db.Column(db.JSON, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    expires_at = db.Column(db.DateTime, nullable=False)
\ No newline at end of file
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)  # End of the stale-while-revalidate window
\ No newline at end of file
@@ -0,0 +1,34 @@
+from . import db
+from datetime import datetime
+
+
+class BackfillCheckpoint(db.Model):
+    """Resume point of a named backfill over stored responses"""
+    __tablename__ = 'backfill_checkpoints'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False)
+    phase = db.Column(db.String(20), default='analyze')  # analyze, analytics, completed
+    end_id = db.Column(db.Integer)  # Highest search_queries id when the backfill started
+    last_id = db.Column(db.Integer, default=0)  # Last search_queries id re-analyzed
+    last_brand_id = db.Column(db.Integer)  # Last (brand, day) whose analytics were rebuilt
+    last_day = db.Column(db.Date)
+    stats = db.Column(db.JSON)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    completed_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'phase': self.phase,
+            'end_id': self.end_id,
+            'last_id': self.last_id,
+            'last_brand_id': self.last_brand_id,
+            'last_day': self.last_day.isoformat() if self.last_day else None,
+            'stats': self.stats or {},
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+        }
@@ -0,0 +1,118 @@
+from . import db
+from .content_blob import BlobAttribute
+from datetime import datetime
+
+
+class BackgroundJob(db.Model):
+    __tablename__ = 'background_jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_type = db.Column(db.String(50), nullable=False)  # monitor_brand, competitor_analysis
+    brand_id = db.Column(db.Integer, db.ForeignKey('brands.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
+    schedule_id = db.Column(db.Integer, db.ForeignKey('monitoring_schedules.id'))
+    status = db.Column(db.String(20), default='queued')  # queued, running, completed, failed
+    task_id = db.Column(db.String(255))  # Celery task id when dispatched through the broker
+    params = db.Column(db.JSON)
+    result = db.Column(db.JSON)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    completed_at = db.Column(db.DateTime)
+
+    __table_args__ = (db.Index('ix_background_jobs_brand_created', 'brand_id', 'created_at'),)
+
+    def to_dict(self, include_result=False):
+        data = {
+            'id': self.id,
+            'job_type': self.job_type,
+            'brand_id': self.brand_id,
+            'schedule_id': self.schedule_id,
+            'status': self.status,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+        }
+        if self.status == 'running' and isinstance(self.result, dict):
+            data['progress'] = self.result.get('progress')
+        if include_result:
+            data['result'] = self.result
+        return data
+
+
+class CompetitorAnalysisCell(db.Model):
+    """One (competitor, query, platform) provider call of a competitor analysis job, saved as soon as it lands"""
+    __tablename__ = 'competitor_analysis_cells'
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.Integer, db.ForeignKey('background_jobs.id'), nullable=False)
+    competitor = db.Column(db.String(100))  # None for head-to-head and category queries
+    query_text = db.Column(db.String(500), nullable=False)
+    ai_platform = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), default='pending')  # pending, completed, failed
+    response_hash = db.Column(db.String(64), db.ForeignKey('content_blobs.hash'))
+    tokens_used = db.Column(db.Integer, default=0)
+    cached = db.Column(db.Boolean, default=False)
+    error = db.Column(db.Text)
+    completed_at = db.Column(db.DateTime)
+
+    response_blob = db.relationship('ContentBlob', lazy='select')
+
+    response_text = BlobAttribute('response_blob')
+
+    __table_args__ = (db.UniqueConstraint('job_id', 'query_text', 'ai_platform',
+                                          name='uq_competitor_cells_job_query_platform'),)
+
+    def record(self, result: dict):
+        """Save a platform result (successful or failed) into this cell"""
+        self.status = 'completed' if result.get('success') else 'failed'
+        self.response_text = result.get('response') if result.get('success') else None
+        self.tokens_used = result.get('tokens_used', 0)
+        self.cached = bool(result.get('cached'))
+        self.error = result.get('error')
+        self.completed_at = datetime.utcnow()
+
+    def to_result(self) -> dict:
+        """The platform result this cell stores, in AISearchService result form"""
+        result = {
+            'platform': self.ai_platform,
+            'query': self.query_text,
+            'success': self.status == 'completed',
+            'timestamp': self.completed_at.isoformat() if self.completed_at else None
+        }
+        if result['success']:
+            result.update(response=self.response_text, tokens_used=self.tokens_used or 0, cached=bool(self.cached))
+        else:
+            result['error'] = self.error
+        return result
+
+
+class MonitoringSchedule(db.Model):
+    __tablename__ = 'monitoring_schedules'
+
+    id = db.Column(db.Integer, primary_key=True)
+    brand_id = db.Column(db.Integer, db.ForeignKey('brands.id'), nullable=False)
+    job_type = db.Column(db.String(50), nullable=False, default='monitor_brand')
+    interval_minutes = db.Column(db.Integer, nullable=False, default=24 * 60)
+    is_active = db.Column(db.Boolean, default=True)
+    last_run_at = db.Column(db.DateTime)
+    next_run_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Relationships
+    jobs = db.relationship('BackgroundJob', backref='schedule', lazy=True)
+
+    __table_args__ = (db.Index('ix_monitoring_schedules_due', 'is_active', 'next_run_at'),)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'brand_id': self.brand_id,
+            'job_type': self.job_type,
+            'interval_minutes': self.interval_minutes,
+            'is_active': self.is_active,
+            'last_run_at': self.last_run_at.isoformat() if self.last_run_at else None,
+            'next_run_at': self.next_run_at.isoformat() if self.next_run_at else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
@@ -0,0 +1,58 @@
+import uuid
+from . import db
+from datetime import datetime
+
+
+class BatchRun(db.Model):
+    __tablename__ = 'batch_runs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    status = db.Column(db.String(20), default='submitting')  # submitting, in_progress, ingesting, completed, failed
+    brand_queries = db.Column(db.JSON)  # {brand_id: [query, ...]} planned for this run
+    ingested_brand_ids = db.Column(db.JSON)  # Brands whose results are already stored (for crash-safe resume)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    completed_at = db.Column(db.DateTime)
+
+    # Relationships
+    jobs = db.relationship('BatchJob', backref='run', lazy=True, cascade='all, delete-orphan')
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'brands': len(self.brand_queries or {}),
+            'ingested_brands': len(self.ingested_brand_ids or []),
+            'jobs': [job.to_dict() for job in self.jobs],
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+        }
+
+
+class BatchJob(db.Model):
+    __tablename__ = 'batch_jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    run_id = db.Column(db.Integer, db.ForeignKey('batch_runs.id'), nullable=False)
+    platform = db.Column(db.String(50), nullable=False)  # chatgpt, claude
+    external_id = db.Column(db.String(255))  # Provider batch id, set once submitted
+    # Sent with the submission so a batch whose id we never stored can be found again
+    idempotency_key = db.Column(db.String(64), unique=True, default=lambda: uuid.uuid4().hex)
+    status = db.Column(db.String(20), default='pending')  # pending, submitting, in_progress, completed, failed
+    requests = db.Column(db.JSON)  # {custom_id: query}
+    results = db.Column(db.JSON)  # {custom_id: {response, tokens_used} or {error}}
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    submitted_at = db.Column(db.DateTime)
+    completed_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'platform': self.platform,
+            'external_id': self.external_id,
+            'status': self.status,
+            'requests': len(self.requests or {}),
+            'error': self.error,
+            'submitted_at': self.submitted_at.isoformat() if self.submitted_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+        }
@@ -0,0 +1,99 @@
+from . import db
+from datetime import datetime
+import hashlib
+import json
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class ContentBlob(db.Model):
+    """Compressed text stored once per distinct content, keyed by its SHA-256"""
+    __tablename__ = 'content_blobs'
+
+    hash = db.Column(db.String(64), primary_key=True)  # sha256 of the uncompressed UTF-8 text
+    codec = db.Column(db.String(10), nullable=False)  # zstd, zlib
+    data = db.Column(db.LargeBinary, nullable=False)
+    size = db.Column(db.Integer)  # Uncompressed bytes
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    @staticmethod
+    def digest(text: str) -> str:
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def encode(value) -> str:
+        """Canonical text for a JSON value, so equal values share a blob"""
+        return json.dumps(value, sort_keys=True, separators=(',', ':'), default=str)
+
+    @staticmethod
+    def compress(raw: bytes):
+        if zstandard is not None:
+            return 'zstd', zstandard.ZstdCompressor(level=10).compress(raw)
+        return 'zlib', zlib.compress(raw, 6)
+
+    @staticmethod
+    def decompress(codec: str, data: bytes) -> bytes:
+        if codec == 'zstd':
+            if zstandard is None:
+                raise RuntimeError('zstandard is required to read zstd-compressed content')
+            return zstandard.ZstdDecompressor().decompress(data)
+        return zlib.decompress(data)
+
+    @classmethod
+    def row(cls, text: str) -> dict:
+        """Column values for a blob holding text (for bulk inserts)"""
+        raw = text.encode('utf-8')
+        codec, data = cls.compress(raw)
+        return {'hash': hashlib.sha256(raw).hexdigest(), 'codec': codec, 'data': data, 'size': len(raw),
+                'created_at': datetime.utcnow()}
+
+    @classmethod
+    def for_text(cls, text: str) -> 'ContentBlob':
+        """The stored blob for text, or a new pending one"""
+        existing = db.session.get(cls, cls.digest(text))
+        if existing is not None:
+            return existing
+        blob = cls(**cls.row(text))
+        db.session.add(blob)
+        return blob
+
+    @property
+    def text(self) -> str:
+        # Decompress once per loaded instance
+        if getattr(self, '_text', None) is None:
+            self._text = self.decompress(self.codec, self.data).decode('utf-8')
+        return self._text
+
+
+class BlobAttribute:
+    """Model attribute stored in a ContentBlob and decompressed lazily on first read.
+
+    Rows written before the blob store keep their content in the inline column (if the model
+    has one), which is returned as a fallback. Assigning stores the value in a blob and clears
+    the inline column.
+    """
+
+    def __init__(self, blob_attr: str, inline_attr: str = None, as_json: bool = False):
+        self.blob_attr = blob_attr
+        self.inline_attr = inline_attr
+        self.as_json = as_json
+
+    def __get__(self, obj, owner):
+        if obj is None:
+            return self
+        blob = getattr(obj, self.blob_attr)
+        if blob is None:
+            return getattr(obj, self.inline_attr) if self.inline_attr else None
+        return json.loads(blob.text) if self.as_json else blob.text
+
+    def __set__(self, obj, value):
+        if self.inline_attr:
+            setattr(obj, self.inline_attr, None)
+        if value is None:
+            setattr(obj, self.blob_attr, None)
+        else:
+            setattr(obj, self.blob_attr, ContentBlob.for_text(ContentBlob.encode(value) if self.as_json else value))
@@ -1,4 +1,5 @@
 from . import db
+from .content_blob import BlobAttribute
 from datetime import datetime
 
 
@@ -8,16 +9,23 @@ class SearchQuery(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     query_text = db.Column(db.String(500), nullable=False)
     ai_platform = db.Column(db.String(50), nullable=False)  # chatgpt, claude, perplexity, google_ai
-    response_text = db.Column(db.Text)
+    inline_response_text = db.Column('response_text', db.Text)  # Rows stored before the blob store
+    response_hash = db.Column(db.String(64), db.ForeignKey('content_blobs.hash'), index=True)
     citations = db.Column(db.JSON)  # List of cited sources
     brand_mentions = db.Column(db.JSON)  # Brands mentioned in response
     sentiment_score = db.Column(db.Float)  # -1 to 1
     relevance_score = db.Column(db.Float)  # 0 to 1
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
+    brand_id = db.Column(db.Integer, db.ForeignKey('brands.id'))  # Brand the response was analyzed for
 
     # Relationships
     results = db.relationship('SearchResult', backref='query', lazy=True)
+    response_blob = db.relationship('ContentBlob', lazy='select')
+
+    response_text = BlobAttribute('response_blob', 'inline_response_text')
+
+    __table_args__ = (db.Index('ix_search_queries_brand_created', 'brand_id', 'created_at'),)
 
 
 class SearchResult(db.Model):
@@ -1,6 +1,9 @@
 from flask import Blueprint, request, jsonify, render_template, current_app
 from flask_login import login_required, current_user
 from app.models import AIOverview
+from sqlalchemy.orm import selectinload
+from app.services.fair_scheduler import fair_context
+from app.utils.helpers import stream_event, stream_response
 import os
 
 ai_overview_bp = Blueprint('ai_overview', __name__)
@@ -79,6 +82,40 @@ def generate_overview():
             'error': str(e)
         }), 500
 
+@ai_overview_bp.route('/api/generate-overview/stream', methods=['POST'])
+@login_required
+def generate_overview_stream():
+    """Generate an AI overview, streaming its sources, then the summary as it is written (SSE, or NDJSON with ?format=ndjson)"""
+    service = get_overview_service()
+    if not service:
+        return jsonify({
+            'success': False,
+            'error': 'AI Overview service is not configured. Please set OPENAI_API_KEY and SERPAPI_KEY environment variables.'
+        }), 503
+
+    data = request.get_json() or {}
+    query = data.get('query', '').strip()
+
+    if not query:
+        return jsonify({'error': 'Query is required'}), 400
+
+    if len(query) > 500:
+        return jsonify({'error': 'Query too long. Maximum 500 characters.'}), 400
+
+    fmt = request.args.get('format', 'sse')
+    user_id = current_user.id
+
+    def generate():
+        try:
+            with fair_context(user_id, 'interactive'):
+                for event, payload in service.generate_overview_stream(query, user_id):
+                    yield stream_event(event, payload, fmt)
+        except Exception as e:
+            current_app.logger.error(f"Error streaming overview: {e}")
+            yield stream_event('error', {'error': str(e)}, fmt)
+
+    return stream_response(generate(), fmt)
+
 @ai_overview_bp.route('/api/overview-history')
 @login_required
 def get_overview_history():
@@ -87,7 +124,10 @@ def get_overview_history():
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
 
-        overviews = AIOverview.query.filter_by(user_id=current_user.id) \
+        # to_dict() reads both blobs of every row; load them in two queries for the whole page
+        overviews = AIOverview.query.options(selectinload(AIOverview.overview_blob),
+                                             selectinload(AIOverview.search_results_blob)) \
+            .filter_by(user_id=current_user.id) \
             .order_by(AIOverview.created_at.desc()) \
             .paginate(page=page, per_page=per_page, error_out=False)
 
@@ -1,9 +1,10 @@
-from flask import Blueprint, render_template, request, jsonify
+from flask import Blueprint, render_template, request, jsonify, current_app
 from flask_login import login_required, current_user
-from app.models import db, Brand, SearchQuery, SearchResult, AnalyticsData, CompetitorData, UserActivity
+from app.models import db, Brand, SearchQuery, SearchResult, AnalyticsData, CompetitorData, UserActivity, BackgroundJob
 from app.services.analytics_service import AnalyticsService
 from datetime import datetime, timedelta, date
-from sqlalchemy import func, desc, and_
+from sqlalchemy import func, desc, and_, or_
+from sqlalchemy.orm import selectinload
 
 analytics_bp = Blueprint('analytics', __name__)
 
@@ -162,7 +163,7 @@ def api_brand_analytics(brand_id):
 @analytics_bp.route('/api/competitors/<int:brand_id>/analyze', methods=['POST'])
 @login_required
 def run_competitor_analysis(brand_id):
-    """Run live competitor analysis"""
+    """Start competitor analysis as a background job, resuming the last unfinished one"""
     brand = Brand.query.filter_by(id=brand_id, user_id=current_user.id).first()
     if not brand:
         return jsonify({'error': 'Brand not found'}), 404
@@ -171,20 +172,28 @@ def run_competitor_analysis(brand_id):
         return jsonify({'error': 'No competitors defined for this brand'}), 400
 
     try:
-        from app.services.competitor_analysis import CompetitorAnalysisService
-        competitor_service = CompetitorAnalysisService()
-
-        # Run analysis
-        results = competitor_service.analyze_competitors(brand_id)
-
-        # Store results in database for historical tracking
-        store_competitor_analysis_results(brand_id, results)
-
-        return jsonify({
-            'success': True,
-            'message': 'Competitor analysis completed',
-            'results': results
-        })
+        from app.routes.api import job_progress_data, job_urls
+        from app.services.job_queue import get_job_queue
+
+        queue = get_job_queue()
+        since = datetime.utcnow() - timedelta(hours=current_app.config.get('COMPETITOR_RESUME_HOURS', 24))
+        last_job = BackgroundJob.query.filter(
+            BackgroundJob.brand_id == brand.id,
+            BackgroundJob.job_type == 'competitor_analysis',
+            BackgroundJob.created_at >= since
+        ).order_by(desc(BackgroundJob.created_at)).first()
+
+        # Results are stored per cell as they land, so a failed or incomplete run is resumed
+        # rather than started over
+        if last_job and last_job.status in ('queued', 'running'):
+            job, message = last_job, 'Competitor analysis already in progress'
+        elif last_job and job_progress_data(last_job)['resumable']:
+            job, message = queue.resume(last_job), 'Resuming competitor analysis'
+        else:
+            job = queue.enqueue('competitor_analysis', brand.id, user_id=current_user.id)
+            message = 'Competitor analysis started'
+
+        return jsonify(dict(success=True, message=message, job=job.to_dict(), **job_urls(job))), 202
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -256,7 +265,7 @@ def get_brand_analytics_data(brand_id):
 
 def get_recent_searches(brand_id, limit=10):
     """Get recent search queries for a brand"""
-    queries = db.session.query(SearchQuery).filter(
+    queries = db.session.query(SearchQuery).options(selectinload(SearchQuery.response_blob)).filter(
         SearchQuery.user_id == current_user.id
     ).order_by(desc(SearchQuery.created_at)).limit(limit).all()
 
@@ -437,7 +446,8 @@ def get_paginated_search_results(brand_id, page, platform_filter, date_range):
     end_date = datetime.now()
     start_date = end_date - timedelta(days=date_range)
 
-    query = SearchQuery.query.filter(
+    # The page shows each response, so load their blobs in one query rather than one per row
+    query = SearchQuery.query.options(selectinload(SearchQuery.response_blob)).filter(
         and_(
             SearchQuery.user_id == current_user.id,
             SearchQuery.created_at >= start_date
@@ -447,12 +457,12 @@ def get_paginated_search_results(brand_id, page, platform_filter, date_range):
     if platform_filter:
         query = query.filter(SearchQuery.ai_platform == platform_filter)
 
-    # Only include queries that mention the brand
-    brand = Brand.query.get(brand_id)
-    if brand:
-        # This is a simplified filter - in a real implementation, you'd want to
-        # properly filter based on brand mentions in the stored data
-        query = query.filter(SearchQuery.response_text.contains(brand.name))
+    # Only include the brand's queries whose stored mention analysis found it in the response. Older
+    # rows of users with several brands have no brand_id and are shown for each of the user's brands.
+    query = query.filter(
+        or_(SearchQuery.brand_id == brand_id, SearchQuery.brand_id.is_(None)),
+        SearchQuery.brand_mentions['direct_mentions'].as_integer() > 0
+    )
 
     results = query.order_by(desc(SearchQuery.created_at)).paginate(
         page=page, per_page=10, error_out=False
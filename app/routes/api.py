@@ -1,9 +1,13 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, url_for
 from flask_login import login_required, current_user
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models import db, Brand, SearchQuery, AnalyticsData
+from app.models import db, Brand, SearchQuery, AnalyticsData, BackgroundJob, MonitoringSchedule
 from app.services.ai_search import AISearchService
 from app.services.analytics_service import AnalyticsService
+from app.services.job_queue import JOB_HANDLERS, RESUMABLE_JOBS, get_job_queue
+from app.services.fair_scheduler import fair_context
+from app.services.fanout import get_fanout_engine
+from app.utils.helpers import stream_event, stream_response
 from datetime import datetime, timedelta
 import os
 
@@ -147,7 +151,8 @@ def monitor_brand(brand_id):
         from app.services.brand_monitor import BrandMonitoringService
 
         monitor = BrandMonitoringService()
-        results = monitor.monitor_brand(brand_id)
+        with fair_context(current_user.id):
+            results = monitor.monitor_brand(brand_id)
 
         return jsonify({
             'success': True,
@@ -174,7 +179,8 @@ def quick_brand_test(brand_id):
 
         # Test with a simple query
         test_query = f"What is {brand.name}?"
-        results = ai_service.search_all_platforms(test_query, brand.name)
+        with fair_context(current_user.id, 'interactive'):
+            results = ai_service.search_all_platforms(test_query, brand.name)
 
         # Quick analysis
         mentions_found = 0
@@ -196,6 +202,291 @@ def quick_brand_test(brand_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@api_bp.route('/brand/<int:brand_id>/monitor/stream', methods=['GET', 'POST'])
+@login_required
+def monitor_brand_stream(brand_id):
+    """Run brand monitoring, streaming each platform result as it completes (SSE, or NDJSON with ?format=ndjson)"""
+    brand = Brand.query.filter_by(id=brand_id, user_id=current_user.id).first()
+    if not brand:
+        return jsonify({'error': 'Brand not found'}), 404
+
+    fmt = request.args.get('format', 'sse')
+    user_id = current_user.id
+
+    def generate():
+        try:
+            from app.services.brand_monitor import BrandMonitoringService
+
+            monitor = BrandMonitoringService()
+            with fair_context(user_id):
+                for event, data in monitor.iter_monitor_brand(brand_id):
+                    if event == 'summary':
+                        # Every result was already streamed; keep the summary event small
+                        data = {key: value for key, value in data.items() if key != 'results'}
+                        data['message'] = f'Brand monitoring completed for {data["brand_name"]}'
+                    yield stream_event(event, data, fmt)
+        except Exception as e:
+            yield stream_event('error', {'error': str(e)}, fmt)
+
+    return stream_response(generate(), fmt)
+
+
+@api_bp.route('/brand/<int:brand_id>/quick-test/stream', methods=['GET', 'POST'])
+@login_required
+def quick_brand_test_stream(brand_id):
+    """Quick test of brand visibility, streaming each platform result as it completes"""
+    brand = Brand.query.filter_by(id=brand_id, user_id=current_user.id).first()
+    if not brand:
+        return jsonify({'error': 'Brand not found'}), 404
+
+    fmt = request.args.get('format', 'sse')
+    brand_name = brand.name
+    user_id = current_user.id
+
+    def generate():
+        try:
+            ai_service = AISearchService()
+            test_query = f"What is {brand_name}?"
+            mentions_found = 0
+            platforms_with_mentions = []
+
+            with fair_context(user_id, 'interactive'):
+                for _, result in ai_service.iter_platform_results([test_query], brand_name):
+                    if result['success'] and result.get('brand_analysis', {}).get('direct_mentions', 0) > 0:
+                        mentions_found += result['brand_analysis']['direct_mentions']
+                        platforms_with_mentions.append(result['platform'])
+                    yield stream_event('platform_result', result, fmt)
+
+            yield stream_event('summary', {
+                'success': True,
+                'test_query': test_query,
+                'mentions_found': mentions_found,
+                'platforms_with_mentions': platforms_with_mentions
+            }, fmt)
+        except Exception as e:
+            yield stream_event('error', {'error': str(e)}, fmt)
+
+    return stream_response(generate(), fmt)
+
+
+@api_bp.route('/brand/<int:brand_id>/jobs', methods=['GET', 'POST'])
+@login_required
+def brand_jobs(brand_id):
+    """List a brand's background jobs, or enqueue a monitoring/competitor analysis job"""
+    brand = Brand.query.filter_by(id=brand_id, user_id=current_user.id).first()
+    if not brand:
+        return jsonify({'error': 'Brand not found'}), 404
+
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        job_type = data.get('job_type', 'monitor_brand')
+        if job_type not in JOB_HANDLERS:
+            return jsonify({'error': f'Unknown job type: {job_type}'}), 400
+        if job_type == 'competitor_analysis' and not brand.competitors:
+            return jsonify({'error': 'No competitors defined for this brand'}), 400
+
+        params = {'custom_queries': data['queries']} if data.get('queries') else None
+        try:
+            job = get_job_queue().enqueue(job_type, brand.id, user_id=current_user.id, params=params)
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+        return jsonify(dict(success=True, job=job.to_dict(), **job_urls(job))), 202
+
+    jobs = BackgroundJob.query.filter_by(brand_id=brand_id) \
+        .order_by(BackgroundJob.created_at.desc()).limit(20).all()
+    return jsonify({'jobs': [job.to_dict() for job in jobs]})
+
+
+def _user_job(job_id):
+    """A background job on one of the current user's brands"""
+    return BackgroundJob.query.join(Brand, Brand.id == BackgroundJob.brand_id) \
+        .filter(BackgroundJob.id == job_id, Brand.user_id == current_user.id).first()
+
+
+def job_urls(job):
+    """Polling URLs for a job (progress, partial results and resume for resumable jobs)"""
+    urls = {'status_url': url_for('api.job_status', job_id=job.id)}
+    if job.job_type in RESUMABLE_JOBS:
+        urls.update(progress_url=url_for('api.job_progress', job_id=job.id),
+                    results_url=url_for('api.job_results', job_id=job.id),
+                    resume_url=url_for('api.resume_job', job_id=job.id))
+    return urls
+
+
+def job_progress_data(job):
+    """Status and saved-cell counts of a job, and whether rerunning it would do anything"""
+    from app.services.competitor_analysis import CompetitorAnalysisService
+
+    data = {'id': job.id, 'job_type': job.job_type, 'status': job.status, 'error': job.error}
+    if job.job_type == 'competitor_analysis':
+        data.update(CompetitorAnalysisService.cell_counts(job.id))
+        data['resumable'] = job.status == 'failed' or (job.status == 'completed' and data['completed'] < data['total'])
+    else:
+        data.update(job.to_dict().get('progress') or {})
+        data['resumable'] = False
+    return data
+
+
+@api_bp.route('/jobs/<int:job_id>')
+@login_required
+def job_status(job_id):
+    """Poll a background job; the result is included once it has completed"""
+    job = _user_job(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+
+    return jsonify({'job': job.to_dict(include_result=job.status == 'completed')})
+
+
+@api_bp.route('/jobs/<int:job_id>/progress')
+@login_required
+def job_progress(job_id):
+    """Cell-level progress of a job, per competitor for competitor analyses"""
+    job = _user_job(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+
+    return jsonify({'progress': job_progress_data(job)})
+
+
+@api_bp.route('/jobs/<int:job_id>/results')
+@login_required
+def job_results(job_id):
+    """A job's results: the stored result once completed, otherwise whatever its saved cells give so far"""
+    job = _user_job(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    if job.job_type not in RESUMABLE_JOBS:
+        return jsonify({'error': 'Partial results are not available for this job type'}), 400
+
+    if job.status == 'completed':
+        return jsonify({'partial': False, 'results': job.result})
+
+    try:
+        from app.services.competitor_analysis import CompetitorAnalysisService
+        results = CompetitorAnalysisService().partial_results(job)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+    if 'error' in results:
+        return jsonify({'partial': True, 'results': None, 'message': results['error']})
+    return jsonify({'partial': True, 'results': results})
+
+
+@api_bp.route('/jobs/<int:job_id>/resume', methods=['POST'])
+@login_required
+def resume_job(job_id):
+    """Run a failed or incomplete job again; only its missing cells are called"""
+    job = _user_job(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    if not job_progress_data(job)['resumable']:
+        return jsonify({'error': 'Job has nothing left to resume'}), 400
+
+    try:
+        job = get_job_queue().resume(job)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+    return jsonify(dict(success=True, job=job.to_dict(), **job_urls(job))), 202
+
+
+@api_bp.route('/scheduler/metrics')
+@login_required
+def scheduler_metrics():
+    """Queue depth and wait times for background jobs and provider calls; admins see every tenant"""
+    include_tenants = current_user.is_admin()
+    return jsonify({
+        'jobs': get_job_queue().metrics(user_id=current_user.id, include_tenants=include_tenants),
+        'provider_calls': get_fanout_engine().scheduler.metrics(tenant=current_user.id,
+                                                                include_tenants=include_tenants)
+    })
+
+
+def _interval_minutes(value) -> int:
+    """Parse a schedule interval, raising ValueError unless it is a whole number of at least 15 minutes"""
+    try:
+        minutes = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('interval_minutes must be a whole number of minutes')
+    if minutes < 15:
+        raise ValueError('interval_minutes must be at least 15')
+    return minutes
+
+
+@api_bp.route('/brand/<int:brand_id>/schedules', methods=['GET', 'POST'])
+@login_required
+def brand_schedules(brand_id):
+    """List or create periodic monitoring schedules for a brand"""
+    brand = Brand.query.filter_by(id=brand_id, user_id=current_user.id).first()
+    if not brand:
+        return jsonify({'error': 'Brand not found'}), 404
+
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        job_type = data.get('job_type', 'monitor_brand')
+        if job_type not in JOB_HANDLERS:
+            return jsonify({'error': f'Unknown job type: {job_type}'}), 400
+        try:
+            interval_minutes = _interval_minutes(data.get('interval_minutes', 24 * 60))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        schedule = MonitoringSchedule(brand_id=brand.id, job_type=job_type, interval_minutes=interval_minutes,
+                                      next_run_at=datetime.utcnow())
+        try:
+            db.session.add(schedule)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error creating schedule for brand {brand.id}: {e}")
+            return jsonify({'error': 'Could not create the schedule'}), 500
+        return jsonify({'success': True, 'schedule': schedule.to_dict()}), 201
+
+    schedules = MonitoringSchedule.query.filter_by(brand_id=brand_id).all()
+    return jsonify({'schedules': [schedule.to_dict() for schedule in schedules]})
+
+
+@api_bp.route('/schedules/<int:schedule_id>', methods=['PUT', 'DELETE'])
+@login_required
+def manage_schedule(schedule_id):
+    """Update (interval, pause/resume) or delete a monitoring schedule"""
+    schedule = MonitoringSchedule.query.join(Brand, Brand.id == MonitoringSchedule.brand_id) \
+        .filter(MonitoringSchedule.id == schedule_id, Brand.user_id == current_user.id).first()
+    if not schedule:
+        return jsonify({'error': 'Schedule not found'}), 404
+
+    data = request.get_json(silent=True) or {}
+    interval_minutes = None
+    if request.method == 'PUT' and 'interval_minutes' in data:
+        try:
+            interval_minutes = _interval_minutes(data['interval_minutes'])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+    try:
+        if request.method == 'DELETE':
+            BackgroundJob.query.filter_by(schedule_id=schedule.id).update({'schedule_id': None})
+            db.session.delete(schedule)
+            db.session.commit()
+            return jsonify({'success': True})
+
+        if interval_minutes is not None:
+            schedule.interval_minutes = interval_minutes
+        if 'is_active' in data:
+            schedule.is_active = bool(data['is_active'])
+        db.session.commit()
+        return jsonify({'success': True, 'schedule': schedule.to_dict()})
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error updating schedule {schedule_id}: {e}")
+        return jsonify({'error': 'Could not update the schedule'}), 500
+
+
 @api_bp.route('/test')
 def test():
     """Test endpoint"""
@@ -1,19 +1,35 @@
 import time
-import hashlib
 import openai
-import requests
-from datetime import datetime, timedelta
-from bs4 import BeautifulSoup
 import json
 from serpapi import GoogleSearch
+from sqlalchemy.orm import selectinload
 from app.models import db
-from app.models.ai_overview import AIOverview, SearchCache
-from app.utils.helpers import clean_text
+from app.models import ContentBlob
+from app.models.ai_overview import AIOverview
+from app.services.blob_store import BlobStore
+from app.services.llm_clients import get_client_registry
+from app.services.overview_cache import get_overview_cache
+from app.services.page_fetcher import get_page_fetcher
 import logging
 
+NO_SOURCES_TEXT = "Sorry, I couldn't find enough reliable information to provide a comprehensive overview."
+SUMMARY_ERROR_TEXT = "I encountered an error while generating the overview. Please try again."
+
+
+class SummaryUnavailable(Exception):
+    """The summary could not be written; results carries the fallback text to show instead.
+
+    Raised out of cache builds so a fallback is never stored over a good entry.
+    """
+
+    def __init__(self, message, results=None):
+        super().__init__(message)
+        self.results = results
+
+
 class AIOverviewService:
     def __init__(self, openai_api_key, serpapi_key):
-        self.openai_client = openai.OpenAI(api_key=openai_api_key)
+        self.openai_client = get_client_registry().openai(openai_api_key)
         self.serpapi_key = serpapi_key
         self.logger = logging.getLogger(__name__)
 
@@ -22,53 +38,121 @@ class AIOverviewService:
         start_time = time.time()
 
         try:
-            # Step 1: Check cache first
-            cached_result = self._check_cache(query)
-            if cached_result:
-                return self._create_overview_record(query, user_id, cached_result, time.time() - start_time)
+            # Step 1: Cached results, or generate them once across concurrent requests for the query.
+            # Stale results are served right away while a background refresh replaces them.
+            try:
+                result_data = get_overview_cache().get_or_build(query, lambda: self._generate_results(query),
+                                                                tenant=user_id)
+            except SummaryUnavailable as e:
+                # Shown to the user but not cached, so the next request tries again
+                result_data = e.results
 
-            # Step 2: Search Google using SerpAPI
-            search_results = self._search_google(query)
-            if not search_results:
-                raise Exception("No search results found")
+            # Step 2: Save to database
+            processing_time = time.time() - start_time
+            return self._create_overview_record(query, user_id, result_data, processing_time)
 
-            # Step 3: Extract content from top URLs
-            page_contents = self._extract_page_contents(search_results[:8])  # Top 8 results
+        except Exception as e:
+            self.logger.error(f"Error generating AI overview: {str(e)}")
+            raise
 
-            # Step 4: Generate AI summary
-            overview_text = self._generate_summary(query, page_contents)
+    def generate_overview_stream(self, query, user_id):
+        """Generate an AI overview as a stream of (event, data) pairs.
 
-            # Step 5: Prepare sources
+        'sources' is sent as soon as search and page extraction finish, 'token' events carry the
+        summary text as the model writes it, and 'overview' carries the saved record once the
+        summary is complete. Cached results, and results another request generated meanwhile,
+        are replayed the same way in one token.
+        """
+        start_time = time.time()
+        cache = get_overview_cache()
+        key = cache.make_key(query)
+        build = lambda: self._generate_results(query)
+
+        cached_result = cache.get(query, build, tenant=user_id)
+        call = None
+        if cached_result is None:
+            call = cache.single_flight.lead(key)
+            if call is None:
+                # Another request is generating this query right now: share its results rather than pay twice
+                try:
+                    cached_result = cache.get_or_build(query, build, tenant=user_id)
+                except SummaryUnavailable as e:
+                    cached_result = e.results
+        if call is None:
+            yield 'sources', {'query': query, 'sources_used': cached_result['sources_used'], 'cached': True}
+            yield 'token', {'text': cached_result['overview_text']}
+            yield 'overview', self._create_overview_record(query, user_id, cached_result, time.time() - start_time)
+            return
+
+        # This request leads: requests for the same query wait for its results until settle()
+        try:
+            search_results = self._search_google(query)
+            if not search_results:
+                raise Exception("No search results found")
+            page_contents = self._extract_page_contents(search_results[:8])
             sources_used = self._prepare_sources(search_results[:5], page_contents)
+            yield 'sources', {'query': query, 'sources_used': sources_used, 'cached': False}
 
-            # Step 6: Cache the results
+            summary = []
+            unavailable = None
+            try:
+                for text in self._stream_summary(query, page_contents):
+                    summary.append(text)
+                    yield 'token', {'text': text}
+            except SummaryUnavailable as e:
+                unavailable = e
+                summary = [str(e)]
+                yield 'token', {'text': str(e)}
+
+            # Persist only a complete summary; a client that disconnects mid-stream saves nothing
             result_data = {
-                'overview_text': overview_text,
+                'overview_text': ''.join(summary).strip(),
                 'sources_used': sources_used,
                 'search_results': search_results[:10]
             }
-            self._cache_results(query, result_data)
-
-            # Step 7: Save to database
-            processing_time = time.time() - start_time
-            return self._create_overview_record(query, user_id, result_data, processing_time)
-
+            if unavailable is not None:
+                # Fallback text is handed to the waiting requests but never cached
+                unavailable.results = result_data
+                call.error = unavailable
+            else:
+                cache.put(query, result_data)
+                call.result = result_data
         except Exception as e:
-            self.logger.error(f"Error generating AI overview: {str(e)}")
+            call.error = e
             raise
+        finally:
+            cache.single_flight.settle(key, call)
+        yield 'overview', self._create_overview_record(query, user_id, result_data, time.time() - start_time)
 
-    def _check_cache(self, query):
-        """Check if query results are cached and still valid"""
-        query_hash = hashlib.md5(query.lower().encode()).hexdigest()
-        cached = SearchCache.query.filter_by(query_hash=query_hash).first()
+    def _generate_results(self, query):
+        """Search, read the top pages and summarize them into the cacheable overview results"""
+        # Search Google using SerpAPI
+        search_results = self._search_google(query)
+        if not search_results:
+            raise Exception("No search results found")
 
-        if cached and cached.expires_at > datetime.utcnow():
-            return cached.results
-        elif cached:
-            db.session.delete(cached)
-            db.session.commit()
+        # Extract content from top URLs
+        page_contents = self._extract_page_contents(search_results[:8])  # Top 8 results
 
-        return None
+        # Prepare sources
+        sources_used = self._prepare_sources(search_results[:5], page_contents)
+
+        # Generate AI summary
+        try:
+            overview_text = self._generate_summary(query, page_contents)
+        except SummaryUnavailable as e:
+            e.results = {
+                'overview_text': str(e),
+                'sources_used': sources_used,
+                'search_results': search_results[:10]
+            }
+            raise
+
+        return {
+            'overview_text': overview_text,
+            'sources_used': sources_used,
+            'search_results': search_results[:10]
+        }
 
     def _search_google(self, query):
         """Search Google using SerpAPI"""
@@ -100,77 +184,73 @@ class AIOverviewService:
             return []
 
     def _extract_page_contents(self, search_results):
-        """Extract main content from web pages using BeautifulSoup"""
+        """Extract main content from web pages, downloading them concurrently within one deadline"""
         page_contents = []
 
-        for result in search_results:
-            try:
-                content = self._extract_single_page_content(result['url'])
-                if content:
-                    page_contents.append({
-                        'url': result['url'],
-                        'title': result['title'],
-                        'content': content,
-                        'snippet': result['snippet']
-                    })
-            except Exception as e:
-                self.logger.warning(f"Failed to extract content from {result['url']}: {str(e)}")
-                continue
+        # Pages are parsed on the fetcher's workers as they arrive; slow ones are dropped at the deadline.
+        # Popular pages come from the URL cache, revalidated with a conditional GET once stale.
+        contents = get_page_fetcher().fetch_text_many([result['url'] for result in search_results])
+        for result, content in zip(search_results, contents):
+            if content:
+                page_contents.append({
+                    'url': result['url'],
+                    'title': result['title'],
+                    'content': content[:2000],
+                    'snippet': result['snippet']
+                })
 
         return page_contents
 
     def _extract_single_page_content(self, url):
-        """Extract content from a single web page using BeautifulSoup"""
+        """Extract content from a single web page"""
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-
-            response = requests.get(url, timeout=10, headers=headers)
-            response.raise_for_status()
-
-            soup = BeautifulSoup(response.content, 'html.parser')
+            text = get_page_fetcher().fetch_text(url)
+            return text[:2000] if text else None
+        except Exception as e:
+            self.logger.warning(f"Content extraction failed for {url}: {str(e)}")
+            return None
 
-            # Remove unwanted elements
-            for element in soup(['script', 'style', 'nav', 'header', 'footer', 'aside', 'form']):
-                element.decompose()
+    def _generate_summary(self, query, page_contents):
+        """Generate AI summary using OpenAI, raising SummaryUnavailable with the fallback text on failure"""
+        if not page_contents:
+            raise SummaryUnavailable(NO_SOURCES_TEXT)
 
-            # Try to find main content areas
-            main_content = None
+        try:
+            response = self.openai_client.chat.completions.create(**self._summary_request(query, page_contents))
 
-            # Look for main content selectors
-            content_selectors = [
-                'main', 'article', '.content', '.main-content',
-                '.post-content', '.entry-content', '#content',
-                '.article-body', '.story-body'
-            ]
+            return response.choices[0].message.content.strip()
 
-            for selector in content_selectors:
-                main_content = soup.select_one(selector)
-                if main_content:
-                    break
+        except Exception as e:
+            self.logger.error(f"Error generating summary: {str(e)}")
+            raise SummaryUnavailable(SUMMARY_ERROR_TEXT) from e
 
-            # If no main content found, use body
-            if not main_content:
-                main_content = soup.find('body')
+    def _stream_summary(self, query, page_contents):
+        """Generate the AI summary, yielding text deltas as OpenAI produces them.
 
-            if main_content:
-                text = main_content.get_text(separator=' ', strip=True)
-                # Clean and limit text
-                text = clean_text(text)
-                return text[:2000] if len(text) > 2000 else text
+        Raises SummaryUnavailable with the fallback text if it fails before any text was sent.
+        """
+        if not page_contents:
+            raise SummaryUnavailable(NO_SOURCES_TEXT)
 
-            return None
+        streamed = False
+        try:
+            stream = self.openai_client.chat.completions.create(stream=True,
+                                                                **self._summary_request(query, page_contents))
+            for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    streamed = True
+                    yield delta
 
         except Exception as e:
-            self.logger.warning(f"Content extraction failed for {url}: {str(e)}")
-            return None
-
-    def _generate_summary(self, query, page_contents):
-        """Generate AI summary using OpenAI"""
-        if not page_contents:
-            return "Sorry, I couldn't find enough reliable information to provide a comprehensive overview."
+            self.logger.error(f"Error generating summary: {str(e)}")
+            if streamed:
+                # Part of the answer is already on screen; fail the stream rather than append to it
+                raise
+            raise SummaryUnavailable(SUMMARY_ERROR_TEXT) from e
 
+    def _summary_request(self, query, page_contents):
+        """Chat completion arguments for summarizing the extracted pages"""
         # Combine all content
         combined_content = "\n\n".join([
             f"Source: {content['title']}\n{content['content']}"
@@ -192,22 +272,15 @@ Instructions:
 
 Answer:"""
 
-        try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are a helpful AI assistant that provides accurate, comprehensive overviews based on web search results. Write in a natural, informative tone."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                max_tokens=500
-            )
-
-            return response.choices[0].message.content.strip()
-
-        except Exception as e:
-            self.logger.error(f"Error generating summary: {str(e)}")
-            return "I encountered an error while generating the overview. Please try again."
+        return dict(
+            model="gpt-4",
+            messages=[
+                {"role": "system", "content": "You are a helpful AI assistant that provides accurate, comprehensive overviews based on web search results. Write in a natural, informative tone."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.3,
+            max_tokens=500
+        )
 
     def _prepare_sources(self, search_results, page_contents):
         """Prepare sources list for display"""
@@ -224,29 +297,17 @@ Answer:"""
 
         return sources
 
-    def _cache_results(self, query, result_data):
-        """Cache search results"""
-        query_hash = hashlib.md5(query.lower().encode()).hexdigest()
-        expires_at = datetime.utcnow() + timedelta(hours=6)  # Cache for 6 hours
-
-        cache_entry = SearchCache(
-            query_hash=query_hash,
-            search_query=query,  # Updated to use search_query
-            results=result_data,
-            expires_at=expires_at
-        )
-
-        db.session.add(cache_entry)
-        db.session.commit()
-
     def _create_overview_record(self, query, user_id, result_data, processing_time):
         """Create and save AI overview record"""
+        # Cached results are saved by many requests at once; insert-ignore keeps their shared blobs from colliding
+        overview_hash, search_results_hash = BlobStore().put_many([
+            result_data['overview_text'], ContentBlob.encode(result_data['search_results'])])
         overview = AIOverview(
             user_id=user_id,
             search_query=query,  # Updated to use search_query
-            overview_text=result_data['overview_text'],
+            overview_hash=overview_hash,
             sources_used=result_data['sources_used'],
-            search_results=result_data['search_results'],
+            search_results_hash=search_results_hash,
             processing_time=processing_time
         )
 
@@ -257,7 +318,9 @@ Answer:"""
 
     def get_user_overviews(self, user_id, limit=20):
         """Get user's recent AI overviews"""
-        overviews = AIOverview.query.filter_by(user_id=user_id)\
+        overviews = AIOverview.query.options(selectinload(AIOverview.overview_blob),
+                                             selectinload(AIOverview.search_results_blob))\
+            .filter_by(user_id=user_id)\
             .order_by(AIOverview.created_at.desc())\
             .limit(limit).all()
 
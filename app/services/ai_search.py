@@ -1,167 +1,276 @@
 import openai
 import anthropic
 import requests
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set, Tuple
 from datetime import datetime
 import json
 import time
 import re
 from flask import current_app
+from app.services.fanout import get_fanout_engine
+from app.services.rate_limiter import get_rate_limiter
+from app.services.llm_clients import get_client_registry
+from app.services.response_cache import get_response_cache
+from app.services.single_flight import get_single_flight
+from app.services.mention_scanner import Mention, MentionScanner, get_mention_scanner
+from app.services.sentiment import get_sentiment_analyzer
 
 
 class AISearchService:
-    def __init__(self, openai_key: str = None, anthropic_key: str = None):
+    chatgpt_model = "gpt-3.5-turbo"
+    claude_model = "claude-3-sonnet-20240229"
+    max_tokens = 1000
+
+    def __init__(self, openai_key: str = None, anthropic_key: str = None, openai_client=None, anthropic_client=None,
+                 rate_limiter=None, cache=None):
         self.openai_key = openai_key or current_app.config.get('OPENAI_API_KEY')
         self.anthropic_key = anthropic_key or current_app.config.get('ANTHROPIC_API_KEY')
 
-        # Initialize OpenAI client (new v1.0+ format)
-        if self.openai_key:
-            self.openai_client = openai.OpenAI(api_key=self.openai_key)
+        # Initialize OpenAI client (new v1.0+ format); an injected client (e.g. a fake) takes precedence
+        if openai_client is not None:
+            self.openai_client = openai_client
+        elif self.openai_key:
+            self.openai_client = get_client_registry().openai(self.openai_key)
         else:
             self.openai_client = None
 
         # Initialize Anthropic client correctly
-        if self.anthropic_key:
+        if anthropic_client is not None:
+            self.anthropic_client = anthropic_client
+        elif self.anthropic_key:
             try:
-                self.anthropic_client = anthropic.Anthropic(api_key=self.anthropic_key)
+                self.anthropic_client = get_client_registry().anthropic(self.anthropic_key)
             except Exception as e:
                 print(f"Error initializing Anthropic client: {e}")
                 self.anthropic_client = None
         else:
             self.anthropic_client = None
 
-    def search_chatgpt(self, query: str, brand_name: str = None) -> Dict:
-        """Search using OpenAI GPT API (v1.0+ format)"""
-        if not self.openai_key or not self.openai_client:
-            return self._mock_response('chatgpt', query, 'OpenAI API key not configured', brand_name)
+        self.fanout = get_fanout_engine()
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.cache = cache or get_response_cache()
+        self.sentiment = get_sentiment_analyzer()
+        self.single_flight = get_single_flight(self.cache.backend)
 
-        try:
-            # Create a search-like prompt
-            search_prompt = f"""
+    def chatgpt_request(self, query: str) -> Dict:
+        """Build the chat.completions.create arguments for a query"""
+        # Create a search-like prompt
+        search_prompt = f"""
             Please provide a comprehensive answer to this query: "{query}"
 
             Include relevant companies, brands, and sources in your response. 
             Be factual and cite specific examples where appropriate.
             """
 
-            # Use new v1.0+ API format
-            response = self.openai_client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system",
-                     "content": "You are a helpful AI assistant that provides comprehensive, factual responses with specific company and brand mentions when relevant."},
-                    {"role": "user", "content": search_prompt}
-                ],
-                temperature=0.7,
-                max_tokens=1000
-            )
-
-            content = response.choices[0].message.content
-
-            # Analyze brand mentions if brand_name provided
-            analysis = {}
-            if brand_name:
-                analysis = self.analyze_brand_mentions(content, brand_name)
-
-            return {
-                'platform': 'chatgpt',
-                'query': query,
-                'response': content,
-                'brand_analysis': analysis,
-                'timestamp': datetime.utcnow().isoformat(),
-                'success': True,
-                'tokens_used': response.usage.total_tokens if hasattr(response, 'usage') else 0
-            }
-
-        except Exception as e:
-            print(f"ChatGPT API Error: {e}")
-            return {
-                'platform': 'chatgpt',
-                'query': query,
-                'error': str(e),
-                'success': False,
-                'timestamp': datetime.utcnow().isoformat()
-            }
-
-    def search_claude(self, query: str, brand_name: str = None) -> Dict:
-        """Search using Claude API"""
-        if not self.anthropic_key or not self.anthropic_client:
-            return self._mock_response('claude', query,
-                                       'Anthropic API key not configured or client initialization failed', brand_name)
+        return {
+            'model': self.chatgpt_model,
+            'messages': [
+                {"role": "system",
+                 "content": "You are a helpful AI assistant that provides comprehensive, factual responses with specific company and brand mentions when relevant."},
+                {"role": "user", "content": search_prompt}
+            ],
+            'temperature': 0.7,
+            'max_tokens': self.max_tokens
+        }
 
-        try:
-            search_prompt = f"""
+    def claude_request(self, query: str) -> Dict:
+        """Build the messages.create arguments for a query"""
+        search_prompt = f"""
             Please provide a detailed response to this query: "{query}"
 
             Include relevant companies, products, and sources in your answer.
             Be comprehensive and mention specific brands or services when appropriate.
             """
 
-            message = self.anthropic_client.messages.create(
-                model="claude-3-sonnet-20240229",
-                max_tokens=1000,
-                messages=[
-                    {"role": "user", "content": search_prompt}
-                ]
-            )
+        return {
+            'model': self.claude_model,
+            'max_tokens': self.max_tokens,
+            'messages': [
+                {"role": "user", "content": search_prompt}
+            ]
+        }
 
-            content = message.content[0].text
+    def cache_key(self, platform: str, request: Dict) -> str:
+        """Response cache key for a provider request built by chatgpt_request/claude_request"""
+        return self.cache.make_key(platform, request['model'], request['messages'][-1]['content'],
+                                   request.get('temperature'), request.get('max_tokens'))
 
-            # Analyze brand mentions if brand_name provided
-            analysis = {}
-            if brand_name:
-                analysis = self.analyze_brand_mentions(content, brand_name)
+    def search_chatgpt(self, query: str, brand_name: str = None, use_cache: bool = True,
+                       refresh: bool = False) -> Dict:
+        """Search using OpenAI GPT API (v1.0+ format)"""
+        if not self.openai_client:
+            return self._mock_response('chatgpt', query, 'OpenAI API key not configured', brand_name)
 
-            return {
-                'platform': 'claude',
-                'query': query,
-                'response': content,
-                'brand_analysis': analysis,
-                'timestamp': datetime.utcnow().isoformat(),
-                'success': True,
-                'tokens_used': getattr(message.usage, 'input_tokens', 0) + getattr(message.usage, 'output_tokens',
-                                                                                   0) if hasattr(message,
-                                                                                                 'usage') else 0
-            }
+        try:
+            request = self.chatgpt_request(query)
+
+            def complete() -> Dict:
+                # Use new v1.0+ API format
+                with self.rate_limiter.acquire('openai', request['model'],
+                                               tokens=self._estimate_tokens(request['messages'][-1]['content'])) as lease:
+                    response = self.openai_client.chat.completions.create(**request)
+                    tokens_used = response.usage.total_tokens if hasattr(response, 'usage') else 0
+                    lease.record_tokens(tokens_used)
+                return {'response': response.choices[0].message.content, 'tokens_used': tokens_used}
+
+            completion, cached = self._cached_completion(self.cache_key('chatgpt', request), complete,
+                                                         use_cache, refresh)
+            return self._platform_result('chatgpt', query, completion, cached, brand_name)
+
+        except Exception as e:
+            print(f"ChatGPT API Error: {e}")
+            return self._error_response('chatgpt', query, str(e))
+
+    def search_claude(self, query: str, brand_name: str = None, use_cache: bool = True,
+                      refresh: bool = False) -> Dict:
+        """Search using Claude API"""
+        if not self.anthropic_client:
+            return self._mock_response('claude', query,
+                                       'Anthropic API key not configured or client initialization failed', brand_name)
+
+        try:
+            request = self.claude_request(query)
+
+            def complete() -> Dict:
+                with self.rate_limiter.acquire('anthropic', request['model'],
+                                               tokens=self._estimate_tokens(request['messages'][-1]['content'])) as lease:
+                    message = self.anthropic_client.messages.create(**request)
+                    tokens_used = getattr(message.usage, 'input_tokens', 0) + getattr(message.usage, 'output_tokens',
+                                                                                      0) if hasattr(message,
+                                                                                                    'usage') else 0
+                    lease.record_tokens(tokens_used)
+                return {'response': message.content[0].text, 'tokens_used': tokens_used}
+
+            completion, cached = self._cached_completion(self.cache_key('claude', request), complete,
+                                                         use_cache, refresh)
+            return self._platform_result('claude', query, completion, cached, brand_name)
 
         except Exception as e:
             print(f"Claude API Error: {e}")
-            return {
-                'platform': 'claude',
-                'query': query,
-                'error': str(e),
-                'success': False,
-                'timestamp': datetime.utcnow().isoformat()
-            }
+            return self._error_response('claude', query, str(e))
 
-    def search_perplexity(self, query: str, brand_name: str = None) -> Dict:
+    def search_perplexity(self, query: str, brand_name: str = None, use_cache: bool = True,
+                          refresh: bool = False) -> Dict:
         """Search using Perplexity API (mock for now - replace with real API when available)"""
         return self._mock_response('perplexity', query, brand_name=brand_name)
 
-    def search_all_platforms(self, query: str, brand_name: str = None) -> List[Dict]:
-        """Search across all available AI platforms"""
-        results = []
+    def _cached_completion(self, cache_key: str, complete, use_cache: bool, refresh: bool):
+        """Return (completion, cached) for a request, calling the provider only on a cache miss.
+
+        Identical concurrent misses are coalesced into one provider call (single flight).
+        """
+        if not use_cache:
+            completion, _ = self.single_flight.do(f'nocache:{cache_key}', complete)
+            return completion, False
+
+        if refresh:
+            # Evict first so neither we nor other workers' single-flight lookups see the old entry
+            self.cache.delete(cache_key)
+        else:
+            completion = self.cache.get(cache_key)
+            if completion is not None:
+                return completion, True
+
+        def complete_and_store() -> Dict:
+            completion = complete()
+            self.cache.set(cache_key, completion)
+            return completion
+
+        completion, coalesced = self.single_flight.do(cache_key, complete_and_store,
+                                                      shared_lookup=lambda: self.cache.peek(cache_key))
+        return completion, coalesced
+
+    def score_response(self, platform: str, query: str, response_text: str, brand_name: str = None,
+                       cached: bool = False, tokens_used: int = 0) -> Dict:
+        """Build a successful platform result for a response obtained elsewhere, e.g. stored or batched"""
+        return self._platform_result(platform, query, {'response': response_text, 'tokens_used': tokens_used},
+                                     cached, brand_name)
+
+    def _platform_result(self, platform: str, query: str, completion: Dict, cached: bool,
+                         brand_name: str = None) -> Dict:
+        """Build a successful platform result from a raw completion"""
+        content = completion['response']
+
+        # Analyze brand mentions if brand_name provided
+        analysis = {}
+        if brand_name:
+            analysis = self.analyze_brand_mentions(content, brand_name)
+
+        return {
+            'platform': platform,
+            'query': query,
+            'response': content,
+            'brand_analysis': analysis,
+            'timestamp': datetime.utcnow().isoformat(),
+            'success': True,
+            'cached': cached,
+            # A cache hit costs nothing, so only fresh completions report their token spend
+            'tokens_used': 0 if cached else completion.get('tokens_used', 0)
+        }
 
-        # Search ChatGPT
-        print(f"Searching ChatGPT for: {query}")
-        chatgpt_result = self.search_chatgpt(query, brand_name)
-        results.append(chatgpt_result)
+    def search_all_platforms(self, query: str, brand_name: str = None, use_cache: bool = True,
+                             refresh: bool = False) -> List[Dict]:
+        """Search across all available AI platforms concurrently"""
+        print(f"Searching all platforms for: {query}")
+        calls = self._platform_calls(query, brand_name, use_cache, refresh)
+        return self.fanout.run(calls, on_error=lambda platform, error: self._error_response(platform, query, error))
+
+    def iter_platform_results(self, queries: List[str], brand_name: str = None, use_cache: bool = True,
+                              refresh: bool = False, skip: Set[Tuple[str, str]] = None):
+        """Fan out every (query, platform) pair at once and yield (index, result) as each completes.
+
+        Indexes follow query order, then platform order, so callers can restore a stable ordering.
+        Pairs in skip (e.g. ones answered from fresh stored results) are not called.
+        """
+        calls = []
+        for query in queries:
+            for platform, call in self._platform_calls(query, brand_name, use_cache, refresh):
+                if not skip or (query, platform) not in skip:
+                    calls.append(((platform, query), call))
+        return self.fanout.iter_completed(calls, on_error=lambda key, error: self._error_response(key[0], key[1],
+                                                                                                   error))
+
+    def _platform_calls(self, query: str, brand_name: str = None, use_cache: bool = True,
+                        refresh: bool = False) -> List:
+        """Build the (platform, call) pairs for a fan-out, in stable platform order"""
+        return [
+            ('chatgpt', lambda: self.search_chatgpt(query, brand_name, use_cache, refresh)),
+            ('claude', lambda: self.search_claude(query, brand_name, use_cache, refresh)),
+            ('perplexity', lambda: self.search_perplexity(query, brand_name, use_cache, refresh)),
+        ]
 
-        # Add delay between API calls
-        time.sleep(1)
+    def platform_names(self) -> List[str]:
+        """Every platform a fan-out queries, in result order"""
+        return [platform for platform, _ in self._platform_calls('')]
 
-        # Search Claude
-        print(f"Searching Claude for: {query}")
-        claude_result = self.search_claude(query, brand_name)
-        results.append(claude_result)
+    def order_results(self, queries: List[str], results: List[Dict]) -> List[Dict]:
+        """Sort platform results into query order, then platform order"""
+        query_order = {query: index for index, query in enumerate(queries)}
+        platform_order = {platform: index for index, platform in enumerate(self.platform_names())}
+        return sorted(results, key=lambda result: (query_order.get(result['query'], len(query_order)),
+                                                   platform_order.get(result['platform'], len(platform_order))))
 
-        # Search Perplexity (mock)
-        perplexity_result = self.search_perplexity(query, brand_name)
-        results.append(perplexity_result)
+    def billable_platforms(self) -> List[str]:
+        """Platforms answered by a paid provider API rather than a mock"""
+        return [platform for platform, client in (('chatgpt', self.openai_client), ('claude', self.anthropic_client))
+                if client]
 
-        return results
+    def _estimate_tokens(self, prompt: str) -> int:
+        """Rough up-front token estimate (~4 chars per token plus the completion budget)"""
+        return len(prompt) // 4 + self.max_tokens
 
-    def analyze_brand_mentions(self, response_text: str, brand_name: str) -> Dict:
+    def _error_response(self, platform: str, query: str, error: str) -> Dict:
+        """Build a failed platform result"""
+        return {
+            'platform': platform,
+            'query': query,
+            'error': error,
+            'success': False,
+            'timestamp': datetime.utcnow().isoformat()
+        }
+
+    def analyze_brand_mentions(self, response_text: str, brand_name: str, aliases: List[str] = None,
+                               mentions: List[Mention] = None) -> Dict:
         """Analyze brand mentions in AI response"""
         if not response_text or not brand_name:
             return {
@@ -173,32 +282,35 @@ class AISearchService:
                 'visibility_score': 0.0
             }
 
-        response_lower = response_text.lower()
-        brand_lower = brand_name.lower()
+        # Callers that already scanned the response for several brands pass their mentions in
+        if mentions is None:
+            mentions = get_mention_scanner([brand_name], {brand_name: aliases or []}).scan(response_text)
 
         # Count direct mentions
-        direct_mentions = response_lower.count(brand_lower)
+        direct_mentions = len(mentions)
 
         # Find mention contexts
-        contexts = self._extract_mention_contexts(response_text, brand_name)
+        contexts = MentionScanner.contexts(response_text, mentions)
 
-        # Analyze sentiment around mentions
-        sentiment_score = self._analyze_sentiment(response_text, brand_name)
+        # Analyze sentiment around mentions; the response is tokenized once for all windows
+        sentiment_windows = [(max(0, mention.start - 100), min(len(response_text), mention.end + 100))
+                             for mention in mentions]
+        sentiment_score = self.sentiment.score_windows(response_text, sentiment_windows)
 
         # Determine mention type
         mention_type = 'none'
         if direct_mentions > 0:
             mention_type = 'direct'
-        elif any(
-                word in response_lower for word in [brand_lower.split()[0] if ' ' in brand_lower else brand_lower[:5]]):
-            mention_type = 'indirect'
+        else:
+            brand_lower = brand_name.lower()
+            partial = brand_lower.split()[0] if ' ' in brand_lower else brand_lower[:5]
+            if partial in response_text.lower():
+                mention_type = 'indirect'
 
         # Calculate position score (higher if mentioned earlier)
         position_score = 0
-        if contexts:
-            first_mention_pos = response_text.lower().find(brand_lower)
-            if first_mention_pos >= 0:
-                position_score = max(10, 100 - (first_mention_pos / len(response_text)) * 90)
+        if mentions:
+            position_score = max(10, 100 - (mentions[0].start / len(response_text)) * 90)
 
         return {
             'direct_mentions': direct_mentions,
@@ -237,64 +349,15 @@ class AISearchService:
 
         # Get contexts around brand mentions
         contexts = self._extract_mention_contexts(text, brand_name, context_length=200)
-
-        if not contexts:
-            return 0.0
-
-        positive_words = [
-            'excellent', 'best', 'great', 'outstanding', 'recommended', 'top', 'leading',
-            'innovative', 'reliable', 'trusted', 'popular', 'successful', 'effective',
-            'quality', 'superior', 'amazing', 'fantastic', 'impressive', 'strong',
-            'premier', 'prestigious', 'renowned', 'established', 'accredited'
-        ]
-
-        negative_words = [
-            'poor', 'bad', 'worst', 'terrible', 'avoid', 'problematic', 'failed',
-            'disappointing', 'unreliable', 'weak', 'inferior', 'lacking', 'struggling'
-        ]
-
-        total_sentiment = 0
-        for context in contexts:
-            context_lower = context.lower()
-            positive_count = sum(1 for word in positive_words if word in context_lower)
-            negative_count = sum(1 for word in negative_words if word in context_lower)
-
-            total_sentiment += (positive_count - negative_count)
-
-        # Normalize to -1 to 1 scale
-        if len(contexts) > 0:
-            normalized_sentiment = total_sentiment / (len(contexts) * 5)  # Divide by max possible sentiment per context
-            return max(-1, min(1, normalized_sentiment))
-
-        return 0.0
+        return self.sentiment.score_contexts(contexts)
 
     def _extract_mention_contexts(self, text: str, brand_name: str, context_length: int = 150) -> List[str]:
         """Extract context around brand mentions"""
         if not text or not brand_name:
             return []
 
-        contexts = []
-        text_lower = text.lower()
-        brand_lower = brand_name.lower()
-
-        start = 0
-        while True:
-            pos = text_lower.find(brand_lower, start)
-            if pos == -1:
-                break
-
-            # Extract context around the mention
-            context_start = max(0, pos - context_length // 2)
-            context_end = min(len(text), pos + len(brand_name) + context_length // 2)
-            context = text[context_start:context_end].strip()
-
-            # Clean up context
-            if context and context not in contexts:
-                contexts.append(context)
-
-            start = pos + len(brand_name)
-
-        return contexts
+        mentions = get_mention_scanner([brand_name]).scan(text)
+        return MentionScanner.contexts(text, mentions, context_length)
 
     def _mock_response(self, platform: str, query: str, error: str = None, brand_name: str = None) -> Dict:
         """Generate mock response when API is not available"""
@@ -0,0 +1,310 @@
+import json
+import multiprocessing
+import os
+from collections import deque, namedtuple
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterator, List, Tuple
+from sqlalchemy import and_, func, or_, update
+from app.models import db, Brand, SearchQuery, SearchResult, BackfillCheckpoint
+from app.services.blob_store import BlobStore
+from app.services.brand_monitor import BrandMonitoringService
+from app.services.bulk_writer import BulkWriter
+
+# Analysis fields compared (and sampled) by the dry-run diff
+DIFF_FIELDS = ('direct_mentions', 'mention_type', 'sentiment_score', 'position_score', 'visibility_score')
+
+# A stored row waiting for its re-analysis; the response text itself only travels to the pool
+_PendingRow = namedtuple('_PendingRow', ['id', 'brand_id', 'inferred_brand', 'created_at', 'brand_mentions'])
+
+_worker_analyzer = None  # Per-process AISearchService for pool workers
+
+
+def _init_worker(config_name: str):
+    """Give a pool worker its own app and analyzer; workers never touch the database"""
+    global _worker_analyzer
+    from app import create_app
+    from app.services.ai_search import AISearchService
+
+    app = create_app(config_name)
+    app.app_context().push()
+    _worker_analyzer = AISearchService()
+
+
+def analyze_items(items: List[Tuple[int, str, str]], analyzer=None) -> List[Tuple[int, Dict]]:
+    """Re-run the brand mention analysis for [(search_query_id, brand_name, response_text)]"""
+    analyzer = analyzer or _worker_analyzer
+    return [(query_id, analyzer.analyze_brand_mentions(text, brand_name)) for query_id, brand_name, text in items]
+
+
+class BackfillEngine:
+    """Re-run the mention analyzers over stored responses, without calling any provider.
+
+    Phase one streams search_queries in keyset-ordered id chunks, reads each chunk's text
+    from the blob store, re-analyzes it on a process pool and writes the changed analyses
+    and SearchResult rows back in one transaction together with the checkpoint. Phase two
+    rebuilds AnalyticsData for every (brand, day) in the range from the latest answer per
+    query and platform. Only a few chunks are in flight at once, so memory stays bounded
+    however many rows there are, and an interrupted backfill resumes from its checkpoint.
+    A dry run writes nothing and reports what would change instead.
+    """
+
+    def __init__(self, name: str = 'mentions', batch_size: int = 1000, workers: int = None, dry_run: bool = False,
+                 config_name: str = 'default', samples: int = 20):
+        self.name = name
+        self.batch_size = batch_size
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.dry_run = dry_run
+        self.config_name = config_name
+        self.samples = samples
+        self.writer = BulkWriter()
+        self.blobs = BlobStore()
+        self._brand_names = {}  # brand_id -> name
+        self._user_brands = {}  # user_id -> [brand_id], for rows stored before brand_id was recorded
+        self._affected_days = set()  # (brand_id, day) a dry run would rebuild
+
+    def run(self, restart: bool = False) -> Dict:
+        """Run (or resume) the backfill and return its checkpoint with the collected stats"""
+        checkpoint = self._checkpoint(restart)
+        if checkpoint.phase == 'completed':
+            print(f"Backfill {self.name} already completed; restart it to run again")
+            return checkpoint.to_dict()
+
+        if checkpoint.phase == 'analyze':
+            self._analyze(checkpoint)
+
+        if self.dry_run:
+            checkpoint.stats = dict(checkpoint.stats, analytics_days=len(self._affected_days))
+        elif checkpoint.phase == 'analytics':
+            self._rebuild_analytics(checkpoint)
+        return checkpoint.to_dict()
+
+    def _checkpoint(self, restart: bool) -> BackfillCheckpoint:
+        end_id = db.session.query(func.max(SearchQuery.id)).scalar() or 0
+        if self.dry_run:
+            # Dry runs always diff the whole table and never save a checkpoint
+            return BackfillCheckpoint(name=self.name, phase='analyze', end_id=end_id, last_id=0,
+                                      stats=self._empty_stats())
+
+        checkpoint = BackfillCheckpoint.query.filter_by(name=self.name).first()
+        if checkpoint and restart:
+            db.session.delete(checkpoint)
+            db.session.commit()
+            checkpoint = None
+
+        if checkpoint is None:
+            checkpoint = BackfillCheckpoint(name=self.name, phase='analyze', end_id=end_id, last_id=0,
+                                            stats=self._empty_stats())
+            db.session.add(checkpoint)
+            db.session.commit()
+        else:
+            print(f"Resuming backfill {self.name} ({checkpoint.phase}) after id {checkpoint.last_id}")
+        return checkpoint
+
+    @staticmethod
+    def _empty_stats() -> Dict:
+        return {'scanned': 0, 'changed': 0, 'skipped': 0, 'brand_assigned': 0, 'mentions_before': 0,
+                'mentions_after': 0, 'visibility_delta': 0.0, 'analytics_rows': 0, 'samples': []}
+
+    def _analyze(self, checkpoint: BackfillCheckpoint):
+        pool = None
+        analyzer = None
+        if self.workers > 1:
+            pool = multiprocessing.get_context().Pool(self.workers, initializer=_init_worker,
+                                                      initargs=(self.config_name,))
+        else:
+            from app.services.ai_search import AISearchService
+            analyzer = AISearchService()
+
+        in_flight = deque()
+        try:
+            for rows, items in self._chunks(checkpoint):
+                if pool is None:
+                    self._apply(checkpoint, rows, analyze_items(items, analyzer))
+                    continue
+
+                in_flight.append((rows, pool.apply_async(analyze_items, (items,))))
+                # Bounded read-ahead: wait for the oldest chunk before reading any further
+                if len(in_flight) >= self.workers * 2:
+                    done_rows, analyses = in_flight.popleft()
+                    self._apply(checkpoint, done_rows, analyses.get())
+
+            while in_flight:
+                done_rows, analyses = in_flight.popleft()
+                self._apply(checkpoint, done_rows, analyses.get())
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+
+        checkpoint.phase = 'analytics'
+        self._save(checkpoint)
+
+    def _chunks(self, checkpoint: BackfillCheckpoint) -> Iterator[Tuple[List[_PendingRow], List[Tuple[int, str, str]]]]:
+        """Keyset-paginated chunks of (rows, analyzer items) after the checkpoint"""
+        last_id = checkpoint.last_id or 0
+        while True:
+            rows = db.session.query(SearchQuery.id, SearchQuery.user_id, SearchQuery.brand_id, SearchQuery.created_at,
+                                    SearchQuery.response_hash, SearchQuery.inline_response_text,
+                                    SearchQuery.brand_mentions).filter(
+                SearchQuery.id > last_id, SearchQuery.id <= checkpoint.end_id
+            ).order_by(SearchQuery.id).limit(self.batch_size).all()
+            if not rows:
+                return
+            last_id = rows[-1].id
+
+            self._load_brands(rows)
+            texts = self.blobs.get_many(row.response_hash for row in rows if row.response_hash)
+            pending = []
+            items = []
+            for row in rows:
+                brand_id = row.brand_id or self._infer_brand(row.user_id)
+                text = texts.get(row.response_hash) if row.response_hash else row.inline_response_text
+                pending.append(_PendingRow(row.id, brand_id, row.brand_id is None and brand_id is not None,
+                                           row.created_at, row.brand_mentions))
+                if brand_id and text:
+                    items.append((row.id, self._brand_names[brand_id], text))
+            yield pending, items
+
+    def _load_brands(self, rows):
+        """Cache the names of the chunk's brands, and each user's brands for rows without a brand_id"""
+        users = {row.user_id for row in rows if row.brand_id is None and row.user_id not in self._user_brands}
+        brand_ids = {row.brand_id for row in rows if row.brand_id and row.brand_id not in self._brand_names}
+        if users:
+            for user_id in users:
+                self._user_brands[user_id] = []
+            for brand_id, user_id, name in db.session.query(Brand.id, Brand.user_id, Brand.name).filter(
+                    Brand.user_id.in_(users)):
+                self._user_brands[user_id].append(brand_id)
+                self._brand_names[brand_id] = name
+        brand_ids -= set(self._brand_names)
+        if brand_ids:
+            self._brand_names.update(db.session.query(Brand.id, Brand.name).filter(Brand.id.in_(brand_ids)).all())
+
+    def _infer_brand(self, user_id: int):
+        """The brand of an older row: only unambiguous when its user has exactly one brand"""
+        brands = self._user_brands.get(user_id) or []
+        return brands[0] if len(brands) == 1 else None
+
+    def _apply(self, checkpoint: BackfillCheckpoint, rows: List[_PendingRow], analyses: List[Tuple[int, Dict]]):
+        """Write (or, in a dry run, only count) the chunk's changed analyses and advance the checkpoint"""
+        analyses = dict(analyses)
+        stats = dict(checkpoint.stats)
+        samples = list(stats['samples'])
+        mention_updates = []
+        brand_updates = []
+        result_rows = []
+        changed_ids = []
+
+        for row in rows:
+            stats['scanned'] += 1
+            analysis = analyses.get(row.id)
+            if analysis is None:
+                stats['skipped'] += 1  # No stored text, or no brand to analyze it for
+                continue
+
+            # Compare in stored (JSON) form so unchanged analyses are not rewritten
+            before = row.brand_mentions or {}
+            after = json.loads(json.dumps(analysis, default=str))
+            if row.inferred_brand:
+                stats['brand_assigned'] += 1
+            if before == after:
+                if row.inferred_brand:
+                    brand_updates.append({'id': row.id, 'brand_id': row.brand_id})
+                continue
+
+            stats['changed'] += 1
+            stats['mentions_before'] += before.get('direct_mentions', 0) or 0
+            stats['mentions_after'] += after.get('direct_mentions', 0)
+            stats['visibility_delta'] = round(stats['visibility_delta'] + after.get('visibility_score', 0) -
+                                            (before.get('visibility_score', 0) or 0), 4)
+            if len(samples) < self.samples:
+                fields = [field for field in DIFF_FIELDS if before.get(field) != after.get(field)]
+                samples.append({'id': row.id, 'before': {field: before.get(field) for field in fields},
+                                'after': {field: after.get(field) for field in fields}})
+
+            mention_updates.append({'id': row.id, 'brand_id': row.brand_id, 'brand_mentions': after,
+                                    'sentiment_score': after.get('sentiment_score', 0)})
+            changed_ids.append(row.id)
+            if after.get('direct_mentions', 0) > 0:
+                result_rows.append(BrandMonitoringService.search_result_row(row.id, after))
+            if self.dry_run:
+                self._affected_days.add((row.brand_id, row.created_at.date()))
+
+        if not self.dry_run:
+            try:
+                if mention_updates:
+                    db.session.execute(update(SearchQuery), mention_updates)
+                if brand_updates:
+                    db.session.execute(update(SearchQuery), brand_updates)
+                if changed_ids:
+                    db.session.query(SearchResult).filter(SearchResult.search_query_id.in_(changed_ids)).delete(
+                        synchronize_session=False)
+                    self.writer.insert_rows(SearchResult, result_rows)
+            except Exception as e:
+                db.session.rollback()
+                print(f"❌ Error writing backfill chunk ending at id {rows[-1].id}: {e}")
+                raise
+
+        stats['samples'] = samples
+        checkpoint.stats = stats
+        checkpoint.last_id = rows[-1].id
+        self._save(checkpoint)
+        print(f"Backfill {self.name}: {stats['scanned']} rows scanned, {stats['changed']} changed "
+              f"(through id {checkpoint.last_id})")
+
+    def _rebuild_analytics(self, checkpoint: BackfillCheckpoint):
+        """Recompute AnalyticsData for every (brand, day) with responses in the backfilled range"""
+        day_column = func.date(SearchQuery.created_at)
+        keys_per_batch = max(1, self.batch_size // 10)
+        while True:
+            keys = db.session.query(SearchQuery.brand_id, day_column).filter(
+                SearchQuery.id <= checkpoint.end_id, SearchQuery.brand_id.isnot(None))
+            if checkpoint.last_brand_id is not None:
+                keys = keys.filter(or_(SearchQuery.brand_id > checkpoint.last_brand_id,
+                                       and_(SearchQuery.brand_id == checkpoint.last_brand_id,
+                                            day_column > checkpoint.last_day.isoformat())))
+            keys = keys.distinct().order_by(SearchQuery.brand_id, day_column).limit(keys_per_batch).all()
+            if not keys:
+                break
+
+            analytics_rows = []
+            for brand_id, day in keys:
+                day = day if isinstance(day, date) else date.fromisoformat(str(day))
+                analytics_rows.extend(self._daily_analytics(brand_id, day))
+
+            try:
+                self.writer.upsert_analytics(analytics_rows)
+            except Exception as e:
+                db.session.rollback()
+                print(f"❌ Error rebuilding analytics after brand {checkpoint.last_brand_id}: {e}")
+                raise
+
+            last_brand_id, last_day = keys[-1]
+            checkpoint.last_brand_id = last_brand_id
+            checkpoint.last_day = last_day if isinstance(last_day, date) else date.fromisoformat(str(last_day))
+            checkpoint.stats = dict(checkpoint.stats, analytics_rows=checkpoint.stats['analytics_rows'] +
+                                    len(analytics_rows))
+            self._save(checkpoint)
+
+        checkpoint.phase = 'completed'
+        checkpoint.completed_at = datetime.utcnow()
+        self._save(checkpoint)
+        print(f"✅ Backfill {self.name} completed: {checkpoint.stats['analytics_rows']} analytics rows rebuilt")
+
+    def _daily_analytics(self, brand_id: int, day: date) -> List[Dict]:
+        """A brand's analytics rows for a day, from the latest stored answer per query and platform"""
+        start = datetime.combine(day, time.min)
+        rows = db.session.query(SearchQuery.query_text, SearchQuery.ai_platform, SearchQuery.brand_mentions).filter(
+            SearchQuery.brand_id == brand_id,
+            SearchQuery.created_at >= start,
+            SearchQuery.created_at < start + timedelta(days=1)
+        ).order_by(SearchQuery.created_at, SearchQuery.id).all()
+
+        latest = {}
+        for query_text, platform, analysis in rows:
+            latest[(query_text, platform)] = {'platform': platform, 'success': True, 'brand_analysis': analysis or {}}
+        return BrandMonitoringService.analytics_rows(brand_id, day, list(latest.values()))
+
+    def _save(self, checkpoint: BackfillCheckpoint):
+        if not self.dry_run:
+            db.session.commit()
@@ -0,0 +1,298 @@
+import json
+import httpx
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from app.models import db, Brand
+from app.models.batch_job import BatchRun, BatchJob
+from app.services.brand_monitor import BrandMonitoringService
+
+
+class OpenAIBatchProvider:
+    """Submit chat completions through the OpenAI Batch API"""
+
+    platform = 'chatgpt'
+    STATUS_MAP = {
+        'validating': 'in_progress',
+        'in_progress': 'in_progress',
+        'finalizing': 'in_progress',
+        'completed': 'completed',
+        'expired': 'completed',  # Expired batches still return whatever finished
+        'failed': 'failed',
+        'cancelling': 'failed',
+        'cancelled': 'failed'
+    }
+
+    def __init__(self, client):
+        self.client = client
+
+    def submit(self, requests: Dict[str, Dict], idempotency_key: str = None) -> str:
+        lines = [
+            json.dumps({'custom_id': custom_id, 'method': 'POST', 'url': '/v1/chat/completions', 'body': body})
+            for custom_id, body in requests.items()
+        ]
+        input_file = self.client.files.create(file=('monitoring_batch.jsonl', '\n'.join(lines).encode()),
+                                              purpose='batch')
+        body = {
+            'input_file_id': input_file.id,
+            'endpoint': '/v1/chat/completions',
+            'completion_window': '24h'
+        }
+        if idempotency_key:
+            body['metadata'] = {'idempotency_key': idempotency_key}
+        response = self.client.post('/batches', cast_to=httpx.Response, body=body)
+        return response.json()['id']
+
+    def find(self, idempotency_key: str) -> Optional[str]:
+        """Id of a recent batch submitted with this key, or None"""
+        if not idempotency_key:
+            return None
+        batches = self.client.get('/batches?limit=100', cast_to=httpx.Response).json().get('data', [])
+        for batch in batches:
+            if (batch.get('metadata') or {}).get('idempotency_key') == idempotency_key:
+                return batch['id']
+        return None
+
+    def poll(self, external_id: str) -> Tuple[str, Optional[Dict]]:
+        batch = self.client.get(f'/batches/{external_id}', cast_to=httpx.Response).json()
+        status = self.STATUS_MAP.get(batch.get('status'), 'in_progress')
+        if status != 'completed':
+            return status, None
+
+        results = {}
+        for file_id in (batch.get('output_file_id'), batch.get('error_file_id')):
+            if not file_id:
+                continue
+            content = self.client.get(f'/files/{file_id}/content', cast_to=httpx.Response).text
+            for line in content.splitlines():
+                item = json.loads(line)
+                response = item.get('response') or {}
+                body = response.get('body') or {}
+                if item.get('error') or response.get('status_code') != 200:
+                    results[item['custom_id']] = {'error': str(item.get('error') or body.get('error'))}
+                else:
+                    results[item['custom_id']] = {
+                        'response': body['choices'][0]['message']['content'],
+                        'tokens_used': body.get('usage', {}).get('total_tokens', 0)
+                    }
+        return status, results
+
+
+class AnthropicBatchProvider:
+    """Submit messages through the Anthropic Message Batches API"""
+
+    platform = 'claude'
+    headers = {'anthropic-beta': 'message-batches-2024-09-24'}
+
+    def __init__(self, client):
+        self.client = client
+
+    def submit(self, requests: Dict[str, Dict], idempotency_key: str = None) -> str:
+        response = self.client.post('/v1/messages/batches', cast_to=httpx.Response, options={'headers': self.headers},
+                                    body={'requests': [{'custom_id': custom_id, 'params': body}
+                                                       for custom_id, body in requests.items()]})
+        return response.json()['id']
+
+    def find(self, idempotency_key: str) -> Optional[str]:
+        """Message batches carry no metadata to match on, so an interrupted submit is sent again"""
+        return None
+
+    def poll(self, external_id: str) -> Tuple[str, Optional[Dict]]:
+        batch = self.client.get(f'/v1/messages/batches/{external_id}', cast_to=httpx.Response,
+                                options={'headers': self.headers}).json()
+        if batch.get('processing_status') != 'ended':
+            return 'in_progress', None
+
+        content = self.client.get(f'/v1/messages/batches/{external_id}/results', cast_to=httpx.Response,
+                                  options={'headers': self.headers}).text
+        results = {}
+        for line in content.splitlines():
+            item = json.loads(line)
+            result = item.get('result') or {}
+            if result.get('type') == 'succeeded':
+                message = result['message']
+                usage = message.get('usage', {})
+                results[item['custom_id']] = {
+                    'response': message['content'][0]['text'],
+                    'tokens_used': usage.get('input_tokens', 0) + usage.get('output_tokens', 0)
+                }
+            else:
+                results[item['custom_id']] = {'error': str(result.get('error') or result.get('type'))}
+        return 'completed', results
+
+
+class BatchMonitoringService:
+    """Run scheduled brand monitoring through provider batch jobs instead of synchronous calls.
+
+    A run plans every brand's queries, submits one batch per platform for the unique
+    prompts, and persists the job handles straight away. A job is marked as submitting
+    before the provider is called and carries an idempotency key, so a submit interrupted
+    before its batch id was stored is looked up again rather than sent twice (where the
+    provider can search by key). poll_run() checks the jobs and, once all of them have
+    finished, stores the results brand by brand. Every step is committed, so a crashed run
+    can be picked up again with resume().
+    """
+
+    def __init__(self, providers: Dict = None):
+        self.monitor = BrandMonitoringService()
+        self.ai_service = self.monitor.ai_service
+        self.providers = providers if providers is not None else self._default_providers()
+
+    def _default_providers(self) -> Dict:
+        providers = {}
+        if self.ai_service.openai_client:
+            providers['chatgpt'] = OpenAIBatchProvider(self.ai_service.openai_client)
+        if self.ai_service.anthropic_client:
+            providers['claude'] = AnthropicBatchProvider(self.ai_service.anthropic_client)
+        return providers
+
+    def _request_body(self, platform: str, query: str) -> Dict:
+        if platform == 'claude':
+            return self.ai_service.claude_request(query)
+        return self.ai_service.chatgpt_request(query)
+
+    def submit_run(self, brand_ids: List[int] = None) -> BatchRun:
+        """Plan queries for all active brands (or the given ones) and submit the batch jobs"""
+        if not self.providers:
+            raise ValueError("No batch-capable AI providers are configured")
+
+        brands_query = Brand.query.filter_by(is_active=True)
+        if brand_ids:
+            brands_query = brands_query.filter(Brand.id.in_(brand_ids))
+
+        brand_queries = {}
+        for brand in brands_query.all():
+            # Batch spend is charged at the scheduler's estimate
+            brand_queries[str(brand.id)] = self.monitor.schedule_queries(
+                brand, self.monitor.generate_brand_queries(brand)).queries
+
+        # Identical prompts across brands are only sent once
+        unique_queries = list(dict.fromkeys(query for queries in brand_queries.values() for query in queries))
+        requests = {f'q{index}': query for index, query in enumerate(unique_queries)}
+
+        run = BatchRun(status='submitting', brand_queries=brand_queries, ingested_brand_ids=[])
+        db.session.add(run)
+        for platform in self.providers:
+            db.session.add(BatchJob(run=run, platform=platform, requests=requests))
+        db.session.commit()
+
+        print(f"Submitting batch run {run.id}: {len(brand_queries)} brands, {len(unique_queries)} unique queries")
+        self._submit_pending(run)
+        return run
+
+    def _submit_pending(self, run: BatchRun):
+        for job in run.jobs:
+            if job.status not in ('pending', 'submitting') or job.external_id:
+                continue
+
+            provider = self.providers.get(job.platform)
+            try:
+                if job.status == 'submitting':
+                    # An earlier submit may have reached the provider before we stored its id
+                    job.external_id = provider.find(job.idempotency_key)
+                if not job.external_id:
+                    job.status = 'submitting'
+                    db.session.commit()
+                    bodies = {custom_id: self._request_body(job.platform, query)
+                              for custom_id, query in job.requests.items()}
+                    job.external_id = provider.submit(bodies, job.idempotency_key)
+                job.status = 'in_progress'
+                job.submitted_at = datetime.utcnow()
+            except Exception as e:
+                print(f"Error submitting {job.platform} batch for run {run.id}: {e}")
+                job.status = 'failed'
+                job.error = str(e)
+
+            # Persist each handle as soon as we have it
+            db.session.commit()
+
+        run.status = 'in_progress'
+        db.session.commit()
+
+    def poll_run(self, run_id: int) -> BatchRun:
+        """Check a run's jobs, store finished results, and ingest once every job is done"""
+        run = BatchRun.query.get(run_id)
+        if not run:
+            raise ValueError(f"Batch run with ID {run_id} not found")
+
+        if run.status == 'submitting':
+            self._submit_pending(run)
+
+        for job in run.jobs:
+            if job.status != 'in_progress':
+                continue
+
+            try:
+                status, results = self.providers[job.platform].poll(job.external_id)
+            except Exception as e:
+                # Transient provider/network errors: try again on the next poll
+                print(f"Error polling {job.platform} batch {job.external_id}: {e}")
+                continue
+
+            if status == 'completed':
+                job.results = results
+                job.status = 'completed'
+                job.completed_at = datetime.utcnow()
+                self._warm_cache(job)
+            elif status == 'failed':
+                job.status = 'failed'
+                job.error = f"Provider reported batch {job.external_id} as failed"
+                job.completed_at = datetime.utcnow()
+            db.session.commit()
+
+        if run.status in ('in_progress', 'ingesting') and all(job.status in ('completed', 'failed') for job in run.jobs):
+            self._ingest(run)
+
+        return run
+
+    def resume(self) -> List[BatchRun]:
+        """Continue every run that has not finished, e.g. after a crash"""
+        runs = BatchRun.query.filter(BatchRun.status.notin_(['completed', 'failed'])).all()
+        return [self.poll_run(run.id) for run in runs]
+
+    def _warm_cache(self, job: BatchJob):
+        """Let interactive searches reuse batch completions"""
+        for custom_id, completion in (job.results or {}).items():
+            query = job.requests.get(custom_id)
+            if query and 'response' in completion:
+                request = self._request_body(job.platform, query)
+                self.ai_service.cache.set(self.ai_service.cache_key(job.platform, request), completion)
+
+    def _ingest(self, run: BatchRun):
+        run.status = 'ingesting'
+        db.session.commit()
+
+        completions = {}
+        for job in run.jobs:
+            for custom_id, query in (job.requests or {}).items():
+                completions[(job.platform, query)] = (job.results or {}).get(custom_id) or {
+                    'error': job.error or 'No result returned for this request'}
+
+        platforms = [job.platform for job in run.jobs]
+        for brand_id, queries in run.brand_queries.items():
+            if int(brand_id) in (run.ingested_brand_ids or []):
+                continue
+
+            brand = Brand.query.get(int(brand_id))
+            # Mark first so the marker commits in the same transaction as the brand's results
+            run.ingested_brand_ids = (run.ingested_brand_ids or []) + [int(brand_id)]
+            if not brand:
+                db.session.commit()
+                continue
+
+            search_results = []
+            for query in queries:
+                for platform in platforms:
+                    completion = completions[(platform, query)]
+                    if 'response' in completion:
+                        search_results.append(self.ai_service.score_response(
+                            platform, query, completion['response'], brand.name,
+                            tokens_used=completion.get('tokens_used', 0)))
+                    else:
+                        search_results.append(self.ai_service._error_response(platform, query, completion['error']))
+
+            self.monitor._store_results(brand, queries, search_results)
+
+        run.status = 'completed'
+        run.completed_at = datetime.utcnow()
+        db.session.commit()
+        print(f"✅ Batch run {run.id} ingested for {len(run.brand_queries)} brands")
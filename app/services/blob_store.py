@@ -0,0 +1,81 @@
+from typing import Dict, Iterable, List
+from sqlalchemy import update
+from app.models import db, AIOverview, ContentBlob, SearchQuery
+from app.services.bulk_writer import BulkWriter
+
+
+class BlobStore:
+    """Bulk writes and reads of content-addressed, compressed text (ContentBlob rows).
+
+    Identical content is stored once however many rows reference it; nothing is committed
+    here except by compact(), which migrates rows written before the blob store.
+    """
+
+    def __init__(self, session=None):
+        self.session = session or db.session
+
+    def put_many(self, texts: List[str]) -> List[str]:
+        """Store texts (skipping content that already exists) and return their hashes in order"""
+        rows = {}
+        hashes = []
+        for text in texts:
+            digest = ContentBlob.digest(text)
+            if digest not in rows:
+                rows[digest] = ContentBlob.row(text)
+            hashes.append(digest)
+        BulkWriter(self.session).insert_ignore(ContentBlob, list(rows.values()), ('hash',))
+        return hashes
+
+    def put(self, text: str) -> str:
+        return self.put_many([text])[0]
+
+    def get_many(self, hashes: Iterable[str], chunk_size: int = 500) -> Dict[str, str]:
+        """Decompressed text for each hash that exists"""
+        wanted = list(dict.fromkeys(digest for digest in hashes if digest))
+        texts = {}
+        for start in range(0, len(wanted), chunk_size):
+            rows = self.session.query(ContentBlob.hash, ContentBlob.codec, ContentBlob.data).filter(
+                ContentBlob.hash.in_(wanted[start:start + chunk_size])).all()
+            for digest, codec, data in rows:
+                texts[digest] = ContentBlob.decompress(codec, data).decode('utf-8')
+        return texts
+
+    def compact(self, batch_size: int = 500) -> Dict[str, int]:
+        """Move inline text of rows stored before the blob store into blobs, one committed chunk at a time"""
+        return {
+            'search_queries': self._compact(SearchQuery, [('inline_response_text', 'response_hash', False)],
+                                            batch_size),
+            'ai_overviews': self._compact(AIOverview, [('inline_overview_text', 'overview_hash', False),
+                                                       ('inline_search_results', 'search_results_hash', True)],
+                                          batch_size)
+        }
+
+    def _compact(self, model, columns, batch_size: int) -> int:
+        inline_columns = [getattr(model, inline) for inline, _, _ in columns]
+        last_id = 0
+        moved = 0
+        while True:
+            # Keyset pagination: each chunk starts after the last id seen, so the scan never restarts
+            rows = self.session.query(model.id, *inline_columns).filter(
+                model.id > last_id, db.or_(*[column.isnot(None) for column in inline_columns])
+            ).order_by(model.id).limit(batch_size).all()
+            if not rows:
+                return moved
+
+            updates = [{'id': row[0]} for row in rows]
+            for index, (inline, hash_column, as_json) in enumerate(columns):
+                values = [row[index + 1] for row in rows]
+                present = [position for position, value in enumerate(values) if value is not None]
+                hashes = self.put_many([ContentBlob.encode(values[position]) if as_json else values[position]
+                                        for position in present])
+                for position, digest in zip(present, hashes):
+                    updates[position][hash_column] = digest
+                    updates[position][inline] = None
+
+            for values in updates:
+                row_id = values.pop('id')
+                self.session.execute(update(model).where(model.id == row_id).values(
+                    {getattr(model, key): value for key, value in values.items()}))
+            self.session.commit()
+            moved += len(rows)
+            last_id = rows[-1][0]
@@ -1,7 +1,12 @@
 from app.models import db, Brand, SearchQuery, SearchResult, AnalyticsData
 from app.services.ai_search import AISearchService
+from app.services.bulk_writer import BulkWriter
+from app.services.blob_store import BlobStore
+from app.services.query_scheduler import QueryAllocation, get_query_scheduler
+from app.services.freshness import get_freshness_policy
+from flask import current_app
 from datetime import datetime, date
-from typing import List, Dict
+from typing import Dict, Iterator, List, Tuple
 import json
 
 
@@ -9,107 +14,112 @@ class BrandMonitoringService:
 
     def __init__(self):
         self.ai_service = AISearchService()
+        self.scheduler = get_query_scheduler()
+        self.freshness = get_freshness_policy()
 
     def monitor_brand(self, brand_id: int, custom_queries: List[str] = None) -> Dict:
         """Monitor a brand across AI platforms"""
+        summary = {}
+        for event, data in self.iter_monitor_brand(brand_id, custom_queries):
+            if event == 'summary':
+                summary = data
+        return summary
+
+    def iter_monitor_brand(self, brand_id: int, custom_queries: List[str] = None) -> Iterator[Tuple[str, Dict]]:
+        """Monitor a brand, yielding ('platform_result', result) as each platform call completes.
+
+        All (query, platform) calls run concurrently. Results are stored once every call has
+        finished, and a final ('summary', ...) event carries the aggregate metrics.
+        """
         brand = Brand.query.get(brand_id)
         if not brand:
             raise ValueError(f"Brand with ID {brand_id} not found")
 
         # Generate search queries for the brand
         queries = custom_queries or self.generate_brand_queries(brand)
+        allocation = self.schedule_queries(brand, queries)
 
+        print(f"Monitoring brand: {brand.name}")
+        print(f"Queries to test: {allocation.queries}")
+
+        # Answers stored recently enough are re-scored instead of asked again
+        fresh = self.freshness.fresh_results(self.ai_service, brand, allocation.queries)
+        for result in fresh.values():
+            yield 'platform_result', result
+
+        new_results = []
+        for _, result in self.ai_service.iter_platform_results(allocation.queries, brand.name, skip=set(fresh)):
+            new_results.append(result)
+            yield 'platform_result', result
+
+        self.scheduler.observe(new_results)
+        self.scheduler.settle(allocation, sum(self.scheduler.result_cost(result) for result in new_results))
+        search_results = self.ai_service.order_results(allocation.queries, list(fresh.values()) + new_results)
+        yield 'summary', self._store_results(brand, allocation.queries, search_results)
+
+    def schedule_queries(self, brand: Brand, queries: List[str]) -> QueryAllocation:
+        """Pick the queries actually sent to the AI platforms, by priority within the query budgets"""
+        return self.scheduler.allocate(brand, queries, self.ai_service.billable_platforms(),
+                                       run_budget=current_app.config.get('QUERY_BUDGET_MONITOR_RUN'))
+
+    def _store_results(self, brand: Brand, queries: List[str], search_results: List[Dict], commit: bool = True) -> Dict:
+        """Persist platform results and today's analytics for a brand, returning the run summary.
+
+        With commit=False the writes are left in the session for the caller to commit. Reused
+        results (see FreshnessPolicy) count towards the metrics but are not stored again.
+        """
+        brand_id = brand.id
         results = []
         total_mentions = 0
         total_visibility = 0
         sentiment_scores = []
 
-        print(f"Monitoring brand: {brand.name}")
-        print(f"Queries to test: {queries}")
-
-        for query in queries[:3]:  # Limit to 3 queries to avoid API costs
-            print(f"Testing query: {query}")
-
-            # Search across platforms
-            search_results = self.ai_service.search_all_platforms(query, brand.name)
-
-            for result in search_results:
-                if result['success']:
-                    # Store search query
-                    search_query = SearchQuery(
-                        query_text=query,
-                        ai_platform=result['platform'],
-                        response_text=result['response'],
-                        brand_mentions=result.get('brand_analysis', {}),
-                        sentiment_score=result.get('brand_analysis', {}).get('sentiment_score', 0),
-                        user_id=brand.user_id
-                    )
-
-                    db.session.add(search_query)
-                    db.session.flush()  # Get the ID
-
-                    # Analyze brand mentions
-                    analysis = result.get('brand_analysis', {})
-                    if analysis and analysis.get('direct_mentions', 0) > 0:
-                        # Store search result
-                        search_result = SearchResult(
-                            search_query_id=search_query.id,
-                            position=1,  # Simplified for now
-                            mention_type=analysis.get('mention_type', 'none'),
-                            context=analysis.get('contexts', [''])[0] if analysis.get('contexts') else '',
-                            sentiment=self._sentiment_to_label(analysis.get('sentiment_score', 0)),
-                            confidence_score=0.8,  # Default confidence
-                            url_cited=None
-                        )
-
-                        db.session.add(search_result)
-
-                        total_mentions += analysis.get('direct_mentions', 0)
-                        total_visibility += analysis.get('visibility_score', 0)
-                        sentiment_scores.append(analysis.get('sentiment_score', 0))
-
-                    results.append(result)
+        # Collect every row for the run, then write each table with a single statement
+        stored = []  # (result, analysis) for results stored as new search_queries rows
+        mentioned = []  # (index into stored, analysis) for results that mention the brand
+        for result in search_results:
+            if result['success']:
+                analysis = result.get('brand_analysis', {})
+                if not result.get('reused'):
+                    stored.append((result, analysis))
+
+                if analysis and analysis.get('direct_mentions', 0) > 0:
+                    if not result.get('reused'):
+                        mentioned.append((len(stored) - 1, analysis))
+                    total_mentions += analysis.get('direct_mentions', 0)
+                    total_visibility += analysis.get('visibility_score', 0)
+                    sentiment_scores.append(analysis.get('sentiment_score', 0))
+
+                results.append(result)
 
         # Calculate aggregate metrics
         avg_visibility = (total_visibility / len(results)) if results else 0
         avg_sentiment = (sum(sentiment_scores) / len(sentiment_scores)) if sentiment_scores else 0
 
         # Store analytics data
-        today = date.today()
-        for platform in ['chatgpt', 'claude', 'perplexity']:
-            platform_results = [r for r in results if r['platform'] == platform]
-            platform_mentions = sum(
-                r.get('brand_analysis', {}).get('direct_mentions', 0) for r in platform_results if r['success'])
-            platform_visibility = sum(
-                r.get('brand_analysis', {}).get('visibility_score', 0) for r in platform_results if r['success'])
-            platform_visibility_avg = (platform_visibility / len(platform_results)) if platform_results else 0
-
-            # Update or create analytics data
-            analytics = AnalyticsData.query.filter_by(
-                brand_id=brand_id,
-                date=today,
-                ai_platform=platform
-            ).first()
-
-            if not analytics:
-                analytics = AnalyticsData(
-                    brand_id=brand_id,
-                    date=today,
-                    ai_platform=platform
-                )
-                db.session.add(analytics)
-
-            analytics.total_mentions = platform_mentions
-            analytics.direct_mentions = platform_mentions
-            analytics.visibility_score = platform_visibility_avg
-            analytics.avg_sentiment_score = avg_sentiment
-            analytics.positive_sentiment = len([s for s in sentiment_scores if s > 0.1])
-            analytics.negative_sentiment = len([s for s in sentiment_scores if s < -0.1])
-            analytics.neutral_sentiment = len([s for s in sentiment_scores if -0.1 <= s <= 0.1])
+        analytics_rows = self.analytics_rows(brand_id, date.today(), results)
 
         try:
-            db.session.commit()
-            print(f"✅ Successfully monitored brand {brand.name}")
+            writer = BulkWriter()
+            # Responses are stored once per distinct text, however many brands and runs share them
+            hashes = BlobStore().put_many([result['response'] for result, _ in stored])
+            query_rows = [{
+                'brand_id': brand_id,
+                'query_text': result['query'],
+                'ai_platform': result['platform'],
+                'response_hash': digest,
+                'brand_mentions': analysis,
+                'sentiment_score': analysis.get('sentiment_score', 0),
+                'user_id': brand.user_id
+            } for (result, analysis), digest in zip(stored, hashes)]
+            query_ids = writer.insert_returning_ids(SearchQuery, query_rows, ('query_text', 'ai_platform'))
+            writer.insert_rows(SearchResult, [self.search_result_row(query_ids[row_index], analysis)
+                                              for row_index, analysis in mentioned])
+            writer.upsert_analytics(analytics_rows)
+
+            if commit:
+                db.session.commit()
+                print(f"✅ Successfully monitored brand {brand.name}")
         except Exception as e:
             db.session.rollback()
             print(f"❌ Error saving monitoring data: {e}")
@@ -124,10 +134,56 @@ class BrandMonitoringService:
             'results': results
         }
 
+    @classmethod
+    def search_result_row(cls, search_query_id: int, analysis: Dict) -> Dict:
+        """The SearchResult row recording a response's brand mention"""
+        return {
+            'search_query_id': search_query_id,
+            'position': 1,  # Simplified for now
+            'mention_type': analysis.get('mention_type', 'none'),
+            'context': analysis.get('contexts', [''])[0] if analysis.get('contexts') else '',
+            'sentiment': cls._sentiment_to_label(analysis.get('sentiment_score', 0)),
+            'confidence_score': 0.8,  # Default confidence
+            'url_cited': None
+        }
+
+    @staticmethod
+    def analytics_rows(brand_id: int, day: date, results: List[Dict]) -> List[Dict]:
+        """A brand's AnalyticsData rows for a day, one per platform, from its successful results"""
+        sentiment_scores = [r['brand_analysis'].get('sentiment_score', 0) for r in results
+                            if r.get('brand_analysis') and r['brand_analysis'].get('direct_mentions', 0) > 0]
+        avg_sentiment = (sum(sentiment_scores) / len(sentiment_scores)) if sentiment_scores else 0
+
+        rows = []
+        for platform in ['chatgpt', 'claude', 'perplexity']:
+            platform_results = [r for r in results if r['platform'] == platform]
+            platform_mentions = sum(
+                r.get('brand_analysis', {}).get('direct_mentions', 0) for r in platform_results if r['success'])
+            platform_visibility = sum(
+                r.get('brand_analysis', {}).get('visibility_score', 0) for r in platform_results if r['success'])
+            platform_visibility_avg = (platform_visibility / len(platform_results)) if platform_results else 0
+
+            rows.append({
+                'brand_id': brand_id,
+                'date': day,
+                'ai_platform': platform,
+                'total_mentions': platform_mentions,
+                'direct_mentions': platform_mentions,
+                'visibility_score': platform_visibility_avg,
+                'avg_sentiment_score': avg_sentiment,
+                'positive_sentiment': len([s for s in sentiment_scores if s > 0.1]),
+                'negative_sentiment': len([s for s in sentiment_scores if s < -0.1]),
+                'neutral_sentiment': len([s for s in sentiment_scores if -0.1 <= s <= 0.1])
+            })
+        return rows
+
     def generate_brand_queries(self, brand: Brand) -> List[str]:
         """Generate relevant search queries for a brand"""
         queries = []
 
+        # Queries the user tracks explicitly
+        queries.extend(brand_query.query_text for brand_query in brand.queries)
+
         # Basic brand query
         queries.append(f"What is {brand.name}?")
         queries.append(f"Tell me about {brand.name}")
@@ -149,9 +205,11 @@ class BrandMonitoringService:
             queries.append(f"Compare {brand.name} vs {brand.competitors[0]}")
             queries.append(f"Alternatives to {brand.competitors[0]}")
 
-        return queries[:5]  # Limit to 5 queries
+        # Which of these actually run is decided by the query scheduler's priority and budget
+        return list(dict.fromkeys(queries))
 
-    def _sentiment_to_label(self, sentiment_score: float) -> str:
+    @staticmethod
+    def _sentiment_to_label(sentiment_score: float) -> str:
         """Convert sentiment score to label"""
         if sentiment_score > 0.1:
             return 'positive'
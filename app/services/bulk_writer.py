@@ -0,0 +1,125 @@
+import sqlite3
+from collections import deque
+from typing import Dict, Iterator, List, Sequence
+from sqlalchemy import insert
+from app.models import db, AnalyticsData
+
+try:
+    from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+    from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+except ImportError:
+    sqlite_insert = postgresql_insert = None
+
+# Bound parameters one statement may carry; multi-row VALUES statements are split to stay under it
+MAX_PARAMETERS = {'sqlite': 32766 if sqlite3.sqlite_version_info >= (3, 32) else 999, 'postgresql': 65535}
+DEFAULT_MAX_PARAMETERS = 999
+
+
+class BulkWriter:
+    """Set-based writes: one statement per table per run instead of one round trip per row.
+
+    Inserts use multi-row INSERT ... RETURNING where the dialect supports it and upserts
+    use the dialect's native ON CONFLICT; other databases fall back to plain ORM writes.
+    Nothing is committed here, so callers keep control of the transaction. Batches too large
+    for the database's bound-parameter limit are split into as few statements as fit.
+    """
+
+    def __init__(self, session=None, max_parameters: int = None):
+        self.session = session or db.session
+        self._max_parameters = max_parameters
+
+    @property
+    def dialect(self):
+        return self.session.get_bind().dialect
+
+    @property
+    def max_parameters(self) -> int:
+        return self._max_parameters or MAX_PARAMETERS.get(self.dialect.name, DEFAULT_MAX_PARAMETERS)
+
+    def _chunks(self, rows: List[Dict]) -> Iterator[List[Dict]]:
+        """Split rows into the largest multi-row VALUES statements within the parameter limit"""
+        size = max(1, self.max_parameters // max(1, len(rows[0])))
+        for start in range(0, len(rows), size):
+            yield rows[start:start + size]
+
+    def insert_returning_ids(self, model, rows: List[Dict], key_columns: Sequence[str]) -> List[int]:
+        """Insert rows and return their primary keys in the same order.
+
+        key_columns identify a row within the batch: one multi-row INSERT ... RETURNING hands the
+        ids back with those columns, which map them to the input rows whatever order the database
+        returns them in. Rows sharing a key receive their ids in an unspecified order.
+        """
+        if not rows:
+            return []
+
+        if self.dialect.insert_returning:
+            returned = {}
+            for chunk in self._chunks(rows):
+                statement = insert(model).values(chunk).returning(
+                    model.id, *[getattr(model, column) for column in key_columns])
+                for row_id, *key in self.session.execute(statement):
+                    returned.setdefault(tuple(key), deque()).append(row_id)
+            return [returned[tuple(row[column] for column in key_columns)].popleft() for row in rows]
+
+        # No ordered RETURNING: let the ORM assign ids in a single flush
+        objects = [model(**row) for row in rows]
+        self.session.add_all(objects)
+        self.session.flush()
+        return [obj.id for obj in objects]
+
+    def insert_rows(self, model, rows: List[Dict]):
+        """Insert rows whose ids the caller does not need"""
+        if rows:
+            self.session.execute(insert(model), rows)
+
+    def insert_ignore(self, model, rows: List[Dict], conflict_columns: Sequence[str]):
+        """Insert rows, skipping any whose conflict_columns already exist"""
+        if not rows:
+            return
+
+        dialect_insert = {'sqlite': sqlite_insert, 'postgresql': postgresql_insert}.get(self.dialect.name)
+        if dialect_insert is None:
+            existing = {tuple(getattr(obj, column) for column in conflict_columns)
+                        for obj in self.session.query(*[getattr(model, column) for column in conflict_columns]).filter(
+                            getattr(model, conflict_columns[0]).in_([row[conflict_columns[0]] for row in rows]))}
+            rows = [row for row in rows if tuple(row[column] for column in conflict_columns) not in existing]
+            self.insert_rows(model, rows)
+            return
+
+        for chunk in self._chunks(rows):
+            statement = dialect_insert(model).values(chunk).on_conflict_do_nothing(
+                index_elements=list(conflict_columns))
+            self.session.execute(statement)
+
+    def upsert(self, model, rows: List[Dict], conflict_columns: Sequence[str], update_columns: Sequence[str]):
+        """Insert rows, updating update_columns where conflict_columns already exist"""
+        if not rows:
+            return
+
+        dialect_insert = {'sqlite': sqlite_insert, 'postgresql': postgresql_insert}.get(self.dialect.name)
+        if dialect_insert is None:
+            self._merge(model, rows, conflict_columns, update_columns)
+            return
+
+        for chunk in self._chunks(rows):
+            statement = dialect_insert(model).values(chunk)
+            statement = statement.on_conflict_do_update(
+                index_elements=list(conflict_columns),
+                set_={column: statement.excluded[column] for column in update_columns}
+            )
+            self.session.execute(statement)
+
+    def _merge(self, model, rows: List[Dict], conflict_columns: Sequence[str], update_columns: Sequence[str]):
+        for row in rows:
+            existing = model.query.filter_by(**{column: row[column] for column in conflict_columns}).first()
+            if not existing:
+                existing = model(**{column: row[column] for column in conflict_columns})
+                self.session.add(existing)
+            for column in update_columns:
+                setattr(existing, column, row[column])
+
+    def upsert_analytics(self, rows: List[Dict]):
+        """Upsert daily AnalyticsData rows on the (brand_id, date, ai_platform) unique constraint"""
+        conflict_columns = ('brand_id', 'date', 'ai_platform')
+        update_columns = [column for column in rows[0] if column not in conflict_columns] if rows else []
+        self.upsert(AnalyticsData, rows, conflict_columns, update_columns)
@@ -1,8 +1,13 @@
 from app.models import db, Brand, SearchQuery, SearchResult, AnalyticsData, CompetitorData
+from app.models.background_job import BackgroundJob, CompetitorAnalysisCell
 from app.services.ai_search import AISearchService
+from app.services.mention_scanner import Mention, get_mention_scanner
+from app.services.query_scheduler import get_query_scheduler
+from flask import current_app
 from datetime import datetime, date, timedelta
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional
 from sqlalchemy import func, desc, and_
+from sqlalchemy.orm import selectinload
 import json
 
 
@@ -10,13 +15,143 @@ class CompetitorAnalysisService:
 
     def __init__(self):
         self.ai_service = AISearchService()
+        self.scheduler = get_query_scheduler()
 
-    def analyze_competitors(self, brand_id: int) -> Dict:
-        """Run comprehensive competitor analysis"""
+    def analyze_competitors(self, brand_id: int, progress: Callable[[int, int], None] = None,
+                            job: BackgroundJob = None) -> Dict:
+        """Run comprehensive competitor analysis.
+
+        Every prompt is planned up front, the query scheduler admits them by priority and
+        staleness within the budget, and each admitted one runs once per platform, a batch
+        of prompts at a time so every fan-out fits its deadline. Each response is then scanned
+        once for the brand and all competitors. progress(completed_calls, total_calls) is
+        called as platform calls finish.
+
+        With a job, the plan is kept on the job and each (competitor, query, platform) result
+        is saved as a cell as soon as it lands, so rerunning the job only calls missing cells.
+        """
         brand = Brand.query.get(brand_id)
-        if not brand or not brand.competitors:
+        if not brand or not self._competitors(brand):
             return {'error': 'No competitors defined for this brand'}
 
+        if job is not None:
+            plan = self._run_job_cells(brand, job, progress)
+            return self._assemble(brand, plan, self._job_responses(job.id))
+
+        plan, allocation = self._plan(brand)
+        responses = self._execute_matrix(allocation.queries, progress)
+        self.scheduler.observe(list(responses.values()))
+        self.scheduler.settle(allocation, sum(self.scheduler.result_cost(result) for result in responses.values()))
+        return self._assemble(brand, plan, responses)
+
+    def partial_results(self, job: BackgroundJob) -> Dict:
+        """The analysis computed from the cells a job has saved so far"""
+        brand = Brand.query.get(job.brand_id)
+        plan = (job.params or {}).get('plan')
+        if not brand or plan is None:
+            return {'error': 'Competitor analysis has not been planned yet'}
+
+        results = self._assemble(brand, plan, self._job_responses(job.id))
+        results['coverage'] = self.cell_counts(job.id)
+        return results
+
+    @staticmethod
+    def cell_counts(job_id: int) -> Dict:
+        """Pending, completed and failed cells of a job, overall and per competitor"""
+        rows = db.session.query(CompetitorAnalysisCell.competitor, CompetitorAnalysisCell.status, func.count()).filter(
+            CompetitorAnalysisCell.job_id == job_id
+        ).group_by(CompetitorAnalysisCell.competitor, CompetitorAnalysisCell.status).all()
+
+        counts = {'total': 0, 'completed': 0, 'failed': 0, 'pending': 0, 'competitors': {}}
+        for competitor, status, count in rows:
+            # Head-to-head and category queries are not about a single competitor
+            entry = counts['competitors'].setdefault(competitor or 'competitive',
+                                                     {'total': 0, 'completed': 0, 'failed': 0, 'pending': 0})
+            for target in (counts, entry):
+                target['total'] += count
+                target[status] = target.get(status, 0) + count
+        return counts
+
+    @staticmethod
+    def _clean_names(names) -> List[str]:
+        """Names stripped of whitespace, without blanks or duplicates"""
+        return list(dict.fromkeys(name.strip() for name in names or [] if isinstance(name, str) and name.strip()))
+
+    def _competitors(self, brand: Brand) -> List[str]:
+        """The brand's competitor names; blank entries would have no queries or mentions to score"""
+        return self._clean_names(brand.competitors)
+
+    def _plan(self, brand: Brand):
+        """Plan the whole query matrix and let the budget decide what runs; returns (plan, allocation)"""
+        candidates = {competitor: self._competitor_queries(competitor) for competitor in self._competitors(brand)}
+        allocation = self.scheduler.allocate(brand, self._candidate_order(brand, candidates),
+                                             self.ai_service.billable_platforms(),
+                                             run_budget=current_app.config.get('QUERY_BUDGET_COMPETITOR_RUN'))
+        admitted = set(allocation.queries)
+        plan = {
+            'queries': allocation.queries,
+            'competitor_queries': {competitor: [query for query in queries if query in admitted]
+                                   for competitor, queries in candidates.items()},
+            'competitive_queries': [query for query in self._generate_competitive_queries(brand) if query in admitted]
+        }
+        return plan, allocation
+
+    def _run_job_cells(self, brand: Brand, job: BackgroundJob, progress: Callable[[int, int], None] = None) -> Dict:
+        """Call every cell of the job that has no successful result yet, saving each as it lands"""
+        cells = CompetitorAnalysisCell.query.filter_by(job_id=job.id).order_by(CompetitorAnalysisCell.id).all()
+        plan = (job.params or {}).get('plan')
+        if plan is None or not cells:
+            plan, allocation = self._plan(brand)
+            job.params = dict(job.params or {}, plan=plan)
+            cells = self._create_cells(job, plan)
+        else:
+            # A rerun only pays for the cells that are still missing
+            missing = list(dict.fromkeys(cell.query_text for cell in cells if cell.status != 'completed'))
+            allocation = self.scheduler.allocate(brand, missing, self.ai_service.billable_platforms(),
+                                                 run_budget=current_app.config.get('QUERY_BUDGET_COMPETITOR_RUN'))
+
+        admitted = set(allocation.queries)
+        pending = {(cell.query_text, cell.ai_platform): cell for cell in cells
+                   if cell.status != 'completed' and cell.query_text in admitted}
+        queries = list(dict.fromkeys(query for query, _ in pending))
+        skip = {(query, platform) for query in queries for platform in self.ai_service.platform_names()
+                if (query, platform) not in pending}
+        done = sum(1 for cell in cells if cell.status == 'completed')
+        total = done + len(pending)
+        print(f"Competitor analysis job {job.id}: {len(pending)} of {len(cells)} cells to run")
+
+        landed = []
+        for batch in self._prompt_batches(queries):
+            for _, result in self.ai_service.iter_platform_results(batch, skip=skip):
+                pending[(result['query'], result['platform'])].record(result)
+                db.session.commit()
+                landed.append(result)
+                if progress:
+                    progress(done + len(landed), total)
+
+        self.scheduler.observe(landed)
+        self.scheduler.settle(allocation, sum(self.scheduler.result_cost(result) for result in landed))
+        return plan
+
+    def _create_cells(self, job: BackgroundJob, plan: Dict) -> List[CompetitorAnalysisCell]:
+        """One pending cell per planned query and platform, in query then platform order"""
+        owners = {query: competitor for competitor, queries in plan['competitor_queries'].items() for query in queries}
+        cells = [CompetitorAnalysisCell(job_id=job.id, competitor=owners.get(query), query_text=query,
+                                        ai_platform=platform, status='pending')
+                 for query in plan['queries'] for platform in self.ai_service.platform_names()]
+        db.session.add_all(cells)
+        db.session.commit()
+        return cells
+
+    def _job_responses(self, job_id: int) -> Dict:
+        """{(query, platform): result} for every cell of a job that has finished"""
+        cells = CompetitorAnalysisCell.query.options(selectinload(CompetitorAnalysisCell.response_blob)).filter(
+            CompetitorAnalysisCell.job_id == job_id, CompetitorAnalysisCell.status != 'pending'
+        ).order_by(CompetitorAnalysisCell.id).all()
+        return {(cell.query_text, cell.ai_platform): cell.to_result() for cell in cells}
+
+    def _assemble(self, brand: Brand, plan: Dict, responses: Dict) -> Dict:
+        """Score the planned queries from whichever responses are available"""
         analysis_results = {
             'brand_name': brand.name,
             'competitors': [],
@@ -25,15 +160,21 @@ class CompetitorAnalysisService:
             'recommendations': []
         }
 
+        competitors = self._competitors(brand)
+        names = [brand.name] + self._clean_names(competitors + list(plan['competitor_queries']))
+        scanner = get_mention_scanner(names)
+        matches = {key: scanner.find_all(result['response']) for key, result in responses.items() if result['success']}
+
         # Analyze each competitor
-        for competitor in brand.competitors:
-            competitor_data = self._analyze_single_competitor(brand, competitor)
+        for competitor in competitors:
+            competitor_data = self._analyze_single_competitor(brand, competitor,
+                                                              plan['competitor_queries'].get(competitor, []),
+                                                              responses, matches)
             analysis_results['competitors'].append(competitor_data)
 
-        # Run competitive queries
-        competitive_queries = self._generate_competitive_queries(brand)
-        for query in competitive_queries:
-            query_result = self._analyze_competitive_query(brand, query)
+        # Score competitive queries
+        for query in plan['competitive_queries']:
+            query_result = self._analyze_competitive_query(brand, query, responses, matches)
             analysis_results['competitive_queries'].append(query_result)
 
         # Calculate market positioning
@@ -45,15 +186,53 @@ class CompetitorAnalysisService:
 
         return analysis_results
 
-    def _analyze_single_competitor(self, brand: Brand, competitor_name: str) -> Dict:
-        """Analyze a single competitor across AI platforms"""
-        competitor_queries = [
+    def _competitor_queries(self, competitor_name: str) -> List[str]:
+        """Prompts that describe a single competitor"""
+        return [
             f"What is {competitor_name}?",
             f"Tell me about {competitor_name}",
             f"{competitor_name} features and pricing",
             f"{competitor_name} vs alternatives"
         ]
 
+    def _candidate_order(self, brand: Brand, competitor_queries: Dict[str, List[str]]) -> List[str]:
+        """Tie-break order for the scheduler: two prompts per competitor, the competitive
+        queries, then the remaining competitor prompts"""
+        rounds = [[queries[index] for queries in competitor_queries.values() if index < len(queries)]
+                  for index in range(max(len(queries) for queries in competitor_queries.values()))]
+        ordered = [query for prompts in rounds[:2] for query in prompts]
+        ordered += self._generate_competitive_queries(brand)
+        ordered += [query for prompts in rounds[2:] for query in prompts]
+        return list(dict.fromkeys(ordered))
+
+    def _prompt_batches(self, prompts: List[str]):
+        """Split prompts into the batches sent through one fan-out each"""
+        size = max(1, current_app.config.get('COMPETITOR_BATCH_PROMPTS', 10))
+        for start in range(0, len(prompts), size):
+            yield prompts[start:start + size]
+
+    def _execute_matrix(self, prompts: List[str], progress: Callable[[int, int], None] = None) -> Dict:
+        """Run every prompt on every platform, a batch at a time; returns {(query, platform): result}"""
+        print(f"Competitor analysis: {len(prompts)} unique prompts")
+        completed = []
+        total = len(prompts) * len(self.ai_service.platform_names())
+        for batch_number, batch in enumerate(self._prompt_batches(prompts)):
+            for index, result in self.ai_service.iter_platform_results(batch):
+                completed.append(((batch_number, index), result))
+                if progress:
+                    progress(len(completed), total)
+
+        # Restore query then platform order regardless of completion order
+        completed.sort(key=lambda item: item[0])
+        return {(result['query'], result['platform']): result for _, result in completed}
+
+    def _platform_results(self, query: str, responses: Dict) -> List[Dict]:
+        """A query's results in platform order"""
+        return [result for (result_query, _), result in responses.items() if result_query == query]
+
+    def _analyze_single_competitor(self, brand: Brand, competitor_name: str, queries: List[str], responses: Dict,
+                                   matches: Dict) -> Dict:
+        """Analyze a single competitor across AI platforms"""
         competitor_data = {
             'name': competitor_name,
             'visibility_scores': {},
@@ -63,13 +242,12 @@ class CompetitorAnalysisService:
             'positioning_keywords': []
         }
 
-        for query in competitor_queries[:2]:  # Limit to 2 queries per competitor
-            results = self.ai_service.search_all_platforms(query, competitor_name)
-
-            for result in results:
+        for query in queries:
+            for result in self._platform_results(query, responses):
                 if result['success']:
                     platform = result['platform']
-                    analysis = result.get('brand_analysis', {})
+                    analysis = self.ai_service.analyze_brand_mentions(
+                        result['response'], competitor_name, mentions=matches[(query, platform)][competitor_name])
 
                     # Store visibility data
                     if platform not in competitor_data['visibility_scores']:
@@ -100,10 +278,8 @@ class CompetitorAnalysisService:
 
         return competitor_data
 
-    def _analyze_competitive_query(self, brand: Brand, query: str) -> Dict:
+    def _analyze_competitive_query(self, brand: Brand, query: str, responses: Dict, matches: Dict) -> Dict:
         """Analyze how brand performs against competitors in a specific query"""
-        results = self.ai_service.search_all_platforms(query, brand.name)
-
         query_analysis = {
             'query': query,
             'brand_mentioned': False,
@@ -111,24 +287,22 @@ class CompetitorAnalysisService:
             'brand_position': None,
             'platform_results': {}
         }
+        competitors = self._competitors(brand)
 
-        for result in results:
+        for result in self._platform_results(query, responses):
             if result['success']:
                 platform = result['platform']
-                response_text = result['response'].lower()
+                response_matches = matches[(query, platform)]
 
                 # Check if brand is mentioned
-                brand_analysis = result.get('brand_analysis', {})
-                brand_mentioned = brand_analysis.get('direct_mentions', 0) > 0
+                brand_mentioned = len(response_matches[brand.name]) > 0
 
                 # Check which competitors are mentioned
-                competitors_in_response = []
-                for competitor in brand.competitors:
-                    if competitor.lower() in response_text:
-                        competitors_in_response.append(competitor)
+                competitors_in_response = [competitor for competitor in competitors if response_matches.get(competitor)]
 
                 # Determine positioning
-                position_info = self._determine_position_in_response(result['response'], brand.name, brand.competitors)
+                position_info = self._determine_position_in_response(result['response'], brand.name, competitors,
+                                                                     response_matches)
 
                 query_analysis['platform_results'][platform] = {
                     'brand_mentioned': brand_mentioned,
@@ -153,7 +327,7 @@ class CompetitorAnalysisService:
         queries = []
 
         # Direct comparison queries
-        for competitor in brand.competitors[:3]:  # Limit to top 3 competitors
+        for competitor in self._competitors(brand)[:3]:  # Limit to top 3 competitors
             queries.append(f"{brand.name} vs {competitor}")
             queries.append(f"{brand.name} vs {competitor} comparison")
             queries.append(f"Alternative to {competitor}")
@@ -172,7 +346,7 @@ class CompetitorAnalysisService:
                 queries.append(f"Best {keyword} tools")
                 queries.append(f"{keyword} software comparison")
 
-        return queries[:8]  # Limit total queries
+        return queries
 
     def _calculate_market_positioning(self, brand: Brand, competitive_queries: List[Dict]) -> Dict:
         """Calculate market positioning metrics"""
@@ -298,20 +472,17 @@ class CompetitorAnalysisService:
 
         return recommendations[:6]  # Limit to top 6 recommendations
 
-    def _determine_position_in_response(self, response_text: str, brand_name: str, competitors: List[str]) -> Dict:
+    def _determine_position_in_response(self, response_text: str, brand_name: str, competitors: List[str],
+                                        matches: Dict[str, List[Mention]] = None) -> Dict:
         """Determine where brand appears relative to competitors in response"""
-        brands_in_response = []
+        if matches is None:
+            matches = get_mention_scanner([brand_name] + list(competitors)).find_all(response_text)
 
-        # Find brand position
-        brand_pos = response_text.lower().find(brand_name.lower())
-        if brand_pos >= 0:
-            brands_in_response.append((brand_name, brand_pos))
-
-        # Find competitor positions
-        for competitor in competitors:
-            comp_pos = response_text.lower().find(competitor.lower())
-            if comp_pos >= 0:
-                brands_in_response.append((competitor, comp_pos))
+        # First mention of the brand and each competitor
+        brands_in_response = []
+        for name in dict.fromkeys([brand_name] + list(competitors)):
+            if matches.get(name):
+                brands_in_response.append((name, matches[name][0].start))
 
         # Sort by position
         brands_in_response.sort(key=lambda x: x[1])
@@ -0,0 +1,198 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional
+
+LANES = ('interactive', 'batch')  # Interactive work is always dispatched first
+
+_current_tenant: ContextVar = ContextVar('fair_tenant', default=None)
+_current_lane: ContextVar = ContextVar('fair_lane', default='batch')
+
+
+@contextmanager
+def fair_context(tenant, lane: str = 'batch'):
+    """Attribute work submitted from this thread (e.g. provider calls) to a tenant and lane"""
+    tenant_token = _current_tenant.set(tenant)
+    lane_token = _current_lane.set(lane)
+    try:
+        yield
+    finally:
+        _current_lane.reset(lane_token)
+        _current_tenant.reset(tenant_token)
+
+
+def current_fair_context():
+    """The (tenant, lane) set by the innermost fair_context"""
+    return _current_tenant.get(), _current_lane.get()
+
+
+def _percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class _WorkItem:
+    __slots__ = ('func', 'future', 'tenant', 'lane', 'enqueued_at')
+
+    def __init__(self, func: Callable, future: Future, tenant, lane: str):
+        self.func = func
+        self.future = future
+        self.tenant = tenant
+        self.lane = lane
+        self.enqueued_at = time.monotonic()
+
+
+class FairScheduler:
+    """Worker pool that shares its threads fairly between tenants.
+
+    Each tenant gets its own queue per lane. Workers always serve the interactive lane
+    first; within a lane, tenants are served by deficit round-robin, so a tenant with
+    weight 2 gets two dispatches per round and one with a thousand queued items cannot
+    hold back the others. A tenant never has more than tenant_concurrency items running;
+    work submitted without a tenant is not one tenant, so it is not capped.
+    """
+
+    def __init__(self, workers: int = 4, tenant_concurrency: int = None, weights: Dict = None, quantum: int = 1,
+                 name: str = 'fair'):
+        self.workers = workers
+        self.tenant_concurrency = tenant_concurrency or workers
+        self.weights = weights or {}
+        self.quantum = quantum
+        self.name = name
+        self._queues = {}  # (lane, tenant) -> deque of _WorkItem
+        self._active = {lane: deque() for lane in LANES}  # Tenants with queued work, in round-robin order
+        self._deficit = {}
+        self._running = {}  # tenant -> items in progress
+        self._waits = {lane: deque(maxlen=1000) for lane in LANES}
+        self._dispatched = {lane: 0 for lane in LANES}
+        self._cond = threading.Condition()
+        self._threads = []
+        self._pid = None
+
+    def submit(self, func: Callable, tenant=None, lane: str = None) -> Future:
+        """Queue func for a tenant (default: the current fair_context) and return its Future"""
+        context_tenant, context_lane = current_fair_context()
+        tenant = tenant if tenant is not None else context_tenant
+        lane = lane or context_lane
+        if lane not in LANES:
+            raise ValueError(f"Unknown lane: {lane}")
+
+        future = Future()
+        with self._cond:
+            self._ensure_workers()
+            key = (lane, tenant)
+            queue = self._queues.setdefault(key, deque())
+            if not queue:
+                self._active[lane].append(tenant)
+            queue.append(_WorkItem(func, future, tenant, lane))
+            self._cond.notify()
+        return future
+
+    def _ensure_workers(self):
+        """Start the worker threads, restarting them in a forked child process"""
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._running = {}
+        self._threads = [threading.Thread(target=self._work, name=f'{self.name}-{index}', daemon=True)
+                         for index in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def _weight(self, tenant) -> float:
+        weight = self.weights.get(tenant, self.weights.get(str(tenant), 1))
+        return weight if weight and weight > 0 else 1
+
+    def _next_item(self) -> Optional[_WorkItem]:
+        """Pick the next item by lane, then deficit round-robin across tenants (caller holds the lock)"""
+        for lane in LANES:
+            active = self._active[lane]
+            capped = 0
+            while active and capped < len(active):
+                tenant = active[0]
+                key = (lane, tenant)
+                if tenant is not None and self._running.get(tenant, 0) >= self.tenant_concurrency:
+                    active.rotate(-1)
+                    capped += 1
+                    continue
+
+                if self._deficit.get(key, 0) < 1:
+                    # New turn; fractional weights build up credit over several rounds
+                    self._deficit[key] = self._deficit.get(key, 0) + self.quantum * self._weight(tenant)
+                    if self._deficit[key] < 1:
+                        active.rotate(-1)
+                        continue
+
+                queue = self._queues[key]
+                item = queue.popleft()
+                self._deficit[key] -= 1
+                if not queue:
+                    active.popleft()
+                    del self._queues[key]
+                    self._deficit.pop(key, None)
+                elif self._deficit[key] < 1:
+                    active.rotate(-1)  # Turn used up: next tenant
+                return item
+        return None
+
+    def _work(self):
+        while True:
+            with self._cond:
+                item = self._next_item()
+                while item is None:
+                    self._cond.wait()
+                    item = self._next_item()
+                self._running[item.tenant] = self._running.get(item.tenant, 0) + 1
+                self._waits[item.lane].append(time.monotonic() - item.enqueued_at)
+                self._dispatched[item.lane] += 1
+
+            try:
+                # Items cancelled while queued (e.g. a fan-out deadline passed) are dropped here
+                if item.future.set_running_or_notify_cancel():
+                    try:
+                        item.future.set_result(item.func())
+                    except BaseException as e:
+                        item.future.set_exception(e)
+            finally:
+                with self._cond:
+                    self._running[item.tenant] -= 1
+                    self._cond.notify_all()
+
+    def metrics(self, tenant=None, include_tenants: bool = False) -> Dict:
+        """Queue depth, running counts and recent wait times per lane (optionally per tenant)"""
+        with self._cond:
+            lanes = {}
+            for lane in LANES:
+                waits = list(self._waits[lane])
+                lanes[lane] = {
+                    'queued': sum(len(queue) for (queue_lane, _), queue in self._queues.items() if queue_lane == lane),
+                    'tenants_waiting': len(self._active[lane]),
+                    'dispatched': self._dispatched[lane],
+                    'wait_p50_ms': round(_percentile(waits, 0.5) * 1000, 1),
+                    'wait_p95_ms': round(_percentile(waits, 0.95) * 1000, 1)
+                }
+
+            def tenant_stats(name):
+                return {
+                    'queued': {lane: len(self._queues.get((lane, name), ())) for lane in LANES},
+                    'running': self._running.get(name, 0)
+                }
+
+            data = {
+                'workers': self.workers,
+                'tenant_concurrency': self.tenant_concurrency,
+                'running': sum(self._running.values()),
+                'lanes': lanes
+            }
+            if tenant is not None:
+                data['tenant'] = tenant_stats(tenant)
+            if include_tenants:
+                tenants = {name for _, name in self._queues} | {name for name, count in self._running.items() if count}
+                data['tenants'] = {str(name): tenant_stats(name) for name in tenants}
+            return data
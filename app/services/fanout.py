@@ -0,0 +1,135 @@
+import math
+import threading
+import time
+from concurrent.futures import wait, FIRST_COMPLETED
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from flask import current_app, has_app_context
+from app.services.fair_scheduler import FairScheduler
+
+_call_deadline: ContextVar = ContextVar('fanout_call_deadline', default=None)
+
+
+def call_deadline() -> Optional[float]:
+    """time.monotonic() deadline of the fan-out call running in this thread, or None outside one"""
+    return _call_deadline.get()
+
+
+class FanoutEngine:
+    """Run independent provider calls concurrently with a per-call deadline.
+
+    Calls share one fair-share worker pool: they are attributed to the tenant and lane of
+    the caller's fair_context, so quick interactive tests jump ahead of bulk monitoring and
+    no tenant can occupy every worker. A call's deadline starts when a worker picks it up,
+    so time spent queued behind the pool or the tenant cap is not held against it.
+    """
+
+    def __init__(self, max_workers: int = 16, timeout: float = 30.0, tenant_concurrency: int = None,
+                 weights: Dict = None):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.scheduler = FairScheduler(workers=max_workers, tenant_concurrency=tenant_concurrency, weights=weights,
+                                       name='ai-fanout')
+
+    def _wrap(self, func: Callable[[], Dict], index: int, started: Dict[int, float],
+              timeout: float) -> Callable[[], Dict]:
+        """Record when the call starts running and carry the caller's Flask app context into the worker thread"""
+        app = current_app._get_current_object() if has_app_context() else None
+
+        def run():
+            started[index] = time.monotonic()
+            token = _call_deadline.set(started[index] + timeout)
+            try:
+                if app is None:
+                    return func()
+                with app.app_context():
+                    return func()
+            finally:
+                _call_deadline.reset(token)
+
+        return run
+
+    def max_wait(self, calls: int, timeout: float = None) -> float:
+        """Upper bound on a whole batch: enough rounds of the tenant's worker slots for every call"""
+        timeout = timeout if timeout is not None else self.timeout
+        slots = max(1, min(self.max_workers, self.scheduler.tenant_concurrency))
+        return timeout * (math.ceil(calls / slots) + 1)
+
+    def iter_completed(self, calls: List[Tuple[str, Callable[[], Dict]]], timeout: float = None,
+                       on_error: Callable[[str, str], Dict] = None) -> Iterator[Tuple[int, Dict]]:
+        """Yield (index, result) pairs as calls finish.
+
+        Each call may run for timeout seconds from when it starts; calls past their deadline
+        yield an error result. Calls still queued after max_wait() are cancelled.
+        """
+        timeout = timeout if timeout is not None else self.timeout
+        on_error = on_error or (lambda key, error: {'key': key, 'error': error, 'success': False})
+
+        batch_deadline = time.monotonic() + self.max_wait(len(calls), timeout)
+        started = {}  # index -> monotonic start time, set by the worker
+        pending = {}
+        for index, (key, func) in enumerate(calls):
+            pending[self.scheduler.submit(self._wrap(func, index, started, timeout))] = (index, key)
+
+        while pending:
+            now = time.monotonic()
+            if now >= batch_deadline:
+                break
+
+            # Running calls past their own deadline are given up on; their worker stays busy until
+            # the provider returns, but the result is dropped
+            for future, (index, key) in list(pending.items()):
+                if index in started and not future.done() and now - started[index] >= timeout:
+                    del pending[future]
+                    yield index, on_error(key, f'Timed out after {timeout:.0f}s')
+            if not pending:
+                break
+
+            # Wake for the earliest running deadline; calls starting later end later than now + timeout
+            next_deadline = min([started[index] + timeout for index, _ in pending.values() if index in started]
+                                + [now + timeout, batch_deadline])
+            done, _ = wait(list(pending), timeout=max(0.0, next_deadline - now), return_when=FIRST_COMPLETED)
+            for future in done:
+                index, key = pending.pop(future)
+                try:
+                    yield index, future.result()
+                except Exception as e:
+                    yield index, on_error(key, str(e))
+
+        for future, (index, key) in pending.items():
+            future.cancel()
+            if index in started:
+                yield index, on_error(key, f'Timed out after {timeout:.0f}s')
+            else:
+                yield index, on_error(key, f'Not started within {self.max_wait(len(calls), timeout):.0f}s')
+
+    def run(self, calls: List[Tuple[str, Callable[[], Dict]]], timeout: float = None,
+            on_error: Callable[[str, str], Dict] = None) -> List[Dict]:
+        """Run all calls at once and return their results in submission order"""
+        results: List[Optional[Dict]] = [None] * len(calls)
+        for index, result in self.iter_completed(calls, timeout=timeout, on_error=on_error):
+            results[index] = result
+        return results
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_fanout_engine() -> FanoutEngine:
+    """Get the process-wide fan-out engine configured from the current app"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            max_workers = 16
+            timeout = 30.0
+            tenant_concurrency = None
+            weights = None
+            if has_app_context():
+                max_workers = current_app.config.get('AI_SEARCH_MAX_WORKERS', max_workers)
+                timeout = current_app.config.get('AI_SEARCH_TIMEOUT', timeout)
+                tenant_concurrency = current_app.config.get('FAIR_TENANT_CALL_CONCURRENCY')
+                weights = current_app.config.get('FAIR_TENANT_WEIGHTS')
+            _engine = FanoutEngine(max_workers=max_workers, timeout=timeout, tenant_concurrency=tenant_concurrency,
+                                   weights=weights)
+        return _engine
@@ -0,0 +1,96 @@
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+from flask import current_app, has_app_context
+from app.models import db, Brand, BrandQuery, SearchQuery
+from app.services.blob_store import BlobStore
+
+# Seconds a stored answer stays fresh, by BrandQuery priority (queries without one are priority 1)
+DEFAULT_TTL_BY_PRIORITY = {5: 3600, 4: 3 * 3600, 3: 6 * 3600, 2: 12 * 3600, 1: 24 * 3600}
+
+
+class FreshnessPolicy:
+    """Decide which (query, platform) answers stored in search_queries are recent enough to reuse.
+
+    The TTL comes from the query's priority and is scaled per platform, so important queries
+    and fast-moving platforms are re-asked more often. Fresh answers are re-scored with the
+    current analyzer instead of being sent to the provider again. Only the brand's own answers
+    from paid providers are reused; mock answers are free to regenerate and failed ones are never
+    stored.
+    """
+
+    def __init__(self, ttl_by_priority: Dict[int, int] = None, platform_factors: Dict[str, float] = None,
+                 enabled: bool = True):
+        self.ttl_by_priority = ttl_by_priority or DEFAULT_TTL_BY_PRIORITY
+        self.platform_factors = platform_factors or {}
+        self.enabled = enabled
+
+    def ttl(self, priority: int, platform: str) -> timedelta:
+        """How long an answer for a query of this priority on this platform stays fresh"""
+        seconds = self.ttl_by_priority.get(priority, self.ttl_by_priority.get(1, 0))
+        return timedelta(seconds=seconds * self.platform_factors.get(platform, 1.0))
+
+    def max_ttl(self, platforms: List[str]) -> timedelta:
+        return max((self.ttl(priority, platform) for priority in self.ttl_by_priority for platform in platforms),
+                   default=timedelta(0))
+
+    def fresh_results(self, ai_service, brand: Brand, queries: List[str],
+                      now: datetime = None) -> Dict[Tuple[str, str], Dict]:
+        """Re-scored platform results for every (query, platform) whose latest stored answer is fresh"""
+        if not self.enabled or not queries:
+            return {}
+
+        now = now or datetime.utcnow()
+        platforms = ai_service.billable_platforms()
+        if not platforms:
+            return {}
+        priorities = dict(db.session.query(BrandQuery.query_text, BrandQuery.priority).filter(
+            BrandQuery.brand_id == brand.id, BrandQuery.query_text.in_(queries)).all())
+
+        # Newest first, so the first row seen for a pair is its latest answer
+        rows = db.session.query(SearchQuery.query_text, SearchQuery.ai_platform, SearchQuery.response_hash,
+                                SearchQuery.inline_response_text, SearchQuery.created_at).filter(
+            SearchQuery.brand_id == brand.id,
+            SearchQuery.query_text.in_(queries),
+            SearchQuery.ai_platform.in_(platforms),
+            SearchQuery.created_at >= now - self.max_ttl(platforms)
+        ).order_by(SearchQuery.created_at.desc()).all()
+
+        latest = {}
+        for query, platform, response_hash, inline_text, created_at in rows:
+            if (query, platform) not in latest:
+                latest[(query, platform)] = (response_hash, inline_text, created_at)
+
+        candidates = {key: value for key, value in latest.items()
+                      if now - value[2] <= self.ttl(priorities.get(key[0]) or 1, key[1])}
+        texts = BlobStore().get_many(response_hash for response_hash, _, _ in candidates.values())
+
+        fresh = {}
+        for (query, platform), (response_hash, inline_text, created_at) in candidates.items():
+            response_text = texts.get(response_hash) if response_hash else inline_text
+            if response_text:
+                fresh[(query, platform)] = self._reuse(ai_service, brand, query, platform, response_text, created_at)
+        return fresh
+
+    def _reuse(self, ai_service, brand: Brand, query: str, platform: str, response_text: str,
+               created_at: datetime) -> Dict:
+        result = ai_service.score_response(platform, query, response_text, brand.name, cached=True)
+        result['reused'] = True
+        result['answered_at'] = created_at.isoformat()
+        return result
+
+
+_policy = None
+_policy_lock = threading.Lock()
+
+
+def get_freshness_policy() -> FreshnessPolicy:
+    """Get the process-wide freshness policy configured from the current app"""
+    global _policy
+    with _policy_lock:
+        if _policy is None:
+            config = current_app.config if has_app_context() else {}
+            _policy = FreshnessPolicy(ttl_by_priority=config.get('FRESHNESS_TTL_BY_PRIORITY'),
+                                      platform_factors=config.get('FRESHNESS_PLATFORM_FACTORS'),
+                                      enabled=config.get('FRESHNESS_ENABLED', True))
+        return _policy
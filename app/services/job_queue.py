@@ -0,0 +1,351 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Dict, List
+from flask import current_app, has_app_context
+from sqlalchemy import func
+from app.models import db, Brand
+from app.models.background_job import BackgroundJob, MonitoringSchedule
+from app.services.fair_scheduler import FairScheduler, fair_context
+
+# Fair-share tenant for planned runs, which mix brands of several users
+SCHEDULED_TENANT = 'scheduled'
+
+
+def _monitor_brand(job: BackgroundJob) -> Dict:
+    from app.services.brand_monitor import BrandMonitoringService
+    return BrandMonitoringService().monitor_brand(job.brand_id, (job.params or {}).get('custom_queries'))
+
+
+def _progress_recorder(job: BackgroundJob, interval: float = 1.0):
+    """progress(completed, total) callback that saves the job's progress at most once per interval"""
+    last_saved = [0.0]
+
+    def progress(completed: int, total: int):
+        now = time.monotonic()
+        if completed < total and now - last_saved[0] < interval:
+            return
+        last_saved[0] = now
+        job.result = {'progress': {'completed': completed, 'total': total}}
+        db.session.commit()
+
+    return progress
+
+
+def _competitor_analysis(job: BackgroundJob) -> Dict:
+    from app.services.competitor_analysis import CompetitorAnalysisService
+    from app.routes.analytics import store_competitor_analysis_results
+
+    service = CompetitorAnalysisService()
+    results = service.analyze_competitors(job.brand_id, progress=_progress_recorder(job), job=job)
+    if 'error' in results:
+        raise ValueError(results['error'])
+    results['coverage'] = service.cell_counts(job.id)
+    store_competitor_analysis_results(job.brand_id, results)
+    return results
+
+
+JOB_HANDLERS = {
+    'monitor_brand': _monitor_brand,
+    'competitor_analysis': _competitor_analysis,
+}
+
+# Handlers that checkpoint their work, so rerunning a job only does what is still missing
+RESUMABLE_JOBS = {'competitor_analysis'}
+
+
+def run_job(job_id: int) -> str:
+    """Execute a queued job inside the current app context and record the outcome"""
+    job = BackgroundJob.query.get(job_id)
+    if not job:
+        print(f"Background job {job_id} not found")
+        return 'missing'
+
+    # Brokers deliver at least once; never run a finished job twice
+    if job.status in ('completed', 'failed'):
+        return job.status
+
+    job.status = 'running'
+    job.started_at = datetime.utcnow()
+    db.session.commit()
+
+    try:
+        with fair_context(job.user_id):
+            job.result = JOB_HANDLERS[job.job_type](job)
+        job.status = 'completed'
+    except Exception as e:
+        db.session.rollback()
+        print(f"Background job {job_id} ({job.job_type}) failed: {e}")
+        job.status = 'failed'
+        job.error = str(e)
+
+    job.completed_at = datetime.utcnow()
+    db.session.commit()
+    return job.status
+
+
+def run_planned_jobs(job_ids: List[int]) -> str:
+    """Execute several queued monitor_brand jobs as one deduplicated monitoring run"""
+    from app.services.run_planner import MonitoringRunPlanner
+
+    jobs = [job for job in BackgroundJob.query.filter(BackgroundJob.id.in_(job_ids)).all() if job.status == 'queued']
+    if not jobs:
+        return 'skipped'
+
+    started_at = datetime.utcnow()
+    for job in jobs:
+        job.status = 'running'
+        job.started_at = started_at
+    db.session.commit()
+
+    jobs_by_brand = {}
+    for job in jobs:
+        jobs_by_brand.setdefault(job.brand_id, []).append(job)
+
+    def stored(summaries: Dict[int, Dict]):
+        # Committed with the chunk's results: a later failure leaves these brands completed
+        completed_at = datetime.utcnow()
+        for brand_id, summary in summaries.items():
+            for job in jobs_by_brand[brand_id]:
+                job.result = summary
+                job.status = 'completed'
+                job.completed_at = completed_at
+
+    try:
+        with fair_context(SCHEDULED_TENANT):
+            MonitoringRunPlanner().run(list(jobs_by_brand), on_stored=stored)
+        error = 'Brand is missing or inactive'
+    except Exception as e:
+        db.session.rollback()
+        print(f"Planned monitoring run for jobs {job_ids} failed: {e}")
+        error = str(e)
+
+    completed_at = datetime.utcnow()
+    for job in jobs:
+        if job.status != 'completed':
+            job.status = 'failed'
+            job.error = error
+            job.completed_at = completed_at
+    db.session.commit()
+    return 'completed'
+
+
+class JobQueue:
+    """Enqueue monitoring and competitor jobs and hand them to a backend.
+
+    Backends: 'celery' sends a task through the configured broker, 'thread' runs the job
+    on an in-process fair-share pool (per-tenant queues served round-robin, at most
+    tenant_concurrency jobs per tenant), and 'eager' runs it inline (for tests and scripts).
+    """
+
+    BACKENDS = ('celery', 'thread', 'eager')
+
+    def __init__(self, backend: str = 'thread', max_workers: int = 4, tenant_concurrency: int = None,
+                 weights: Dict = None):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown job backend: {backend}")
+        self.backend = backend
+        self.max_workers = max_workers
+        self.scheduler = FairScheduler(workers=max_workers, tenant_concurrency=tenant_concurrency, weights=weights,
+                                       name='zenith-job')
+
+    def enqueue(self, job_type: str, brand_id: int, user_id: int = None, params: Dict = None,
+                schedule_id: int = None) -> BackgroundJob:
+        """Record a job and dispatch it; returns the job row (status 'queued' unless eager)"""
+        if job_type not in JOB_HANDLERS:
+            raise ValueError(f"Unknown job type: {job_type}")
+
+        job = BackgroundJob(job_type=job_type, brand_id=brand_id, user_id=user_id, params=params or {},
+                            schedule_id=schedule_id, status='queued')
+        db.session.add(job)
+        db.session.commit()
+        self._dispatch_or_fail(job)
+        return job
+
+    def resume(self, job: BackgroundJob) -> BackgroundJob:
+        """Queue a finished or failed resumable job again; its handler skips the work it already saved"""
+        if job.job_type not in RESUMABLE_JOBS:
+            raise ValueError(f"Jobs of type {job.job_type} cannot be resumed")
+        if job.status in ('queued', 'running'):
+            raise ValueError(f"Job {job.id} is still {job.status}")
+
+        job.status = 'queued'
+        job.error = None
+        job.result = None
+        job.started_at = None
+        job.completed_at = None
+        db.session.commit()
+        self._dispatch_or_fail(job)
+        return job
+
+    def _dispatch_or_fail(self, job: BackgroundJob):
+        try:
+            self._dispatch(job)
+        except Exception as e:
+            print(f"Error dispatching background job {job.id}: {e}")
+            job.status = 'failed'
+            job.error = f"Could not dispatch job: {e}"
+            job.completed_at = datetime.utcnow()
+            db.session.commit()
+
+    def enqueue_monitoring_run(self, brand_ids: List[int], schedule_ids: Dict[int, int] = None) -> List[BackgroundJob]:
+        """Record one monitor_brand job per brand but execute them together as a planned run,
+        so prompts shared between brands are only sent once"""
+        schedule_ids = schedule_ids or {}
+        brands = {brand.id: brand for brand in Brand.query.filter(Brand.id.in_(brand_ids)).all()}
+        jobs = [BackgroundJob(job_type='monitor_brand', brand_id=brand_id, schedule_id=schedule_ids.get(brand_id),
+                              user_id=brands[brand_id].user_id if brand_id in brands else None,
+                              params={}, status='queued')
+                for brand_id in brand_ids]
+        db.session.add_all(jobs)
+        db.session.commit()
+        if not jobs:
+            return jobs
+
+        try:
+            self._dispatch_run([job.id for job in jobs])
+        except Exception as e:
+            print(f"Error dispatching monitoring run: {e}")
+            for job in jobs:
+                job.status = 'failed'
+                job.error = f"Could not dispatch job: {e}"
+                job.completed_at = datetime.utcnow()
+            db.session.commit()
+        return jobs
+
+    def _dispatch(self, job: BackgroundJob):
+        if self.backend == 'celery':
+            from app.tasks import run_background_job
+            job.task_id = run_background_job.delay(job.id).id
+            db.session.commit()
+        elif self.backend == 'thread':
+            self.scheduler.submit(partial(self._run_in_app, current_app._get_current_object(), run_job, job.id),
+                                  tenant=job.user_id)
+        else:
+            run_job(job.id)
+            db.session.refresh(job)
+
+    def _dispatch_run(self, job_ids: List[int]):
+        if self.backend == 'celery':
+            from app.tasks import run_monitoring_run
+            task_id = run_monitoring_run.delay(job_ids).id
+            BackgroundJob.query.filter(BackgroundJob.id.in_(job_ids)).update({'task_id': task_id},
+                                                                               synchronize_session=False)
+            db.session.commit()
+        elif self.backend == 'thread':
+            self.scheduler.submit(partial(self._run_in_app, current_app._get_current_object(), run_planned_jobs,
+                                          job_ids), tenant=SCHEDULED_TENANT)
+        else:
+            run_planned_jobs(job_ids)
+            db.session.expire_all()
+
+    @staticmethod
+    def _run_in_app(app, runner, argument):
+        with app.app_context():
+            try:
+                runner(argument)
+            finally:
+                db.session.remove()
+
+    def metrics(self, user_id: int = None, include_tenants: bool = False) -> Dict:
+        """Job queue depth and wait times from the database (any backend) plus the in-process pool"""
+        now = datetime.utcnow()
+        queued = BackgroundJob.query.filter_by(status='queued')
+        oldest = queued.with_entities(func.min(BackgroundJob.created_at)).scalar()
+        recent = BackgroundJob.query.filter(BackgroundJob.started_at.isnot(None)).order_by(
+            BackgroundJob.started_at.desc()).limit(100).with_entities(BackgroundJob.created_at,
+                                                                      BackgroundJob.started_at).all()
+        waits = sorted((started_at - created_at).total_seconds() for created_at, started_at in recent if created_at)
+
+        data = {
+            'backend': self.backend,
+            'queued': queued.count(),
+            'running': BackgroundJob.query.filter_by(status='running').count(),
+            'oldest_queued_seconds': round((now - oldest).total_seconds(), 1) if oldest else 0,
+            'recent_wait_p50_seconds': round(waits[len(waits) // 2], 1) if waits else 0,
+            'recent_wait_p95_seconds': round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 1) if waits else 0
+        }
+        if user_id is not None:
+            data['tenant_queued'] = queued.filter(BackgroundJob.user_id == user_id).count()
+        if self.backend == 'thread':
+            data['pool'] = self.scheduler.metrics(tenant=user_id, include_tenants=include_tenants)
+        return data
+
+    def start_scheduler(self, app, interval: float = 60.0):
+        """Dispatch due schedules from a daemon thread (for deployments without celery beat)"""
+
+        def loop():
+            while True:
+                with app.app_context():
+                    try:
+                        self.dispatch_due_schedules()
+                    except Exception as e:
+                        print(f"Error dispatching monitoring schedules: {e}")
+                    finally:
+                        db.session.remove()
+                time.sleep(interval)
+
+        thread = threading.Thread(target=loop, name='zenith-scheduler', daemon=True)
+        thread.start()
+        return thread
+
+    def dispatch_due_schedules(self, now: datetime = None) -> List[BackgroundJob]:
+        """Enqueue a job for every active schedule that is due"""
+        now = now or datetime.utcnow()
+        # Snapshot the due slots up front: commits below expire the ORM objects
+        due = [(schedule.id, schedule.next_run_at, schedule.interval_minutes, schedule.job_type, schedule.brand_id)
+               for schedule in MonitoringSchedule.query.filter(
+                   MonitoringSchedule.is_active.is_(True),
+                   MonitoringSchedule.next_run_at <= now
+               ).all()]
+
+        jobs = []
+        monitoring = {}  # brand_id -> schedule_id, run together so shared prompts are deduplicated
+        for schedule_id, next_run_at, interval_minutes, job_type, brand_id in due:
+            # Claim the slot with a conditional update so concurrent dispatchers don't double-enqueue
+            claimed = MonitoringSchedule.query.filter_by(id=schedule_id, next_run_at=next_run_at).update({
+                'last_run_at': now,
+                'next_run_at': now + timedelta(minutes=interval_minutes)
+            }, synchronize_session=False)
+            db.session.commit()
+            if not claimed:
+                continue
+
+            # Skip a tick while the previous run is still going
+            pending = BackgroundJob.query.filter(
+                BackgroundJob.schedule_id == schedule_id,
+                BackgroundJob.status.in_(['queued', 'running'])
+            ).first()
+            brand = Brand.query.get(brand_id)
+            if pending or not brand or not brand.is_active:
+                continue
+
+            if job_type == 'monitor_brand':
+                monitoring.setdefault(brand_id, schedule_id)
+            else:
+                jobs.append(self.enqueue(job_type, brand_id, user_id=brand.user_id, schedule_id=schedule_id))
+
+        if monitoring:
+            jobs.extend(self.enqueue_monitoring_run(list(monitoring), monitoring))
+
+        if jobs:
+            print(f"Dispatched {len(jobs)} scheduled monitoring jobs")
+        return jobs
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Get the process-wide job queue configured from the current app"""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            config = current_app.config if has_app_context() else {}
+            _queue = JobQueue(backend=config.get('JOB_BACKEND', 'thread'),
+                              max_workers=config.get('JOB_THREAD_WORKERS', 4),
+                              tenant_concurrency=config.get('JOB_TENANT_CONCURRENCY'),
+                              weights=config.get('FAIR_TENANT_WEIGHTS'))
+        return _queue
@@ -0,0 +1,81 @@
+import os
+import threading
+import httpx
+import openai
+import anthropic
+from flask import current_app, has_app_context
+
+
+class LLMClientRegistry:
+    """Process-wide cache of SDK clients sharing keep-alive HTTP connection pools"""
+
+    def __init__(self, pool_size: int = 20, keepalive: int = 10, timeout: float = 60.0,
+                 connect_timeout: float = 10.0, max_retries: int = 2):
+        self.pool_size = pool_size
+        self.keepalive = keepalive
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_retries = max_retries
+        self._clients = {}
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def _http_client(self) -> httpx.Client:
+        return httpx.Client(
+            limits=httpx.Limits(max_connections=self.pool_size,
+                                max_keepalive_connections=self.keepalive),
+            timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout)
+        )
+
+    def _get(self, key, factory):
+        with self._lock:
+            if self._pid != os.getpid():
+                # Never reuse sockets inherited from the parent; drop them without closing
+                self._clients = {}
+                self._pid = os.getpid()
+            if key not in self._clients:
+                self._clients[key] = factory()
+            return self._clients[key]
+
+    def openai(self, api_key: str) -> openai.OpenAI:
+        """Get the shared OpenAI client for an API key"""
+        return self._get(('openai', api_key), lambda: openai.OpenAI(
+            api_key=api_key, http_client=self._http_client(), max_retries=self.max_retries))
+
+    def anthropic(self, api_key: str) -> anthropic.Anthropic:
+        """Get the shared Anthropic client for an API key"""
+        return self._get(('anthropic', api_key), lambda: anthropic.Anthropic(
+            api_key=api_key, http_client=self._http_client(), max_retries=self.max_retries))
+
+    def reset(self):
+        """Forget all clients, e.g. in a freshly forked worker"""
+        with self._lock:
+            self._clients = {}
+            self._pid = os.getpid()
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_client_registry() -> LLMClientRegistry:
+    """Get the process-wide client registry configured from the current app"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            config = current_app.config if has_app_context() else {}
+            _registry = LLMClientRegistry(pool_size=config.get('LLM_HTTP_POOL_SIZE', 20),
+                                          keepalive=config.get('LLM_HTTP_KEEPALIVE', 10),
+                                          timeout=config.get('LLM_HTTP_TIMEOUT', 60.0),
+                                          connect_timeout=config.get('LLM_HTTP_CONNECT_TIMEOUT', 10.0),
+                                          max_retries=config.get('LLM_MAX_RETRIES', 2))
+        return _registry
+
+
+def _reset_after_fork():
+    if _registry is not None:
+        _registry.reset()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
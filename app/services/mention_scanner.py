@@ -0,0 +1,132 @@
+from collections import deque, namedtuple
+from functools import lru_cache
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+
+Mention = namedtuple('Mention', ['entity', 'start', 'end'])
+
+
+def _lower_preserving_offsets(text: str) -> str:
+    """Lowercase text without changing its length, so offsets map back onto the original"""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    # A few characters (e.g. 'İ') expand when lowercased; leave those as-is
+    return ''.join(ch.lower() if len(ch.lower()) == 1 else ch for ch in text)
+
+
+class MentionScanner:
+    """Aho–Corasick automaton that finds every brand, competitor and alias in one pass.
+
+    Matching is case-insensitive and word-boundary aware: "Hub" will not match inside
+    "GitHub", and "top" will not match inside "stop".
+    """
+
+    def __init__(self, entities: Dict[str, Sequence[str]]):
+        """entities maps each canonical name to its extra surface forms (aliases)"""
+        self.entities = list(entities)
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]  # (pattern_length, entity) pairs ending at each state
+
+        for entity, aliases in entities.items():
+            for pattern in {entity, *aliases}:
+                pattern = _lower_preserving_offsets(pattern.strip())
+                if pattern:
+                    self._add(pattern, entity)
+        self._build_failure_links()
+
+    def _add(self, pattern: str, entity: str):
+        state = 0
+        for ch in pattern:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][ch] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append((len(pattern), entity))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(ch, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def scan(self, text: str) -> List[Mention]:
+        """Return every word-bounded mention in text, ordered by position"""
+        if not text:
+            return []
+
+        lowered = _lower_preserving_offsets(text)
+        length = len(lowered)
+        goto, fail, output = self._goto, self._fail, self._output
+        found = []
+        state = 0
+
+        for index, ch in enumerate(lowered):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for pattern_length, entity in output[state]:
+                start = index - pattern_length + 1
+                end = index + 1
+                # Only enforce a boundary where the pattern itself starts/ends with a word character
+                if lowered[start].isalnum() and start > 0 and lowered[start - 1].isalnum():
+                    continue
+                if lowered[index].isalnum() and end < length and lowered[end].isalnum():
+                    continue
+                found.append(Mention(entity, start, end))
+
+        found.sort(key=lambda mention: (mention.start, -(mention.end - mention.start)))
+
+        # An alias nested inside a longer match of the same entity is the same mention
+        mentions = []
+        last_end = {}
+        for mention in found:
+            if mention.start < last_end.get(mention.entity, -1):
+                continue
+            mentions.append(mention)
+            last_end[mention.entity] = mention.end
+        return mentions
+
+    def find_all(self, text: str) -> Dict[str, List[Mention]]:
+        """Group mentions by entity; every entity is present, possibly with an empty list"""
+        grouped = {entity: [] for entity in self.entities}
+        for mention in self.scan(text):
+            grouped[mention.entity].append(mention)
+        return grouped
+
+    @staticmethod
+    def contexts(text: str, mentions: Iterable[Mention], context_length: int = 150) -> List[str]:
+        """Unique text windows centred on each mention"""
+        contexts = []
+        seen = set()
+        for mention in mentions:
+            context_start = max(0, mention.start - context_length // 2)
+            context_end = min(len(text), mention.end + context_length // 2)
+            context = text[context_start:context_end].strip()
+            if context and context not in seen:
+                seen.add(context)
+                contexts.append(context)
+        return contexts
+
+
+@lru_cache(maxsize=1024)
+def _compiled_scanner(entities: Tuple[Tuple[str, Tuple[str, ...]], ...]) -> MentionScanner:
+    return MentionScanner(dict(entities))
+
+
+def get_mention_scanner(names: Sequence[str], aliases: Dict[str, Sequence[str]] = None) -> MentionScanner:
+    """Get a compiled scanner for a brand set; identical sets share one cached automaton"""
+    aliases = aliases or {}
+    key = tuple((name, tuple(sorted(aliases.get(name, ())))) for name in dict.fromkeys(names) if name)
+    return _compiled_scanner(key)
@@ -0,0 +1,216 @@
+import hashlib
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+from flask import current_app, has_app_context
+from app.models import db
+from app.models.ai_overview import SearchCache
+from app.services.bulk_writer import BulkWriter
+from app.services.fair_scheduler import FairScheduler
+from app.services.response_cache import LRUCache
+from app.services.single_flight import SingleFlight
+
+# Punctuation and whitespace runs; queries differing only in these share an entry
+NON_WORD = re.compile(r'[\W_]+')
+
+
+class OverviewCache:
+    """Overview results by normalized query: an in-process LRU in front of the search_cache table.
+
+    Entries are fresh for ttl. For stale_ttl after that they are still served immediately while
+    one background refresh per query regenerates them (stale-while-revalidate); concurrent misses
+    for the same query share one generation. Reads never delete: expired rows are removed in
+    batches by a background sweep.
+    """
+
+    def __init__(self, ttl: float = 6 * 3600, stale_ttl: float = 18 * 3600, memory_entries: int = 512,
+                 refresh_workers: int = 2, sweep_batch: int = 500):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.sweep_batch = sweep_batch
+        self.memory = LRUCache(memory_entries)
+        self.single_flight = SingleFlight()
+        self.refresher = FairScheduler(workers=refresh_workers, name='overview-refresh')
+        self._refreshing = set()
+        self._sweeper = None
+        self._stats = {'memory_hits': 0, 'table_hits': 0, 'stale_hits': 0, 'misses': 0, 'refreshes': 0,
+                       'refresh_errors': 0, 'swept': 0}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(query: str) -> str:
+        """sha256 of the case-folded query with punctuation and whitespace collapsed"""
+        normalized = NON_WORD.sub(' ', query.casefold()).strip()
+        return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def get(self, query: str, build: Callable[[], Dict] = None, tenant=None) -> Optional[Dict]:
+        """Cached results for query, fresh or within the stale window, else None.
+
+        A stale hit schedules build() in the background (once per query) to replace the entry.
+        """
+        key = self.make_key(query)
+        entry = self.memory.get(key)
+        if entry is not None and entry['fresh_until'] > datetime.utcnow():
+            self._count('memory_hits')
+            return entry['results']
+
+        # Missing or stale in memory: another worker may have refreshed the row since
+        entry = self._load(key)
+        if entry is None:
+            self._count('misses')
+            return None
+
+        if entry['fresh_until'] > datetime.utcnow():
+            self._count('table_hits')
+        else:
+            self._count('stale_hits')
+            if build is not None:
+                self._revalidate(key, query, build, tenant)
+        return entry['results']
+
+    def _load(self, key: str) -> Optional[Dict]:
+        """Read an unexpired entry from the table into the LRU"""
+        row = db.session.query(SearchCache.results, SearchCache.created_at, SearchCache.expires_at)\
+            .filter(SearchCache.query_hash == key).first()
+        now = datetime.utcnow()
+        if not row or row.expires_at <= now:
+            return None
+        entry = {'results': row.results, 'fresh_until': row.created_at + timedelta(seconds=self.ttl)}
+        self.memory.set(key, entry, (row.expires_at - now).total_seconds())
+        return entry
+
+    def get_or_build(self, query: str, build: Callable[[], Dict], tenant=None) -> Dict:
+        """Cached results for query, generating and storing them once across concurrent callers on a miss.
+
+        build raises rather than returning results that must not be cached, such as fallback text.
+        """
+        results = self.get(query, build, tenant)
+        if results is not None:
+            return results
+        key = self.make_key(query)
+
+        def build_and_store():
+            # Another worker may have stored it since our miss
+            entry = self._load(key)
+            if entry is not None:
+                return entry['results']
+            built = build()
+            self.put(query, built)
+            return built
+
+        return self.single_flight.do(key, build_and_store)[0]
+
+    def put(self, query: str, results: Dict):
+        """Store results for query, replacing any previous entry"""
+        key = self.make_key(query)
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.ttl + self.stale_ttl)
+        # Upsert: two users generating the same query at once both succeed
+        BulkWriter().upsert(SearchCache, [{
+            'query_hash': key,
+            'search_query': query[:500],
+            'results': results,
+            'created_at': now,
+            'expires_at': expires_at
+        }], ('query_hash',), ['search_query', 'results', 'created_at', 'expires_at'])
+        db.session.commit()
+        self.memory.set(key, {'results': results, 'fresh_until': now + timedelta(seconds=self.ttl)},
+                        self.ttl + self.stale_ttl)
+
+    def _revalidate(self, key: str, query: str, build: Callable[[], Dict], tenant=None):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        app = current_app._get_current_object()
+
+        def refresh():
+            try:
+                with app.app_context():
+                    try:
+                        # A failed build raises, leaving the stale entry in place
+                        self.put(query, build())
+                        self._count('refreshes')
+                    except Exception as e:
+                        db.session.rollback()
+                        self._count('refresh_errors')
+                        print(f"Error refreshing cached overview for '{query}': {e}")
+                    finally:
+                        db.session.remove()
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self.refresher.submit(refresh, tenant=tenant)
+
+    def sweep(self) -> int:
+        """Delete expired rows in batches, returning how many were removed"""
+        removed = 0
+        while True:
+            ids = [row_id for (row_id,) in db.session.query(SearchCache.id)
+                   .filter(SearchCache.expires_at <= datetime.utcnow())
+                   .limit(self.sweep_batch)]
+            if not ids:
+                break
+            db.session.query(SearchCache).filter(SearchCache.id.in_(ids)).delete(synchronize_session=False)
+            db.session.commit()
+            removed += len(ids)
+        self._count('swept', removed)
+        return removed
+
+    def start_sweeper(self, app, interval: float = 600.0):
+        """Sweep expired rows from a daemon thread every interval seconds"""
+        with self._lock:
+            if self._sweeper is not None:
+                return self._sweeper
+
+            def loop():
+                while True:
+                    time.sleep(interval)
+                    with app.app_context():
+                        try:
+                            self.sweep()
+                        except Exception as e:
+                            db.session.rollback()
+                            print(f"Error sweeping the overview cache: {e}")
+                        finally:
+                            db.session.remove()
+
+            self._sweeper = threading.Thread(target=loop, name='overview-cache-sweeper', daemon=True)
+            self._sweeper.start()
+            return self._sweeper
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for this process"""
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['memory_hits'] + stats['table_hits'] + stats['stale_hits'] + stats['misses']
+        hits = lookups - stats['misses']
+        stats['hit_rate'] = round(hits / lookups, 3) if lookups else 0.0
+        stats['memory_entries'] = len(self.memory)
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_overview_cache() -> OverviewCache:
+    """Get the process-wide overview cache configured from the current app"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            config = current_app.config if has_app_context() else {}
+            _cache = OverviewCache(ttl=config.get('OVERVIEW_CACHE_TTL', 6 * 3600),
+                                   stale_ttl=config.get('OVERVIEW_CACHE_STALE_TTL', 18 * 3600),
+                                   memory_entries=config.get('OVERVIEW_CACHE_MEMORY_ENTRIES', 512),
+                                   sweep_batch=config.get('OVERVIEW_CACHE_SWEEP_BATCH', 500))
+            if has_app_context() and config.get('OVERVIEW_CACHE_SWEEP_INTERVAL'):
+                _cache.start_sweeper(current_app._get_current_object(), config['OVERVIEW_CACHE_SWEEP_INTERVAL'])
+        return _cache
@@ -0,0 +1,201 @@
+import threading
+import time
+from concurrent.futures import wait
+from functools import partial
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from flask import current_app, has_app_context
+from app.services.fair_scheduler import FairScheduler
+from app.services.url_cache import UrlCache
+from app.utils.html_extractor import extract_main_text
+
+USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+              'Chrome/91.0.4472.124 Safari/537.36')
+
+
+class PageFetchTimeout(Exception):
+    """A download did not finish before its deadline"""
+
+
+class PageFetcher:
+    """Download web pages concurrently over one pooled, keep-alive requests.Session.
+
+    fetch_many() starts every download at once on a fair-share worker pool, allows at most
+    per_host downloads to the same host at a time, and stops waiting at a single deadline for
+    the whole batch. Downloads still queued at the deadline are cancelled; ones in progress
+    notice it between chunks and close their connection.
+
+    fetch_text()/fetch_text_many() return extracted main text and, given a UrlCache, serve fresh
+    entries without any request and revalidate stale ones with a conditional GET.
+    """
+
+    def __init__(self, workers: int = 16, per_host: int = 2, timeout: float = 10.0, deadline: float = 8.0,
+                 max_bytes: int = 2 * 1024 * 1024, session=None, cache: UrlCache = None):
+        self.per_host = per_host
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_bytes = max_bytes
+        self.session = session or self._build_session(workers, per_host)
+        self.cache = cache
+        self.scheduler = FairScheduler(workers=workers, name='page-fetch')
+        self._hosts = {}  # host -> downloads in progress
+        self._hosts_cond = threading.Condition()
+
+    @staticmethod
+    def _build_session(workers: int, per_host: int) -> requests.Session:
+        session = requests.Session()
+        # Keep up to per_host idle connections for each of the most recent hosts
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=per_host, max_retries=0)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers['User-Agent'] = USER_AGENT
+        return session
+
+    def fetch(self, url: str, timeout: float = None) -> bytes:
+        """Download one page body; raises on HTTP errors and timeouts"""
+        return self._download(url, time.monotonic() + (timeout or self.timeout), threading.Event())
+
+    def fetch_text(self, url: str, timeout: float = None) -> Optional[str]:
+        """Main text of one page, from the URL cache when possible; raises on HTTP errors and timeouts"""
+        return self._fetch_text(url, time.monotonic() + (timeout or self.timeout), threading.Event())
+
+    def fetch_many(self, urls: List[str], process: Callable[[str, bytes], object] = None,
+                   deadline: float = None) -> List[Optional[object]]:
+        """Download urls concurrently within one deadline (seconds) for the whole batch.
+
+        Returns one entry per url, in order: process(url, body) run on the worker thread (or
+        the body itself), or None where the download failed or missed the deadline.
+        """
+        return self._run_many(urls, partial(self._fetch_one, process=process), deadline)
+
+    def fetch_text_many(self, urls: List[str], deadline: float = None) -> List[Optional[str]]:
+        """Main text of each page, like fetch_many() but going through the URL cache"""
+        return self._run_many(urls, self._fetch_text, deadline)
+
+    def _run_many(self, urls: List[str], func: Callable, deadline: float = None) -> List[Optional[object]]:
+        deadline_at = time.monotonic() + (deadline if deadline is not None else self.deadline)
+        stop = threading.Event()
+        futures = [self.scheduler.submit(partial(func, url, deadline_at, stop)) for url in urls]
+
+        wait(futures, timeout=max(0.0, deadline_at - time.monotonic()))
+        stop.set()
+
+        results = []
+        for url, future in zip(urls, futures):
+            if not future.done():
+                future.cancel()
+                print(f"Gave up on {url}: page fetch deadline passed")
+                results.append(None)
+                continue
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"Failed to fetch {url}: {e}")
+                results.append(None)
+        return results
+
+    def _fetch_one(self, url: str, deadline_at: float, stop: threading.Event, process: Callable = None):
+        body = self._download(url, deadline_at, stop)
+        return process(url, body) if process else body
+
+    def _fetch_text(self, url: str, deadline_at: float, stop: threading.Event) -> Optional[str]:
+        entry = self.cache.get(url) if self.cache else None
+        if entry and entry['fresh']:
+            return entry['text']
+
+        headers = {}
+        if entry:
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+        status, response_headers, body = self._request(url, deadline_at, stop, headers)
+        if status == 304 and entry:
+            # Unchanged since it was last parsed
+            self.cache.renew(url)
+            return entry['text']
+
+        text = extract_main_text(body)
+        if self.cache and text and 'no-store' not in response_headers.get('Cache-Control', ''):
+            self.cache.put(url, text, response_headers.get('ETag'), response_headers.get('Last-Modified'))
+        return text
+
+    def _download(self, url: str, deadline_at: float, stop: threading.Event) -> bytes:
+        return self._request(url, deadline_at, stop)[2]
+
+    def _request(self, url: str, deadline_at: float, stop: threading.Event,
+                 headers: Dict[str, str] = None) -> Tuple[int, Dict, bytes]:
+        """GET url within the deadline, returning (status, headers, body)"""
+        host = urlsplit(url).netloc
+        self._acquire_host(host, deadline_at, stop)
+        try:
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0 or stop.is_set():
+                raise PageFetchTimeout(f"Deadline passed before downloading {url}")
+
+            request_timeout = min(self.timeout, remaining)
+            response = self.session.get(url, headers=headers, timeout=(request_timeout, request_timeout), stream=True)
+            try:
+                response.raise_for_status()
+                chunks = []
+                size = 0
+                for chunk in response.iter_content(64 * 1024):
+                    if stop.is_set() or time.monotonic() > deadline_at:
+                        # Closing a partly read response drops its connection instead of pooling it
+                        raise PageFetchTimeout(f"Deadline passed while downloading {url}")
+                    chunks.append(chunk)
+                    size += len(chunk)
+                    if size >= self.max_bytes:
+                        break
+                return response.status_code, response.headers, b''.join(chunks)[:self.max_bytes]
+            finally:
+                response.close()
+        finally:
+            self._release_host(host)
+
+    def _acquire_host(self, host: str, deadline_at: float, stop: threading.Event):
+        """Wait for one of the host's per_host download slots"""
+        with self._hosts_cond:
+            while self._hosts.get(host, 0) >= self.per_host:
+                remaining = deadline_at - time.monotonic()
+                if remaining <= 0 or stop.is_set():
+                    raise PageFetchTimeout(f"Deadline passed waiting for a connection to {host}")
+                self._hosts_cond.wait(min(remaining, 0.5))
+            self._hosts[host] = self._hosts.get(host, 0) + 1
+
+    def _release_host(self, host: str):
+        with self._hosts_cond:
+            self._hosts[host] -= 1
+            if not self._hosts[host]:
+                del self._hosts[host]
+            self._hosts_cond.notify_all()
+
+
+def _build_url_cache(config) -> Optional[UrlCache]:
+    if not config.get('URL_CACHE_ENABLED') or not config.get('URL_CACHE_PATH'):
+        return None
+    return UrlCache(config['URL_CACHE_PATH'],
+                    default_ttl=config.get('URL_CACHE_TTL', 6 * 3600),
+                    domain_ttls=config.get('URL_CACHE_DOMAIN_TTLS'),
+                    max_bytes=config.get('URL_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+
+
+_fetcher = None
+_fetcher_lock = threading.Lock()
+
+
+def get_page_fetcher() -> PageFetcher:
+    """Get the process-wide page fetcher configured from the current app"""
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            config = current_app.config if has_app_context() else {}
+            _fetcher = PageFetcher(workers=config.get('PAGE_FETCH_WORKERS', 16),
+                                   per_host=config.get('PAGE_FETCH_PER_HOST', 2),
+                                   timeout=config.get('PAGE_FETCH_TIMEOUT', 10.0),
+                                   deadline=config.get('PAGE_FETCH_DEADLINE', 8.0),
+                                   max_bytes=config.get('PAGE_FETCH_MAX_BYTES', 2 * 1024 * 1024),
+                                   cache=_build_url_cache(config))
+        return _fetcher
@@ -0,0 +1,150 @@
+import threading
+from collections import namedtuple
+from datetime import datetime
+from typing import Dict, List, Optional
+from flask import current_app, has_app_context
+from sqlalchemy import func
+from app.models import db, Brand, BrandQuery, SearchQuery
+from app.services.shared_state import get_state_backend
+
+# USD per 1K tokens; platforms without an entry (e.g. the perplexity mock) are free
+DEFAULT_PRICING = {'chatgpt': 0.002, 'claude': 0.015}
+BUDGET_TTL = 2 * 24 * 3600
+
+ScheduledQuery = namedtuple('ScheduledQuery', ['query', 'priority', 'last_run_at'])
+QueryAllocation = namedtuple('QueryAllocation', ['user_id', 'queries', 'skipped', 'reserved_cost'])
+
+
+class QueryScheduler:
+    """Decide which prompts a run may send, in priority order, within token cost budgets.
+
+    Candidates are ordered by BrandQuery.priority (5 first), then by staleness (never run,
+    then least recently run), so repeated runs rotate through every query. Admitted queries
+    reserve their estimated cost against the tenant's and the global daily budget in the
+    shared state backend; settle() later replaces the estimate with the tokens actually used.
+    """
+
+    def __init__(self, backend=None, pricing: Dict[str, float] = None, tenant_daily_budget: float = None,
+                 global_daily_budget: float = None, default_tokens: int = 1000):
+        self.backend = backend or get_state_backend()
+        self.pricing = DEFAULT_PRICING if pricing is None else pricing
+        self.tenant_daily_budget = tenant_daily_budget
+        self.global_daily_budget = global_daily_budget
+        self.default_tokens = default_tokens
+
+    def cost(self, platform: str, tokens: float) -> float:
+        """USD cost of tokens on a platform"""
+        return (tokens or 0) / 1000.0 * self.pricing.get(platform, 0.0)
+
+    def result_cost(self, result: Dict) -> float:
+        """USD cost of one platform result (cache hits report zero tokens)"""
+        return self.cost(result.get('platform'), result.get('tokens_used', 0))
+
+    def estimated_tokens(self, platform: str) -> float:
+        """Average tokens per call on a platform, learned from observe()"""
+        average = self.backend.get(f'querybudget:tokens:{platform}')
+        return average if average is not None else self.default_tokens
+
+    def estimate(self, platforms: List[str]) -> float:
+        """Estimated USD cost of sending one query to each of the platforms"""
+        return sum(self.cost(platform, self.estimated_tokens(platform)) for platform in platforms)
+
+    def observe(self, results: List[Dict], weight: float = 0.2):
+        """Fold the token usage of fresh completions into the per-platform averages"""
+        for result in results:
+            tokens = result.get('tokens_used')
+            if not result.get('success') or result.get('cached') or not tokens:
+                continue
+            self.backend.update(
+                f'querybudget:tokens:{result["platform"]}',
+                lambda average: (tokens if average is None else average + weight * (tokens - average), None)
+            )
+
+    def prioritize(self, brand: Brand, queries: List[str]) -> List[ScheduledQuery]:
+        """Order candidate queries by priority, then staleness, then their original order"""
+        queries = list(dict.fromkeys(queries))
+        if not queries:
+            return []
+
+        priorities = dict(db.session.query(BrandQuery.query_text, BrandQuery.priority).filter(
+            BrandQuery.brand_id == brand.id, BrandQuery.query_text.in_(queries)).all())
+        last_runs = dict(db.session.query(SearchQuery.query_text, func.max(SearchQuery.created_at)).filter(
+            SearchQuery.user_id == brand.user_id, SearchQuery.query_text.in_(queries)
+        ).group_by(SearchQuery.query_text).all())
+
+        scheduled = [ScheduledQuery(query, priorities.get(query) or 1, last_runs.get(query)) for query in queries]
+        order = {query: index for index, query in enumerate(queries)}
+        return sorted(scheduled, key=lambda item: (-item.priority, item.last_run_at or datetime.min, order[item.query]))
+
+    def allocate(self, brand: Brand, queries: List[str], platforms: List[str],
+                 run_budget: float = None) -> QueryAllocation:
+        """Admit the most valuable queries that fit the run, tenant and global budgets"""
+        ordered = [item.query for item in self.prioritize(brand, queries)]
+        per_query = self.estimate(platforms)
+        if per_query <= 0:
+            return QueryAllocation(brand.user_id, ordered, [], 0.0)
+
+        wanted = len(ordered)
+        if run_budget is not None:
+            wanted = min(wanted, int(run_budget / per_query + 1e-9))
+
+        admitted = self._reserve(self._tenant_key(brand.user_id), per_query, wanted, self.tenant_daily_budget)
+        granted = self._reserve(self._global_key(), per_query, admitted, self.global_daily_budget)
+        if granted < admitted:
+            self._charge(self._tenant_key(brand.user_id), -(admitted - granted) * per_query)
+
+        if granted < len(ordered):
+            print(f"Query budget for {brand.name}: running {granted} of {len(ordered)} queries")
+        return QueryAllocation(brand.user_id, ordered[:granted], ordered[granted:], granted * per_query)
+
+    def settle(self, allocation: QueryAllocation, actual_cost: float):
+        """Replace an allocation's reserved estimate with what its queries actually cost"""
+        adjustment = actual_cost - allocation.reserved_cost
+        if allocation.reserved_cost or actual_cost:
+            self._charge(self._tenant_key(allocation.user_id), adjustment)
+            self._charge(self._global_key(), adjustment)
+
+    def spent(self, user_id: int) -> Dict:
+        """Today's spend and limits for a tenant and overall"""
+        return {
+            'tenant_spent': self.backend.get(self._tenant_key(user_id)) or 0.0,
+            'tenant_budget': self.tenant_daily_budget,
+            'global_spent': self.backend.get(self._global_key()) or 0.0,
+            'global_budget': self.global_daily_budget
+        }
+
+    def _tenant_key(self, user_id: int) -> str:
+        return f'querybudget:{datetime.utcnow().date().isoformat()}:tenant:{user_id}'
+
+    def _global_key(self) -> str:
+        return f'querybudget:{datetime.utcnow().date().isoformat()}:global'
+
+    def _reserve(self, key: str, per_query: float, wanted: int, limit: Optional[float]) -> int:
+        """Atomically reserve up to `wanted` queries against a budget; returns how many fit"""
+        def take(spent):
+            spent = spent or 0.0
+            count = wanted
+            if limit is not None:
+                count = max(0, min(wanted, int((limit - spent) / per_query + 1e-9)))
+            return spent + count * per_query, count
+
+        return self.backend.update(key, take, ttl=BUDGET_TTL)
+
+    def _charge(self, key: str, amount: float):
+        self.backend.update(key, lambda spent: ((spent or 0.0) + amount, None), ttl=BUDGET_TTL)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_query_scheduler() -> QueryScheduler:
+    """Get the process-wide query scheduler configured from the current app"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            config = current_app.config if has_app_context() else {}
+            _scheduler = QueryScheduler(pricing=config.get('QUERY_PRICING'),
+                                        tenant_daily_budget=config.get('QUERY_BUDGET_TENANT_DAILY'),
+                                        global_daily_budget=config.get('QUERY_BUDGET_GLOBAL_DAILY'))
+        return _scheduler
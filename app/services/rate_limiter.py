@@ -0,0 +1,193 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+from flask import current_app, has_app_context
+from app.services.fanout import call_deadline
+from app.services.shared_state import get_state_backend
+
+
+DEFAULT_LIMITS = {'rpm': 60, 'tpm': 60000, 'max_concurrency': 4}
+
+
+class RateLimitTimeout(Exception):
+    """Raised when a provider slot could not be acquired in time"""
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Check whether a provider exception is an HTTP 429"""
+    return getattr(error, 'status_code', None) == 429 or type(error).__name__ == 'RateLimitError'
+
+
+def take_tokens(state: Optional[Dict], capacity: float, refill_per_second: float, amount: float, now: float):
+    """Token bucket step: returns (new_state, seconds_to_wait); tokens are only taken when wait is 0"""
+    amount = min(amount, capacity)
+    if state is None:
+        tokens = capacity
+    else:
+        tokens = min(capacity, state['tokens'] + (now - state['ts']) * refill_per_second)
+
+    if tokens >= amount:
+        return {'tokens': tokens - amount, 'ts': now}, 0.0
+    return {'tokens': tokens, 'ts': now}, (amount - tokens) / refill_per_second
+
+
+class AIMDWindow:
+    """Additive-increase / multiplicative-decrease concurrency window for one provider model"""
+
+    def __init__(self, max_concurrency: int, backoff_factor: float = 0.5, cooldown: float = 5.0):
+        self.max_concurrency = max_concurrency
+        self.limit = float(max_concurrency)
+        self.backoff_factor = backoff_factor
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self._last_backoff = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            self.in_flight += 1
+            return True
+
+    def release(self, throttled: bool = False, succeeded: bool = True):
+        """Free a slot: a 429 shrinks the window, a success widens it and any other failure leaves it alone"""
+        with self._cond:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if throttled:
+                # Halve at most once per cooldown so one burst of 429s doesn't collapse the window to 1
+                if now - self._last_backoff >= self.cooldown:
+                    self.limit = max(1.0, self.limit * self.backoff_factor)
+                    self._last_backoff = now
+            elif succeeded:
+                self.limit = min(float(self.max_concurrency), self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+
+class RateLease:
+    """Handle for one in-flight provider call"""
+
+    def __init__(self, limiter: 'RateLimiter', provider: str, model: str, reserved_tokens: int):
+        self.limiter = limiter
+        self.provider = provider
+        self.model = model
+        self.reserved_tokens = reserved_tokens
+
+    def record_tokens(self, tokens_used: int):
+        """Charge the tokens/min bucket for usage beyond the up-front estimate"""
+        extra = (tokens_used or 0) - self.reserved_tokens
+        if extra > 0:
+            self.limiter.charge_tokens(self.provider, self.model, extra)
+
+
+class RateLimiter:
+    """Per-provider, per-model rate limiting with shared token buckets and a local AIMD window"""
+
+    def __init__(self, backend=None, limits: Dict = None, wait_timeout: float = 60.0):
+        self.backend = backend or get_state_backend()
+        self.limits = limits or {}
+        self.wait_timeout = wait_timeout
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def limits_for(self, provider: str, model: str) -> Dict:
+        """Resolve limits from 'provider:model', then 'provider', then 'default'"""
+        limits = dict(DEFAULT_LIMITS)
+        limits.update(self.limits.get('default', {}))
+        limits.update(self.limits.get(provider, {}))
+        limits.update(self.limits.get(f'{provider}:{model}', {}))
+        return limits
+
+    def window(self, provider: str, model: str) -> AIMDWindow:
+        key = f'{provider}:{model}'
+        with self._lock:
+            if key not in self._windows:
+                self._windows[key] = AIMDWindow(self.limits_for(provider, model)['max_concurrency'])
+            return self._windows[key]
+
+    def _take(self, key: str, capacity: float, per_minute: float, amount: float) -> float:
+        return self.backend.update(
+            key,
+            lambda state: take_tokens(state, capacity, per_minute / 60.0, amount, time.time()),
+            ttl=120
+        )
+
+    def _wait_for(self, key: str, capacity: float, amount: float, deadline: float):
+        while True:
+            wait = self._take(key, capacity, capacity, amount)
+            if wait <= 0:
+                return
+            if time.monotonic() + wait > deadline:
+                raise RateLimitTimeout(f'Rate limit wait for {key} runs past the call deadline')
+            time.sleep(wait)
+
+    def charge_tokens(self, provider: str, model: str, tokens: int):
+        """Debit tokens without waiting; the bucket may go negative and delay later callers"""
+        def charge(state):
+            now = time.time()
+            capacity = self.limits_for(provider, model)['tpm']
+            if state is None:
+                state = {'tokens': capacity, 'ts': now}
+            return {'tokens': state['tokens'] - tokens, 'ts': state['ts']}, None
+
+        self.backend.update(f'ratelimit:{provider}:{model}:tpm', charge, ttl=120)
+
+    def drain(self, provider: str, model: str):
+        """Empty the shared request bucket after a 429 so other workers back off too"""
+        self.backend.update(f'ratelimit:{provider}:{model}:rpm',
+                            lambda state: ({'tokens': 0.0, 'ts': time.time()}, None), ttl=120)
+
+    @contextmanager
+    def acquire(self, provider: str, model: str, tokens: int = 0, timeout: float = None):
+        """Wait for a concurrency slot and request/token budget, then yield a RateLease.
+
+        The wait is capped at the deadline of the fan-out call we are running in, if any, so a
+        call never spends longer queued here than it is allowed to run.
+        """
+        timeout = timeout if timeout is not None else self.wait_timeout
+        deadline = time.monotonic() + timeout
+        if call_deadline() is not None:
+            deadline = min(deadline, call_deadline())
+            timeout = max(0.0, deadline - time.monotonic())
+        limits = self.limits_for(provider, model)
+
+        window = self.window(provider, model)
+        if not window.acquire(timeout):
+            raise RateLimitTimeout(f'No {provider}:{model} concurrency slot within {timeout:.0f}s')
+
+        throttled = False
+        succeeded = False
+        try:
+            self._wait_for(f'ratelimit:{provider}:{model}:rpm', limits['rpm'], 1, deadline)
+            if tokens:
+                self._wait_for(f'ratelimit:{provider}:{model}:tpm', limits['tpm'], tokens, deadline)
+            yield RateLease(self, provider, model, tokens)
+            succeeded = True
+        except Exception as e:
+            if is_rate_limit_error(e):
+                throttled = True
+                self.drain(provider, model)
+            raise
+        finally:
+            window.release(throttled, succeeded)
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Get the process-wide rate limiter configured from the current app"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            config = current_app.config if has_app_context() else {}
+            _limiter = RateLimiter(limits=config.get('RATE_LIMITS'),
+                                   wait_timeout=config.get('RATE_LIMIT_WAIT_TIMEOUT', 60.0))
+        return _limiter
@@ -0,0 +1,159 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from flask import current_app, has_app_context
+from app.services.shared_state import create_state_backend
+
+
+class LRUCache:
+    """Thread-safe in-process LRU with per-entry expiry"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float = None):
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl if ttl else None)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class ResponseCache:
+    """Two-tier cache of raw LLM completions: in-process LRU in front of a persistent backend"""
+
+    def __init__(self, backend, memory_entries: int = 1024, ttl: float = 86400,
+                 max_entries: int = 50000, prune_every: int = 500):
+        self.memory = LRUCache(memory_entries)
+        self.backend = backend
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.prune_every = prune_every
+        self._writes = 0
+        self._stats = {'memory_hits': 0, 'persistent_hits': 0, 'misses': 0, 'writes': 0, 'errors': 0}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(platform: str, model: str, prompt: str, temperature: Optional[float] = None,
+                 max_tokens: Optional[int] = None) -> str:
+        """Key on the normalized request; whitespace and case differences share an entry"""
+        normalized_prompt = ' '.join(prompt.split()).casefold()
+        raw = json.dumps([platform, model, normalized_prompt,
+                          round(temperature, 3) if temperature is not None else None, max_tokens])
+        return 'llm:' + hashlib.sha256(raw.encode()).hexdigest()
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def get(self, key: str) -> Optional[Dict]:
+        value = self.memory.get(key)
+        if value is not None:
+            self._count('memory_hits')
+            return value
+
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            print(f"Response cache read error: {e}")
+            self._count('errors')
+            value = None
+
+        if value is None:
+            self._count('misses')
+            return None
+
+        self._count('persistent_hits')
+        self.memory.set(key, value, self.ttl)
+        try:
+            self.backend.touch(key)
+        except Exception:
+            pass
+        return value
+
+    def peek(self, key: str) -> Optional[Dict]:
+        """Read the persistent tier without touching counters (used while waiting on other workers)"""
+        try:
+            return self.backend.get(key)
+        except Exception:
+            return None
+
+    def set(self, key: str, value: Dict, ttl: float = None):
+        ttl = ttl or self.ttl
+        self.memory.set(key, value, ttl)
+        try:
+            self.backend.set(key, value, ttl)
+            with self._lock:
+                self._stats['writes'] += 1
+                self._writes += 1
+                should_prune = self._writes % self.prune_every == 0
+            if should_prune:
+                self.backend.prune(self.max_entries)
+        except Exception as e:
+            print(f"Response cache write error: {e}")
+            self._count('errors')
+
+    def delete(self, key: str):
+        self.memory.delete(key)
+        try:
+            self.backend.delete(key)
+        except Exception as e:
+            print(f"Response cache delete error: {e}")
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for this process"""
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['memory_hits'] + stats['persistent_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['memory_hits'] + stats['persistent_hits']) / lookups, 3) if lookups else 0.0
+        stats['memory_entries'] = len(self.memory)
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Get the process-wide LLM response cache configured from the current app"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            config = current_app.config if has_app_context() else {}
+            backend = create_state_backend(config.get('LLM_CACHE_BACKEND', 'memory'),
+                                           sqlite_path=config.get('LLM_CACHE_SQLITE_PATH'),
+                                           redis_url=config.get('REDIS_URL'),
+                                           redis_prefix='zenith:cache:')
+            _cache = ResponseCache(backend,
+                                   memory_entries=config.get('LLM_CACHE_MEMORY_ENTRIES', 1024),
+                                   ttl=config.get('LLM_CACHE_TTL', 86400),
+                                   max_entries=config.get('LLM_CACHE_MAX_ENTRIES', 50000))
+        return _cache
@@ -0,0 +1,155 @@
+from typing import Callable, Dict, List
+from flask import current_app, has_app_context
+from app.models import db, Brand
+from app.services.brand_monitor import BrandMonitoringService
+from app.services.mention_scanner import get_mention_scanner
+
+
+class MonitoringRunPlanner:
+    """Monitor many brands at once, paying for each distinct prompt only once.
+
+    Generic prompts such as "Best CRM companies" are shared by every brand in an industry.
+    The planner schedules all brands' query sets, then works through the brands in chunks:
+    it executes each unique prompt of a chunk once per platform (skipping pairs every
+    interested brand has a fresh stored answer for, and prompts an earlier chunk already
+    asked), scores every response against all brands that asked for it, and commits the
+    chunk's results. Each fan-out stays small enough for its deadline, and a run that fails
+    part-way keeps the brands it already stored.
+    """
+
+    def __init__(self, monitor: BrandMonitoringService = None, chunk_brands: int = None):
+        self.monitor = monitor or BrandMonitoringService()
+        self.ai_service = self.monitor.ai_service
+        if chunk_brands is None:
+            chunk_brands = current_app.config.get('MONITOR_RUN_CHUNK_BRANDS', 20) if has_app_context() else 20
+        self.chunk_brands = max(1, chunk_brands)
+
+    def plan(self, brands: List[Brand]) -> Dict:
+        """Per-brand query allocations plus the deduplicated prompt list and who is interested in each"""
+        allocations = {}
+        interested = {}
+        for brand in brands:
+            allocation = self.monitor.schedule_queries(brand, self.monitor.generate_brand_queries(brand))
+            allocations[brand.id] = allocation
+            for query in allocation.queries:
+                interested.setdefault(query, []).append(brand.id)
+
+        return {
+            'allocations': allocations,
+            'unique_queries': list(interested),
+            'interested': interested,
+            'total_queries': sum(len(brand_ids) for brand_ids in interested.values())
+        }
+
+    def run(self, brand_ids: List[int] = None, progress: Callable[[int, int], None] = None,
+            on_stored: Callable[[Dict[int, Dict]], None] = None) -> Dict[int, Dict]:
+        """Monitor the given brands (default: all active ones); returns {brand_id: summary}.
+
+        on_stored is called with each chunk's summaries just before the chunk is committed, so
+        callers can record per-brand progress in the same transaction.
+        """
+        brands_query = Brand.query.filter_by(is_active=True)
+        if brand_ids:
+            brands_query = brands_query.filter(Brand.id.in_(brand_ids))
+        brands = {brand.id: brand for brand in brands_query.all()}
+        if not brands:
+            return {}
+
+        plan = self.plan(list(brands.values()))
+        print(f"Monitoring run: {len(brands)} brands, {plan['total_queries']} queries, "
+              f"{len(plan['unique_queries'])} unique")
+
+        # A (query, platform) pair is only asked again if some interested brand lacks a fresh answer
+        platforms = self.ai_service.platform_names()
+        fresh = {brand_id: self.monitor.freshness.fresh_results(self.ai_service, brands[brand_id], allocation.queries)
+                 for brand_id, allocation in plan['allocations'].items()}
+        needing = {}
+        for query, brand_ids in plan['interested'].items():
+            for platform in platforms:
+                brand_ids_needing = [brand_id for brand_id in brand_ids if (query, platform) not in fresh[brand_id]]
+                if brand_ids_needing:
+                    needing[(query, platform)] = brand_ids_needing
+        skip = {key for key in ((query, platform) for query in plan['interested'] for platform in platforms)
+                if key not in needing}
+
+        # Brand-neutral execution: the response is scored per brand below. Responses are kept
+        # across chunks, so a prompt shared with an earlier chunk is not asked again.
+        responses = {}
+        mentions = {}
+        summaries = {}
+        done = 0
+        total = len(needing)
+        brand_order = list(plan['allocations'])
+        for start in range(0, len(brand_order), self.chunk_brands):
+            chunk = brand_order[start:start + self.chunk_brands]
+            queries = list(dict.fromkeys(query for brand_id in chunk
+                                         for query in plan['allocations'][brand_id].queries))
+            chunk_skip = skip | {(query, platform) for query in queries for platform in platforms
+                                 if (query, platform) in responses}
+            new_results = []
+            for _, result in self.ai_service.iter_platform_results(queries, skip=chunk_skip):
+                responses[(result['query'], result['platform'])] = result
+                new_results.append(result)
+                done += 1
+                if progress:
+                    progress(done, total)
+
+            chunk_summaries = self._store_chunk(chunk, plan, brands, platforms, fresh, needing, responses,
+                                                mentions, new_results, on_stored)
+            summaries.update(chunk_summaries)
+
+        print(f"✅ Monitoring run stored for {len(summaries)} brands")
+        return summaries
+
+    def _store_chunk(self, chunk: List[int], plan: Dict, brands: Dict, platforms: List[str], fresh: Dict,
+                     needing: Dict, responses: Dict, mentions: Dict, new_results: List[Dict],
+                     on_stored: Callable[[Dict[int, Dict]], None] = None) -> Dict[int, Dict]:
+        """Settle, score and commit one chunk of brands; returns {brand_id: summary}"""
+        # Each brand pays its share of the prompts it asked for
+        scheduler = self.monitor.scheduler
+        scheduler.observe(new_results)
+        for brand_id in chunk:
+            allocation = plan['allocations'][brand_id]
+            scheduler.settle(allocation, sum(scheduler.result_cost(result) / len(needing[key])
+                                             for key, result in responses.items()
+                                             if key[0] in allocation.queries and key not in fresh[brand_id]))
+
+        summaries = {}
+        try:
+            for brand_id in chunk:
+                allocation = plan['allocations'][brand_id]
+                brand = brands[brand_id]
+                search_results = []
+                for query in allocation.queries:
+                    for platform in platforms:
+                        key = (query, platform)
+                        if key in fresh[brand_id]:
+                            search_results.append(fresh[brand_id][key])
+                        elif key in responses:
+                            if key not in mentions:
+                                mentions[key] = self._scan(responses[key], needing[key], brands)
+                            search_results.append(self._score_for_brand(responses[key], brand, mentions[key]))
+                summaries[brand_id] = self.monitor._store_results(brand, allocation.queries, search_results,
+                                                                  commit=False)
+            if on_stored:
+                on_stored(summaries)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Error saving monitoring run: {e}")
+            raise
+        return summaries
+
+    def _scan(self, result: Dict, interested_ids: List[int], brands: Dict) -> Dict:
+        """Find every interested brand in a response with one pass"""
+        if not result['success']:
+            return {}
+        return get_mention_scanner([brands[brand_id].name for brand_id in interested_ids]).find_all(result['response'])
+
+    def _score_for_brand(self, result: Dict, brand: Brand, mentions: Dict) -> Dict:
+        """Copy of a shared result with brand_analysis for one brand"""
+        scored = dict(result)
+        if result['success']:
+            scored['brand_analysis'] = self.ai_service.analyze_brand_mentions(result['response'], brand.name,
+                                                                              mentions=mentions.get(brand.name, []))
+        return scored
@@ -0,0 +1,117 @@
+import re
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import Iterable, List, Sequence, Tuple
+
+
+POSITIVE_WORDS = frozenset([
+    'excellent', 'best', 'great', 'outstanding', 'recommended', 'top', 'leading',
+    'innovative', 'reliable', 'trusted', 'popular', 'successful', 'effective',
+    'quality', 'superior', 'amazing', 'fantastic', 'impressive', 'strong',
+    'premier', 'prestigious', 'renowned', 'established', 'accredited'
+])
+
+NEGATIVE_WORDS = frozenset([
+    'poor', 'bad', 'worst', 'terrible', 'avoid', 'problematic', 'failed',
+    'disappointing', 'unreliable', 'weak', 'inferior', 'lacking', 'struggling'
+])
+
+NEGATIONS = frozenset([
+    'not', 'no', 'never', 'none', 'nothing', 'neither', 'nor', 'without',
+    'hardly', 'barely', 'cannot', 'cant', 'isnt', 'arent', 'wasnt', 'dont', 'doesnt', 'didnt', 'wont'
+])
+
+# Tokens that end a negation's scope
+CLAUSE_BREAKS = frozenset(['.', '!', '?', ';', ':', 'but', 'however', 'although'])
+
+# Words (with an optional apostrophe suffix such as "isn't") and clause punctuation
+TOKEN_PATTERN = re.compile(r"[^\W_]+(?:['’][^\W_]+)?|[.!?;:]")
+
+
+class SentimentAnalyzer:
+    """Lexicon-based sentiment scoring over tokens instead of substrings.
+
+    Each text is tokenized once; lexicon lookups are set lookups, so "top" no longer
+    matches "stop". A negation ("not", "isn't", "never", ...) flips the polarity of the
+    next few words until the clause ends.
+    """
+
+    def __init__(self, positive: Iterable[str] = POSITIVE_WORDS, negative: Iterable[str] = NEGATIVE_WORDS,
+                 negations: Iterable[str] = NEGATIONS, negation_window: int = 3, max_per_context: int = 5):
+        self.lexicon = {word: 1 for word in positive}
+        self.lexicon.update({word: -1 for word in negative})
+        self.negations = frozenset(negations)
+        self.negation_window = negation_window
+        self.max_per_context = max_per_context  # Net score that maps to +/-1 for a single context
+
+    def polar_tokens(self, text: str) -> List[Tuple[int, int, int]]:
+        """(start, end, polarity) for each sentiment-bearing token, with negation applied"""
+        polar = []
+        negate_left = 0
+        for match in TOKEN_PATTERN.finditer(text or ''):
+            token = match.group().lower().replace('’', "'")
+            if token in CLAUSE_BREAKS:
+                negate_left = 0
+                continue
+            if token in self.negations or token.endswith("n't"):
+                negate_left = self.negation_window
+                continue
+
+            polarity = self.lexicon.get(token, 0)
+            if polarity:
+                polar.append((match.start(), match.end(), -polarity if negate_left else polarity))
+            if negate_left:
+                negate_left -= 1
+        return polar
+
+    def net_score(self, text: str) -> int:
+        """Positive minus negative token count for one piece of text"""
+        return sum(polarity for _, _, polarity in self.polar_tokens(text))
+
+    def normalize(self, total: float, contexts: int) -> float:
+        """Scale a summed net score to -1..1"""
+        if not contexts:
+            return 0.0
+        return max(-1.0, min(1.0, total / (contexts * self.max_per_context)))
+
+    def score_contexts(self, contexts: Sequence[str]) -> float:
+        """Average sentiment of a set of contexts, -1 to 1"""
+        return self.normalize(sum(self.net_score(context) for context in contexts), len(contexts))
+
+    def score_windows(self, text: str, windows: Sequence[Tuple[int, int]]) -> float:
+        """Score (start, end) windows of one text, tokenizing the text only once.
+
+        Used for the windows around brand mentions, which usually overlap.
+        """
+        windows = list(dict.fromkeys(windows))
+        if not windows:
+            return 0.0
+
+        polar = self.polar_tokens(text)
+        starts = [start for start, _, _ in polar]
+        ends = [end for _, end, _ in polar]
+        prefix = [0] + list(accumulate(polarity for _, _, polarity in polar))
+
+        total = 0
+        for window_start, window_end in windows:
+            first = bisect_left(starts, window_start)
+            last = bisect_right(ends, window_end)
+            if last > first:
+                total += prefix[last] - prefix[first]
+        return self.normalize(total, len(windows))
+
+    def score_many(self, context_sets: Sequence[Sequence[str]]) -> List[float]:
+        """Score many responses' context lists in one call"""
+        return [self.normalize(sum(self.net_score(context) for context in contexts), len(contexts))
+                for contexts in context_sets]
+
+
+_analyzer = None
+
+
+def get_sentiment_analyzer() -> SentimentAnalyzer:
+    """Get the shared analyzer with the default lexicon"""
+    global _analyzer
+    if _analyzer is None:
+        _analyzer = SentimentAnalyzer()
+    return _analyzer
@@ -0,0 +1,222 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Optional, Tuple
+from flask import current_app, has_app_context
+
+
+class MemoryStateBackend:
+    """Process-local state store, used in development and tests"""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.RLock()
+
+    def _live(self, key: str) -> Optional[Tuple[Any, Optional[float]]]:
+        entry = self._data.get(key)
+        if entry and entry[1] is not None and entry[1] <= time.time():
+            del self._data[key]
+            return None
+        return entry
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._live(key)
+            return entry[0] if entry else None
+
+    def set(self, key: str, value: Any, ttl: float = None):
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl if ttl else None)
+
+    def add(self, key: str, value: Any, ttl: float = None) -> bool:
+        """Set key only if it is absent; returns True when the key was set"""
+        with self._lock:
+            if self._live(key):
+                return False
+            self._data[key] = (value, time.time() + ttl if ttl else None)
+            return True
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def update(self, key: str, func: Callable[[Any], Tuple[Any, Any]], ttl: float = None) -> Any:
+        """Atomically replace a value with func(old) -> (new, result) and return result"""
+        with self._lock:
+            entry = self._live(key)
+            new_value, result = func(entry[0] if entry else None)
+            self._data[key] = (new_value, time.time() + ttl if ttl else None)
+            return result
+
+    def touch(self, key: str):
+        """Mark a key as recently used"""
+        with self._lock:
+            if key in self._data:
+                self._data[key] = self._data.pop(key)
+
+    def prune(self, max_entries: int):
+        """Drop expired keys, then the least recently used ones beyond max_entries"""
+        with self._lock:
+            for key in list(self._data):
+                self._live(key)
+            for key in list(self._data)[:max(0, len(self._data) - max_entries)]:
+                del self._data[key]
+
+
+class SQLiteStateBackend:
+    """State store in a local SQLite file, shared by all workers on one host"""
+
+    def __init__(self, path: str, timeout: float = 30.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS shared_state (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    expires_at REAL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _read(self, conn: sqlite3.Connection, key: str) -> Any:
+        row = conn.execute('SELECT value, expires_at FROM shared_state WHERE key = ?', (key,)).fetchone()
+        if not row or (row[1] is not None and row[1] <= time.time()):
+            return None
+        return json.loads(row[0])
+
+    def _write(self, conn: sqlite3.Connection, key: str, value: Any, ttl: float = None):
+        now = time.time()
+        conn.execute('INSERT OR REPLACE INTO shared_state (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)',
+                     (key, json.dumps(value), now + ttl if ttl else None, now))
+
+    def get(self, key: str) -> Any:
+        return self._read(self._conn(), key)
+
+    def set(self, key: str, value: Any, ttl: float = None):
+        self._write(self._conn(), key, value, ttl)
+
+    def add(self, key: str, value: Any, ttl: float = None) -> bool:
+        """Set key only if it is absent; returns True when the key was set"""
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if self._read(conn, key) is not None:
+                return False
+            self._write(conn, key, value, ttl)
+            return True
+        finally:
+            conn.execute('COMMIT')
+
+    def delete(self, key: str):
+        self._conn().execute('DELETE FROM shared_state WHERE key = ?', (key,))
+
+    def update(self, key: str, func: Callable[[Any], Tuple[Any, Any]], ttl: float = None) -> Any:
+        """Atomically replace a value with func(old) -> (new, result) and return result"""
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            new_value, result = func(self._read(conn, key))
+            self._write(conn, key, new_value, ttl)
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+        return result
+
+    def touch(self, key: str):
+        """Mark a key as recently used"""
+        self._conn().execute('UPDATE shared_state SET accessed_at = ? WHERE key = ?', (time.time(), key))
+
+    def prune(self, max_entries: int):
+        """Drop expired keys, then the least recently used ones beyond max_entries"""
+        conn = self._conn()
+        conn.execute('DELETE FROM shared_state WHERE expires_at IS NOT NULL AND expires_at <= ?', (time.time(),))
+        conn.execute("""
+            DELETE FROM shared_state WHERE key IN (
+                SELECT key FROM shared_state ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+            )
+        """, (max_entries,))
+
+
+class RedisStateBackend:
+    """State store in Redis, shared by all workers on all hosts"""
+
+    def __init__(self, url: str, prefix: str = 'zenith:'):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def _key(self, key: str) -> str:
+        return self.prefix + key
+
+    def get(self, key: str) -> Any:
+        raw = self.client.get(self._key(key))
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any, ttl: float = None):
+        self.client.set(self._key(key), json.dumps(value), px=int(ttl * 1000) if ttl else None)
+
+    def add(self, key: str, value: Any, ttl: float = None) -> bool:
+        """Set key only if it is absent; returns True when the key was set"""
+        return bool(self.client.set(self._key(key), json.dumps(value), px=int(ttl * 1000) if ttl else None, nx=True))
+
+    def delete(self, key: str):
+        self.client.delete(self._key(key))
+
+    def update(self, key: str, func: Callable[[Any], Tuple[Any, Any]], ttl: float = None) -> Any:
+        """Atomically replace a value with func(old) -> (new, result) and return result"""
+        redis_key = self._key(key)
+        holder = {}
+
+        def transaction(pipe):
+            raw = pipe.get(redis_key)
+            new_value, holder['result'] = func(json.loads(raw) if raw is not None else None)
+            pipe.multi()
+            pipe.set(redis_key, json.dumps(new_value), px=int(ttl * 1000) if ttl else None)
+
+        self.client.transaction(transaction, redis_key)
+        return holder['result']
+
+    def touch(self, key: str):
+        """Redis tracks recency itself (maxmemory-policy allkeys-lru)"""
+
+    def prune(self, max_entries: int):
+        """Redis evicts by TTL and maxmemory policy; nothing to do here"""
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def create_state_backend(kind: str, sqlite_path: str = None, redis_url: str = None, redis_prefix: str = 'zenith:'):
+    """Create a state backend by name: memory, sqlite or redis"""
+    if kind == 'redis':
+        return RedisStateBackend(redis_url, prefix=redis_prefix)
+    if kind == 'sqlite':
+        return SQLiteStateBackend(sqlite_path)
+    return MemoryStateBackend()
+
+
+def get_state_backend():
+    """Get the process-wide shared state backend configured from the current app"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            config = current_app.config if has_app_context() else {}
+            _backend = create_state_backend(config.get('STATE_BACKEND', 'memory'),
+                                            sqlite_path=config.get('STATE_SQLITE_PATH'),
+                                            redis_url=config.get('REDIS_URL'))
+        return _backend
@@ -0,0 +1,151 @@
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+from flask import current_app, has_app_context
+
+
+class _InFlightCall:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.abandoned = False
+
+
+class SingleFlight:
+    """Coalesce concurrent identical calls so only one of them reaches the provider.
+
+    Threads in one process share the leader's result directly. When a shared
+    backend is given, workers in other processes wait on a lock key in that
+    backend and pick the leader's result up from the shared cache.
+    """
+
+    def __init__(self, backend=None, lock_ttl: float = 120.0, wait_timeout: float = 90.0,
+                 poll_interval: float = 0.2):
+        self.backend = backend
+        self.lock_ttl = lock_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._stats = {'leader_calls': 0, 'coalesced_local': 0, 'coalesced_remote': 0, 'lock_timeouts': 0}
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _claim(self, key: str) -> Tuple[_InFlightCall, bool]:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _InFlightCall()
+        return call, leader
+
+    def lead(self, key: str) -> Optional[_InFlightCall]:
+        """Claim key for a caller that produces the result itself, e.g. while streaming it.
+
+        Returns None if another caller holds the key already (wait for it with do()). Otherwise
+        set result or error on the returned call and hand it to settle() when done; callers
+        waiting in do() meanwhile get that outcome.
+        """
+        call, leader = self._claim(key)
+        if not leader:
+            return None
+        self._count('leader_calls')
+        return call
+
+    def settle(self, key: str, call: _InFlightCall):
+        """Release a key claimed with lead(), waking the callers waiting on it"""
+        call.abandoned = call.result is None and call.error is None
+        with self._lock:
+            self._calls.pop(key, None)
+        call.event.set()
+
+    def do(self, key: str, func: Callable[[], Any],
+           shared_lookup: Callable[[], Optional[Any]] = None) -> Tuple[Any, bool]:
+        """Run func once per key across concurrent callers; returns (result, coalesced)"""
+        while True:
+            call, leader = self._claim(key)
+            if leader:
+                break
+            call.event.wait()
+            if call.abandoned:
+                # A lead() caller gave up without an outcome (e.g. its client went away); try again
+                continue
+            self._count('coalesced_local')
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        coalesced = False
+        try:
+            if self.backend is not None and shared_lookup is not None:
+                call.result, coalesced = self._do_shared(key, func, shared_lookup)
+            else:
+                self._count('leader_calls')
+                call.result = func()
+            return call.result, coalesced
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    def _do_shared(self, key: str, func: Callable[[], Any],
+                   shared_lookup: Callable[[], Optional[Any]]) -> Tuple[Any, bool]:
+        lock_key = f'inflight:{key}'
+        deadline = time.monotonic() + self.wait_timeout
+
+        while time.monotonic() < deadline:
+            if self.backend.add(lock_key, os.getpid(), ttl=self.lock_ttl):
+                try:
+                    # Another worker may have finished between our cache miss and taking the lock
+                    result = shared_lookup()
+                    if result is not None:
+                        self._count('coalesced_remote')
+                        return result, True
+                    self._count('leader_calls')
+                    return func(), False
+                finally:
+                    self.backend.delete(lock_key)
+
+            # Someone else holds the lock: wait for their result to land in the shared cache
+            while time.monotonic() < deadline and self.backend.get(lock_key) is not None:
+                time.sleep(self.poll_interval)
+            result = shared_lookup()
+            if result is not None:
+                self._count('coalesced_remote')
+                return result, True
+            # The holder released without a result (it failed); compete for the lock again
+
+        self._count('lock_timeouts')
+        self._count('leader_calls')
+        return func(), False
+
+    def stats(self) -> Dict:
+        """Coalescing counters for this process"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_flight'] = len(self._calls)
+        return stats
+
+
+_single_flight = None
+_single_flight_lock = threading.Lock()
+
+
+def get_single_flight(backend=None) -> SingleFlight:
+    """Get the process-wide single-flight group configured from the current app"""
+    global _single_flight
+    with _single_flight_lock:
+        if _single_flight is None:
+            config = current_app.config if has_app_context() else {}
+            cross_process = config.get('SINGLE_FLIGHT_CROSS_PROCESS', True)
+            _single_flight = SingleFlight(backend=backend if cross_process else None,
+                                          lock_ttl=config.get('SINGLE_FLIGHT_LOCK_TTL', 120.0),
+                                          wait_timeout=config.get('SINGLE_FLIGHT_WAIT_TIMEOUT', 90.0))
+        return _single_flight
@@ -0,0 +1,133 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+
+class UrlCache:
+    """Extracted page text by URL in a local SQLite file, with the validators to revalidate it.
+
+    An entry is served as-is for its domain's TTL. After that the page fetcher sends a
+    conditional GET with the stored ETag/Last-Modified: a 304 renews the entry without
+    downloading or parsing the page, anything else replaces it. The stored text is kept under
+    max_bytes by evicting the least recently used entries.
+    """
+
+    def __init__(self, path: str, default_ttl: float = 6 * 3600, domain_ttls: Dict[str, float] = None,
+                 max_bytes: int = 256 * 1024 * 1024, prune_every: int = 200, timeout: float = 30.0):
+        self.path = path
+        self.default_ttl = default_ttl
+        self.domain_ttls = domain_ttls or {}
+        self.max_bytes = max_bytes
+        self.prune_every = prune_every
+        self.timeout = timeout
+        self._local = threading.local()
+        self._writes = 0
+        self._stats = {'fresh_hits': 0, 'stale_hits': 0, 'misses': 0, 'revalidated': 0, 'stores': 0, 'errors': 0}
+        self._lock = threading.Lock()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS url_cache (
+                    url TEXT PRIMARY KEY,
+                    text TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    size INTEGER NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    fresh_until REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_url_cache_accessed_at ON url_cache (accessed_at)')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def ttl_for(self, url: str) -> float:
+        """Freshness lifetime for a URL: the TTL of the most specific configured domain suffix"""
+        labels = (urlsplit(url).hostname or '').split('.')
+        for start in range(len(labels)):
+            ttl = self.domain_ttls.get('.'.join(labels[start:]))
+            if ttl is not None:
+                return ttl
+        return self.default_ttl
+
+    def get(self, url: str) -> Optional[Dict]:
+        """The cached entry for url, fresh or stale, or None"""
+        try:
+            conn = self._conn()
+            row = conn.execute('SELECT text, etag, last_modified, fetched_at, fresh_until FROM url_cache '
+                               'WHERE url = ?', (url,)).fetchone()
+            if row:
+                conn.execute('UPDATE url_cache SET accessed_at = ? WHERE url = ?', (time.time(), url))
+        except Exception as e:
+            print(f"URL cache read error: {e}")
+            self._count('errors')
+            return None
+
+        if not row:
+            self._count('misses')
+            return None
+        fresh = row[4] > time.time()
+        self._count('fresh_hits' if fresh else 'stale_hits')
+        return {'text': row[0], 'etag': row[1], 'last_modified': row[2], 'fetched_at': row[3], 'fresh': fresh}
+
+    def put(self, url: str, text: str, etag: str = None, last_modified: str = None):
+        """Store a page's extracted text and validators, fresh for its domain's TTL"""
+        now = time.time()
+        try:
+            self._conn().execute(
+                'INSERT OR REPLACE INTO url_cache (url, text, etag, last_modified, size, fetched_at, fresh_until, '
+                'accessed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (url, text, etag, last_modified, len(text.encode('utf-8')), now, now + self.ttl_for(url), now))
+            with self._lock:
+                self._stats['stores'] += 1
+                self._writes += 1
+                should_prune = self._writes % self.prune_every == 0
+            if should_prune:
+                self.prune()
+        except Exception as e:
+            print(f"URL cache write error: {e}")
+            self._count('errors')
+
+    def renew(self, url: str):
+        """The page is unchanged (HTTP 304): start a new freshness lifetime for its entry"""
+        now = time.time()
+        try:
+            self._conn().execute('UPDATE url_cache SET fetched_at = ?, fresh_until = ?, accessed_at = ? WHERE url = ?',
+                                 (now, now + self.ttl_for(url), now, url))
+            self._count('revalidated')
+        except Exception as e:
+            print(f"URL cache write error: {e}")
+            self._count('errors')
+
+    def prune(self):
+        """Evict the least recently used entries until the stored text fits in max_bytes"""
+        self._conn().execute("""
+            DELETE FROM url_cache WHERE url IN (
+                SELECT url FROM (
+                    SELECT url, SUM(size) OVER (ORDER BY accessed_at DESC, url) AS running_size FROM url_cache
+                ) WHERE running_size > ?
+            )
+        """, (self.max_bytes,))
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for this process"""
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['fresh_hits'] + stats['stale_hits'] + stats['misses']
+        # Fresh hits and 304s both skipped downloading and parsing the page
+        saved = stats['fresh_hits'] + stats['revalidated']
+        stats['hit_rate'] = round(saved / lookups, 3) if lookups else 0.0
+        return stats
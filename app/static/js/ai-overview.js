@@ -111,31 +111,84 @@ class AIOverview {
             this.showLoading();
             this.hideError();
 
-            const response = await fetch('/ai-overview/api/generate-overview', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({ query })
+            // Sources appear once the pages are read, then the summary as the model writes it
+            let streamError = null;
+            await this.streamEvents('/ai-overview/api/generate-overview/stream?format=ndjson', { query }, (event, data) => {
+                if (event === 'sources') {
+                    this.loadingState.classList.add('hidden');
+                    this.startOverview(data.query, data.sources_used);
+                } else if (event === 'token') {
+                    this.appendOverviewText(data.text);
+                } else if (event === 'overview') {
+                    this.displayOverview(data, false);
+                } else if (event === 'error') {
+                    streamError = data.error;
+                }
             });
 
-            const data = await response.json();
-
-            if (data.success) {
-                this.displayOverview(data.data);
-            } else {
-                this.showError(data.error || 'Failed to generate overview');
+            if (streamError) {
+                this.showError(streamError);
             }
 
         } catch (error) {
             console.error('Error generating overview:', error);
-            this.showError('Network error. Please try again.');
+            this.showError(error.message || 'Network error. Please try again.');
         } finally {
             this.hideLoading();
         }
     }
 
-    displayOverview(overviewData) {
+    async streamEvents(url, body, onEvent) {
+        // POST body and read the NDJSON event stream, calling onEvent(event, data) for each line as it arrives
+        const response = await fetch(url, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify(body)
+        });
+
+        if (!response.ok) {
+            const data = await response.json().catch(() => ({}));
+            throw new Error(data.error || `Request failed (${response.status})`);
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+
+            buffer += decoder.decode(value, { stream: true });
+            const lines = buffer.split('\n');
+            buffer = lines.pop();
+
+            for (const line of lines) {
+                if (line.trim()) {
+                    const message = JSON.parse(line);
+                    onEvent(message.event, message.data);
+                }
+            }
+        }
+    }
+
+    startOverview(query, sources) {
+        // Show the query and sources right away; the summary text is filled in as tokens arrive
+        this.displayOverview({ query, overview_text: '', sources_used: sources });
+        this.overviewText = document.getElementById('overviewText');
+        document.getElementById('overviewMeta').textContent =
+            `Writing overview... • ${sources ? sources.length : 0} sources`;
+    }
+
+    appendOverviewText(text) {
+        if (this.overviewText) {
+            this.overviewText.textContent += text;
+        }
+    }
+
+    displayOverview(overviewData, scroll = true) {
         // Clone template
         const template = this.overviewTemplate.content.cloneNode(true);
 
@@ -166,7 +219,9 @@ class AIOverview {
         this.overviewResult.classList.remove('hidden');
 
         // Scroll to result
-        this.overviewResult.scrollIntoView({ behavior: 'smooth' });
+        if (scroll) {
+            this.overviewResult.scrollIntoView({ behavior: 'smooth' });
+        }
     }
 
     createSourceElement(source) {
@@ -0,0 +1,27 @@
+from celery import shared_task
+from app.models import db
+from app.services.job_queue import get_job_queue, run_job, run_planned_jobs
+
+
+@shared_task(name='zenith.run_background_job', ignore_result=True)
+def run_background_job(job_id: int) -> str:
+    try:
+        return run_job(job_id)
+    finally:
+        db.session.remove()
+
+
+@shared_task(name='zenith.run_monitoring_run', ignore_result=True)
+def run_monitoring_run(job_ids) -> str:
+    try:
+        return run_planned_jobs(job_ids)
+    finally:
+        db.session.remove()
+
+
+@shared_task(name='zenith.dispatch_monitoring_schedules', ignore_result=True)
+def dispatch_monitoring_schedules() -> int:
+    try:
+        return len(get_job_queue().dispatch_due_schedules())
+    finally:
+        db.session.remove()
@@ -1,37 +1,33 @@
-import re
-from bs4 import BeautifulSoup
+import json
+from flask import Response, stream_with_context
+from app.utils.html_extractor import extract_main_text, html_to_text, normalize_text
 
 def clean_text(text):
     """Clean and normalize text content"""
     if not text:
         return ""
     
-    # Remove HTML tags
-    text = BeautifulSoup(text, 'html.parser').get_text()
+    # Remove HTML tags (plain text skips the parser)
+    if '<' in text:
+        text = html_to_text(text)
     
-    # Remove extra whitespace
-    text = re.sub(r'\s+', ' ', text)
-    
-    # Remove special characters but keep basic punctuation
-    text = re.sub(r'[^\w\s.,!?;:\-\'"()]', ' ', text)
-    
-    # Remove extra spaces
-    text = ' '.join(text.split())
-    
-    return text.strip()
+    # Collapse whitespace and drop special characters, keeping basic punctuation
+    return normalize_text(text)
 
 def extract_main_content(html_content):
     """Extract main content from HTML"""
-    soup = BeautifulSoup(html_content, 'html.parser')
-    
-    # Remove script and style elements
-    for script in soup(["script", "style", "nav", "header", "footer", "aside"]):
-        script.decompose()
-    
-    # Find main content areas
-    main_content = soup.find('main') or soup.find('article') or soup.find('div', class_='content')
-    
-    if main_content:
-        return main_content.get_text()
-    
-    return soup.get_text()
\ No newline at end of file
+    return extract_main_text(html_content) or ''
+
+def stream_event(event, data, fmt='sse'):
+    """Serialize one streaming event as a server-sent event frame or an NDJSON line"""
+    if fmt == 'ndjson':
+        return json.dumps({'event': event, 'data': data}, default=str) + '\n'
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def stream_response(events, fmt='sse'):
+    """Wrap a generator of stream_event() frames in an unbuffered streaming response"""
+    mimetype = 'application/x-ndjson' if fmt == 'ndjson' else 'text/event-stream'
+    return Response(stream_with_context(events), mimetype=mimetype, headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
@@ -0,0 +1,157 @@
+import re
+import threading
+from typing import List, Optional, Union
+from lxml import etree
+
+# Elements whose contents are never page content
+BOILERPLATE_TAGS = frozenset(['script', 'style', 'noscript', 'template', 'svg', 'iframe', 'nav', 'header',
+                              'footer', 'aside', 'form', 'button', 'select', 'textarea'])
+# Prose elements; each one credits its parent and grandparent with a content score
+PARAGRAPH_TAGS = frozenset(['p', 'pre', 'blockquote', 'td'])
+# Containers that can be picked as the page's main content
+CANDIDATE_TAGS = frozenset(['main', 'article', 'section', 'div', 'td', 'body'])
+# Structural containers never dropped for their class or id
+KEEP_TAGS = frozenset(['html', 'body', 'main', 'article'])
+
+POSITIVE_HINTS = re.compile(r'article|body|content|entry|main|page|post|text|blog|story', re.I)
+NEGATIVE_HINTS = re.compile(r'comment|footer|sidebar|widget|share|social|related|promo|advert|sponsor|banner|'
+                            r'cookie|popup|menu|navbar|breadcrumb|subscribe|newsletter', re.I)
+
+# Whitespace and symbols collapse to one space; word characters and basic punctuation are kept
+NON_TEXT = re.compile(r'''[^\w.,!?;:\-'"()]+''')
+
+MIN_PARAGRAPH_CHARS = 25
+
+_parsers = threading.local()
+
+
+def _parser() -> etree.HTMLParser:
+    """This thread's HTML parser (lxml parsers must not be shared between threads)"""
+    parser = getattr(_parsers, 'parser', None)
+    if parser is None:
+        parser = _parsers.parser = etree.HTMLParser(remove_comments=True, remove_pis=True, no_network=True)
+    return parser
+
+
+def parse_html(html: Union[str, bytes]):
+    """Parse an HTML document with libxml2, returning its root element or None when empty"""
+    if isinstance(html, bytes):
+        try:
+            html = html.decode('utf-8')
+        except UnicodeDecodeError:
+            pass  # Let libxml2 pick the charset from the page's meta tags
+    if not html or not html.strip():
+        return None
+    try:
+        return etree.fromstring(html, _parser())
+    except ValueError:
+        # Unicode input with an XML encoding declaration has to be parsed as bytes
+        return etree.fromstring(html.encode('utf-8'), _parser())
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace and drop symbols in one pass"""
+    return NON_TEXT.sub(' ', text).strip() if text else ''
+
+
+class _Block:
+    __slots__ = ('tag', 'start', 'weight', 'score', 'skipped')
+
+    def __init__(self, tag, start, weight=0, skipped=False):
+        self.tag = tag
+        self.start = start  # Index of the block's first text piece
+        self.weight = weight
+        self.score = 0.0
+        self.skipped = skipped
+
+
+def _class_weight(element) -> int:
+    hints = f"{element.get('class', '')} {element.get('id', '')}"
+    if not hints.strip():
+        return 0
+    return (25 if POSITIVE_HINTS.search(hints) else 0) - (25 if NEGATIVE_HINTS.search(hints) else 0)
+
+
+def _walk(root):
+    """One pass over the tree: collect text pieces outside boilerplate and score candidate blocks.
+
+    Returns (pieces, best) where best is the (start, end) slice of pieces for the highest
+    scoring block, or None when no block held any prose.
+    """
+    pieces: List[str] = []
+    # Running totals after each piece, so a block's sizes are two lookups
+    lengths = [0]
+    link_lengths = [0]
+    commas = [0]
+    stack: List[_Block] = []
+    in_link = 0
+    best = None
+    best_score = 0.0
+
+    def add(text):
+        if text:
+            text = text.strip()
+            if text:
+                pieces.append(text)
+                lengths.append(lengths[-1] + len(text))
+                link_lengths.append(link_lengths[-1] + (len(text) if in_link else 0))
+                commas.append(commas[-1] + text.count(','))
+
+    walker = etree.iterwalk(root, events=('start', 'end'))
+    for event, element in walker:
+        tag = element.tag if isinstance(element.tag, str) else ''
+        if event == 'start':
+            weight = _class_weight(element)
+            if tag in BOILERPLATE_TAGS or (weight < 0 and tag not in KEEP_TAGS):
+                walker.skip_subtree()
+                stack.append(_Block(tag, len(pieces), skipped=True))
+                continue
+            stack.append(_Block(tag, len(pieces), weight))
+            if tag == 'a':
+                in_link += 1
+            add(element.text)
+            continue
+
+        block = stack.pop()
+        if not block.skipped:
+            if tag == 'a':
+                in_link -= 1
+            end = len(pieces)
+            text_length = lengths[end] - lengths[block.start]
+            if text_length >= MIN_PARAGRAPH_CHARS and (tag in PARAGRAPH_TAGS or (
+                    tag == 'div' and not block.score)):
+                # A paragraph, or a div of bare text, scores for the blocks around it
+                score = 1 + (commas[end] - commas[block.start]) + min(text_length // 100, 3)
+                if stack:
+                    stack[-1].score += score
+                if len(stack) > 1:
+                    stack[-2].score += score / 2
+            elif tag in CANDIDATE_TAGS and block.score and text_length:
+                link_density = (link_lengths[end] - link_lengths[block.start]) / text_length
+                score = (block.score + block.weight) * (1 - link_density)
+                if score > best_score:
+                    best, best_score = (block.start, end), score
+        add(element.tail)
+
+    return pieces, best
+
+
+def extract_main_text(html: Union[str, bytes], max_length: int = None) -> Optional[str]:
+    """Normalized text of a page's main content block, or of the whole page when none stands out"""
+    root = parse_html(html)
+    if root is None:
+        return None
+    pieces, best = _walk(root)
+    if best:
+        pieces = pieces[best[0]:best[1]]
+    text = normalize_text(' '.join(pieces))
+    if max_length and len(text) > max_length:
+        text = text[:max_length]
+    return text or None
+
+
+def html_to_text(html: Union[str, bytes]) -> str:
+    """All text of an HTML fragment, tags removed"""
+    root = parse_html(html)
+    # Joined without separators like BeautifulSoup's get_text(): a word split by inline markup stays whole
+    return ''.join(root.itertext()) if root is not None else ''
@@ -0,0 +1,5 @@
+"""Offline benchmarks for the AI search, monitoring, competitor and overview hot paths.
+
+Run with ``python -m benchmarks.run --help``. Providers are replaced by the fakes in
+tests/fake_providers.py, so no API keys or network access are needed.
+"""
@@ -0,0 +1,93 @@
+import random
+from typing import Callable, Dict, List
+from app.models import db, User, Brand, BrandQuery
+
+
+INDUSTRIES = ['CRM', 'project management', 'email marketing', 'analytics', 'e-commerce', 'online education']
+NAME_PREFIXES = ['Nova', 'Blue', 'Pixel', 'Bright', 'Swift', 'Cloud', 'Iron', 'Lumen', 'Orbit', 'Zen']
+NAME_SUFFIXES = ['ly', 'Hub', 'Stack', 'Works', 'Labs', 'Flow', 'Base', 'Desk', 'Point', 'Forge']
+KEYWORDS = ['automation', 'integrations', 'reporting', 'pricing', 'security', 'mobile app', 'API', 'support']
+SENTIMENT_PHRASES = [
+    'is widely recommended', 'is a leading option', 'is reliable and trusted', 'offers excellent support',
+    'is not the best fit for small teams', 'has poor documentation', 'is struggling with outages',
+    'is a popular choice', 'is an established player', 'has a disappointing mobile app'
+]
+
+
+def generate_dataset(seed: int = 42, users: int = 2, brands_per_user: int = 3, competitors_per_brand: int = 3,
+                     queries_per_brand: int = 3) -> Dict:
+    """Build a deterministic set of users, brands, competitors and tracked queries (plain data)"""
+    rng = random.Random(seed)
+    names = [prefix + suffix for prefix in NAME_PREFIXES for suffix in NAME_SUFFIXES]
+    rng.shuffle(names)
+
+    dataset = {'seed': seed, 'users': []}
+    for user_index in range(users):
+        brands = []
+        for _ in range(brands_per_user):
+            name = names.pop()
+            industry = rng.choice(INDUSTRIES)
+            keywords = rng.sample(KEYWORDS, 3)
+            brands.append({
+                'name': name,
+                'industry': industry,
+                'keywords': keywords,
+                'competitors': rng.sample(names, competitors_per_brand),
+                'queries': [f"Best {keyword} for {industry} teams" for keyword in keywords][:queries_per_brand]
+            })
+        dataset['users'].append({'username': f'bench_user_{user_index}', 'brands': brands})
+
+    dataset['overview_queries'] = [f"How do {industry} platforms handle {keyword}?"
+                                   for industry in INDUSTRIES for keyword in KEYWORDS]
+    rng.shuffle(dataset['overview_queries'])
+    return dataset
+
+
+def seed_database(dataset: Dict) -> Dict[str, List[int]]:
+    """Insert a generated dataset; returns the created user and brand ids"""
+    ids = {'users': [], 'brands': []}
+    for user_data in dataset['users']:
+        user = User(email=f"{user_data['username']}@example.com", username=user_data['username'],
+                    first_name='Bench', last_name='User')
+        user.set_password('benchmark')
+        db.session.add(user)
+        db.session.flush()
+        ids['users'].append(user.id)
+
+        for brand_data in user_data['brands']:
+            brand = Brand(name=brand_data['name'], industry=brand_data['industry'], keywords=brand_data['keywords'],
+                          competitors=brand_data['competitors'], user_id=user.id,
+                          domain=f"{brand_data['name'].lower()}.example.com")
+            db.session.add(brand)
+            db.session.flush()
+            ids['brands'].append(brand.id)
+            for priority, query in enumerate(brand_data['queries'], 1):
+                db.session.add(BrandQuery(brand_id=brand.id, query_text=query, query_type='commercial',
+                                          priority=priority))
+
+    db.session.commit()
+    return ids
+
+
+def make_responder(dataset: Dict, paragraphs: int = 4) -> Callable[[str], str]:
+    """Responder for the fake LLM clients that mentions dataset brands with mixed sentiment.
+
+    Output depends only on the prompt and seed, so runs are repeatable.
+    """
+    brand_names = sorted({brand['name'] for user in dataset['users'] for brand in user['brands']} |
+                         {name for user in dataset['users'] for brand in user['brands']
+                          for name in brand['competitors']})
+
+    def responder(prompt: str) -> str:
+        rng = random.Random(f"{dataset['seed']}:{prompt}")
+        # Brands named in the prompt are usually, but not always, mentioned back
+        named = [name for name in brand_names if name.lower() in prompt.lower() and rng.random() < 0.8]
+        others = rng.sample(brand_names, min(len(brand_names), 4))
+        lines = []
+        for index in range(paragraphs):
+            subject = (named + others)[index % len(named + others)]
+            lines.append(f"{subject} {rng.choice(SENTIMENT_PHRASES)}. It focuses on {rng.choice(KEYWORDS)} "
+                         f"and {rng.choice(KEYWORDS)}, and customers compare it with {rng.choice(others)}.")
+        return ' '.join(lines)
+
+    return responder
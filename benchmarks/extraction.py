@@ -0,0 +1,118 @@
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from bs4 import BeautifulSoup
+from app.utils.html_extractor import extract_main_text
+
+WORDS = ('pricing features reliability support integrations teams reporting security platform customers '
+         'dashboard workflow automation analytics onboarding migration performance uptime billing').split()
+
+
+def legacy_extract(html, max_length: int = 2000):
+    """The BeautifulSoup path AIOverviewService used before the lxml engine, kept for comparison"""
+    soup = BeautifulSoup(html, 'html.parser')
+    for element in soup(['script', 'style', 'nav', 'header', 'footer', 'aside', 'form']):
+        element.decompose()
+
+    main_content = None
+    for selector in ['main', 'article', '.content', '.main-content', '.post-content', '.entry-content',
+                     '#content', '.article-body', '.story-body']:
+        main_content = soup.select_one(selector)
+        if main_content:
+            break
+    if not main_content:
+        main_content = soup.find('body')
+    if not main_content:
+        return None
+
+    # helpers.clean_text as it was: a second parse plus three regex passes
+    text = main_content.get_text(separator=' ', strip=True)
+    text = BeautifulSoup(text, 'html.parser').get_text()
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'[^\w\s.,!?;:\-\'"()]', ' ', text)
+    text = ' '.join(text.split()).strip()
+    return text[:max_length] if len(text) > max_length else text
+
+
+def generate_pages(count: int, paragraphs: int, seed: int) -> List[bytes]:
+    """Article pages with the usual chrome around them: menus, sidebars, comments and scripts"""
+    rng = random.Random(seed)
+
+    def sentence():
+        return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))).capitalize() + ', and more.'
+
+    pages = []
+    for index in range(count):
+        menu = ''.join(f"<li><a href='/section/{n}'>{rng.choice(WORDS).title()}</a></li>" for n in range(30))
+        body = ''.join(f"<p>{' '.join(sentence() for _ in range(rng.randint(2, 5)))}</p>"
+                       for _ in range(paragraphs))
+        related = ''.join(f"<li><a href='/post/{n}'>{sentence()}</a></li>" for n in range(10))
+        comments = ''.join(f"<div class='comment'><p>{sentence()}</p></div>" for _ in range(8))
+        scripts = ''.join(f"<script>window.data{n} = {{'page': {index}, 'slot': {n}}};</script>" for n in range(6))
+        pages.append((
+            f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>Page {index}</title>"
+            f"<style>body {{font-family: sans-serif}} .sidebar {{width: 30%}}</style>{scripts}</head><body>"
+            f"<header><nav class='navbar'><ul>{menu}</ul></nav></header>"
+            f"<div class='layout'><div class='content-wrapper'><div class='post-body'>"
+            f"<h1>Guide {index} — {sentence()}</h1>{body}</div>"
+            f"<div class='share-buttons'><a href='#'>Share</a> <a href='#'>Tweet</a></div></div>"
+            f"<div class='sidebar'><h3>Related</h3><ul>{related}</ul></div></div>"
+            f"<section id='comments'>{comments}</section>"
+            f"<footer><p>Copyright {index}. All rights reserved.</p></footer></body></html>"
+        ).encode('utf-8'))
+    return pages
+
+
+def measure(extract: Callable, pages: List[bytes], repeat: int) -> Dict:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        outputs = [extract(page) for page in pages]
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+    return {
+        'ms_per_page': round(best * 1000 / len(pages), 3),
+        'pages_per_sec': round(len(pages) / best, 1),
+        'avg_chars': round(sum(len(text or '') for text in outputs) / len(pages), 1)
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Micro-benchmark of page text extraction: BeautifulSoup vs lxml')
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--paragraphs', type=int, default=20, help='Article paragraphs per page')
+    parser.add_argument('--repeat', type=int, default=3, help='Passes over the pages; the fastest is reported')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', dest='json_path', help='Write the results to this file')
+    args = parser.parse_args(argv)
+
+    pages = generate_pages(args.pages, args.paragraphs, args.seed)
+    results = {
+        'beautifulsoup': measure(legacy_extract, pages, args.repeat),
+        'lxml': measure(lambda page: extract_main_text(page, max_length=2000), pages, args.repeat)
+    }
+    speedup = results['beautifulsoup']['ms_per_page'] / results['lxml']['ms_per_page']
+
+    print(f"{'engine':<15}{'ms/page':>10}{'pages/s':>10}{'avg chars':>11}")
+    for name, result in results.items():
+        print(f"{name:<15}{result['ms_per_page']:>10}{result['pages_per_sec']:>10}{result['avg_chars']:>11}")
+    print(f"\nlxml engine is {speedup:.1f}x faster over {args.pages} pages "
+          f"({sum(len(page) for page in pages) // len(pages)} bytes each on average)")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({'settings': vars(args), 'results': results, 'speedup': round(speedup, 2)}, f, indent=2)
+        print(f"Results written to {args.json_path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
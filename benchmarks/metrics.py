@@ -0,0 +1,92 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+from sqlalchemy import event
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Linear-interpolated percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+class QueryCounter:
+    """Count SQL statements executed on an engine, overall and per thread"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.total = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        with self._lock:
+            self.total += 1
+        self._local.count = getattr(self._local, 'count', 0) + 1
+
+    def thread_count(self) -> int:
+        return getattr(self._local, 'count', 0)
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._on_execute)
+        return False
+
+
+class ScenarioRecorder:
+    """Collect per-operation latencies and query counts for one scenario"""
+
+    def __init__(self, name: str, queries: QueryCounter):
+        self.name = name
+        self.queries = queries
+        self.latencies = []
+        self.query_counts = []
+        self.failures = 0
+        self.started = None
+        self.finished = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def operation(self):
+        queries_before = self.queries.thread_count()
+        started = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except Exception as e:
+            failed = True
+            print(f"Benchmark operation failed in {self.name}: {e}")
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.latencies.append(elapsed)
+                self.query_counts.append(self.queries.thread_count() - queries_before)
+                if failed:
+                    self.failures += 1
+
+    def summary(self, provider_stats: Dict = None) -> Dict:
+        latencies = sorted(self.latencies)
+        wall_time = (self.finished - self.started) if self.started and self.finished else sum(latencies)
+        operations = len(latencies)
+        return {
+            'scenario': self.name,
+            'operations': operations,
+            'failures': self.failures,
+            'wall_time_s': round(wall_time, 3),
+            'throughput_ops_s': round(operations / wall_time, 2) if wall_time else 0.0,
+            'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+            'p95_ms': round(percentile(latencies, 95) * 1000, 1),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+            'max_ms': round(latencies[-1] * 1000, 1) if latencies else 0.0,
+            'db_queries_total': sum(self.query_counts),
+            'db_queries_per_op': round(sum(self.query_counts) / operations, 1) if operations else 0.0,
+            'providers': provider_stats or {}
+        }
@@ -0,0 +1,149 @@
+import argparse
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout, nullcontext
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from app import create_app
+from app.models import db
+from tests.fake_providers import FakeAnthropicClient, FakeOpenAIClient, FakeWeb, LatencyProfile
+from benchmarks.dataset import generate_dataset, make_responder, seed_database
+from benchmarks.metrics import QueryCounter, ScenarioRecorder
+from benchmarks.scenarios import SCENARIOS, BenchmarkEnvironment, offline_http
+
+# Effectively unlimited provider limits, for measuring our own overhead
+UNLIMITED_RATE_LIMITS = {'default': {'rpm': 10 ** 6, 'tpm': 10 ** 9, 'max_concurrency': 1000}}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Offline benchmarks with latency-injecting fake AI providers')
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help='Scenario to run (repeatable, default: all)')
+    parser.add_argument('--iterations', type=int, default=20, help='Operations per scenario')
+    parser.add_argument('--concurrency', type=int, default=1, help='Operations in flight at once')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--users', type=int, default=2)
+    parser.add_argument('--brands-per-user', type=int, default=3)
+    parser.add_argument('--distribution', default='lognormal', choices=LatencyProfile.DISTRIBUTIONS)
+    parser.add_argument('--latency', type=float, default=0.2, help='Median provider latency in seconds')
+    parser.add_argument('--spread', type=float, default=0.5, help='Latency variability (lognormal sigma)')
+    parser.add_argument('--web-latency', type=float, default=0.05, help='Median search/page fetch latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of provider calls failing with 5xx')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='Fraction of provider calls getting 429')
+    parser.add_argument('--unlimited', action='store_true', help='Ignore the configured provider rate limits')
+    parser.add_argument('--warm', action='store_true', help='Share the response cache across operations')
+    parser.add_argument('--json', dest='json_path', help='Write the results to this file')
+    parser.add_argument('--baseline', help='Compare against a previous --json output')
+    parser.add_argument('--max-regression', type=float, default=20.0,
+                        help='Fail if p95 latency grows by more than this percentage over the baseline')
+    parser.add_argument('--verbose', action='store_true', help="Show the services' own output")
+    return parser.parse_args(argv)
+
+
+def run_scenario(app, name: str, operation, iterations: int, concurrency: int, queries: QueryCounter):
+    recorder = ScenarioRecorder(name, queries)
+
+    def run_one(index: int):
+        with app.app_context():
+            with recorder.operation():
+                operation(index)
+
+    recorder.started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(run_one, range(iterations)))
+    else:
+        for index in range(iterations):
+            run_one(index)
+    recorder.finished = time.perf_counter()
+    return recorder
+
+
+def compare(results, baseline, max_regression: float) -> bool:
+    """Print changes against a baseline; returns False when p95 regressed too far"""
+    previous = {result['scenario']: result for result in baseline.get('results', [])}
+    passed = True
+    print("\nCompared with baseline:")
+    for result in results:
+        before = previous.get(result['scenario'])
+        if not before:
+            continue
+        changes = []
+        for metric in ('p50_ms', 'p95_ms', 'throughput_ops_s', 'db_queries_per_op'):
+            if before[metric]:
+                change = (result[metric] - before[metric]) / before[metric] * 100
+                changes.append(f"{metric} {change:+.1f}%")
+                if metric == 'p95_ms' and change > max_regression:
+                    passed = False
+        print(f"  {result['scenario']:<12} " + ', '.join(changes))
+    return passed
+
+
+def print_table(results):
+    print(f"\n{'scenario':<12}{'ops':>6}{'fail':>6}{'ops/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+          f"{'queries/op':>12}")
+    for r in results:
+        print(f"{r['scenario']:<12}{r['operations']:>6}{r['failures']:>6}{r['throughput_ops_s']:>9}"
+              f"{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}{r['db_queries_per_op']:>12}")
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    scenarios = args.scenario or list(SCENARIOS)
+
+    app = create_app('benchmark')
+    dataset = generate_dataset(seed=args.seed, users=args.users, brands_per_user=args.brands_per_user)
+    responder = make_responder(dataset)
+
+    def latency(median, seed):
+        return LatencyProfile(args.distribution, median=median, spread=args.spread, seed=seed)
+
+    openai_client = FakeOpenAIClient(responder, latency=latency(args.latency, args.seed),
+                                     error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate, seed=args.seed)
+    anthropic_client = FakeAnthropicClient(responder, latency=latency(args.latency, args.seed + 1),
+                                           error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+                                           seed=args.seed + 1)
+    web = FakeWeb(latency=latency(args.web_latency, args.seed + 2), seed=args.seed + 2)
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        ids = seed_database(dataset)
+        rate_limits = UNLIMITED_RATE_LIMITS if args.unlimited else app.config.get('RATE_LIMITS')
+        env = BenchmarkEnvironment(dataset, ids, openai_client, anthropic_client, web, warm=args.warm,
+                                   rate_limits=rate_limits)
+        engine = db.engine
+
+    results = []
+    with QueryCounter(engine) as queries, offline_http(web):
+        for name in scenarios:
+            before = env.provider_stats()
+            with nullcontext() if args.verbose else redirect_stdout(io.StringIO()):
+                recorder = run_scenario(app, name, SCENARIOS[name](env), args.iterations, args.concurrency, queries)
+            after = env.provider_stats()
+            provider_stats = {provider: {key: value - before[provider][key] for key, value in counts.items()}
+                              for provider, counts in after.items()}
+            results.append(recorder.summary(provider_stats))
+
+    print_table(results)
+    output = {'settings': vars(args), 'results': results}
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(output, f, indent=2)
+        print(f"\nResults written to {args.json_path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            if not compare(results, json.load(f), args.max_regression):
+                print(f"❌ p95 latency regressed by more than {args.max_regression}%")
+                return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
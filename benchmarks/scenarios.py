@@ -0,0 +1,133 @@
+import logging
+from contextlib import contextmanager
+from typing import Callable, Dict, List
+from app.services.ai_overview_service import AIOverviewService
+from app.services.ai_search import AISearchService
+from app.services.brand_monitor import BrandMonitoringService
+from app.services.competitor_analysis import CompetitorAnalysisService
+from app.services.page_fetcher import get_page_fetcher
+from app.services.rate_limiter import RateLimiter
+from app.services.response_cache import ResponseCache
+from app.services.shared_state import MemoryStateBackend
+from app.services.single_flight import SingleFlight
+
+
+class OfflineOverviewService(AIOverviewService):
+    """AIOverviewService with SerpAPI and OpenAI replaced by fakes"""
+
+    def __init__(self, openai_client, web):
+        self.openai_client = openai_client
+        self.serpapi_key = None
+        self.web = web
+        self.logger = logging.getLogger(__name__)
+
+    def _search_google(self, query):
+        return self.web.search(query)
+
+
+@contextmanager
+def offline_http(web):
+    """Route the page fetcher's downloads to the fake web for the whole run"""
+    fetcher = get_page_fetcher()
+    original = fetcher.session
+    fetcher.session = web
+    try:
+        yield
+    finally:
+        fetcher.session = original
+
+
+class BenchmarkEnvironment:
+    """Fakes, dataset ids and cache/rate-limit settings shared by every scenario"""
+
+    def __init__(self, dataset: Dict, ids: Dict, openai_client, anthropic_client, web, warm: bool = False,
+                 rate_limits: Dict = None):
+        self.dataset = dataset
+        self.ids = ids
+        self.openai_client = openai_client
+        self.anthropic_client = anthropic_client
+        self.web = web
+        self.warm = warm
+        self.rate_limiter = RateLimiter(MemoryStateBackend(), limits=rate_limits)
+        self.shared_cache = ResponseCache(MemoryStateBackend())
+        self.shared_single_flight = SingleFlight()
+
+    def wire(self, ai_service: AISearchService) -> AISearchService:
+        """Point a service at the fake providers; cold runs get an empty cache per operation"""
+        ai_service.openai_client = self.openai_client
+        ai_service.anthropic_client = self.anthropic_client
+        ai_service.rate_limiter = self.rate_limiter
+        if self.warm:
+            ai_service.cache = self.shared_cache
+            ai_service.single_flight = self.shared_single_flight
+        else:
+            ai_service.cache = ResponseCache(MemoryStateBackend())
+            ai_service.single_flight = SingleFlight()
+        return ai_service
+
+    def brand_names(self) -> List[str]:
+        return [brand['name'] for user in self.dataset['users'] for brand in user['brands']]
+
+    def provider_stats(self) -> Dict:
+        stats = {}
+        for name, client in (('openai', self.openai_client), ('anthropic', self.anthropic_client)):
+            stats[name] = {'calls': client.calls, 'errors': client.errors, 'rate_limited': client.rate_limited}
+        stats['web'] = {'searches': self.web.searches, 'fetches': self.web.fetches,
+                        'not_modified': self.web.not_modified, 'bytes': self.web.bytes_served}
+        return stats
+
+
+def search_scenario(env: BenchmarkEnvironment) -> Callable[[int], None]:
+    names = env.brand_names()
+    queries = [query for user in env.dataset['users'] for brand in user['brands'] for query in brand['queries']]
+
+    def operation(index: int):
+        ai_service = env.wire(AISearchService())
+        ai_service.search_all_platforms(queries[index % len(queries)], names[index % len(names)])
+
+    return operation
+
+
+def monitor_scenario(env: BenchmarkEnvironment) -> Callable[[int], None]:
+    brand_ids = env.ids['brands']
+
+    def operation(index: int):
+        service = BrandMonitoringService()
+        env.wire(service.ai_service)
+        service.monitor_brand(brand_ids[index % len(brand_ids)])
+
+    return operation
+
+
+def competitors_scenario(env: BenchmarkEnvironment) -> Callable[[int], None]:
+    brand_ids = env.ids['brands']
+
+    def operation(index: int):
+        service = CompetitorAnalysisService()
+        env.wire(service.ai_service)
+        service.analyze_competitors(brand_ids[index % len(brand_ids)])
+
+    return operation
+
+
+def overview_scenario(env: BenchmarkEnvironment) -> Callable[[int], None]:
+    queries = env.dataset['overview_queries']
+    user_ids = env.ids['users']
+
+    def operation(index: int):
+        query = queries[index % len(queries)]
+        if not env.warm:
+            # Distinct text so the SearchCache table never short-circuits a cold run
+            query = f"{query} ({index})"
+        service = OfflineOverviewService(env.openai_client, env.web)
+        service.generate_overview(query, user_ids[index % len(user_ids)])
+
+    return operation
+
+
+SCENARIOS = {
+    'search': search_scenario,
+    'monitor': monitor_scenario,
+    'competitors': competitors_scenario,
+    'overview': overview_scenario,
+}
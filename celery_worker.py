@@ -0,0 +1,15 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from app import create_app
+from app.celery_app import make_celery
+
+# Worker and beat entry point:
+#   celery -A celery_worker.celery worker --loglevel=info
+#   celery -A celery_worker.celery beat --loglevel=info
+app = create_app(os.getenv('FLASK_CONFIG', 'default'))
+# Scheduled dispatches from beat must go back through the broker
+app.config['JOB_BACKEND'] = 'celery'
+celery = app.extensions.get('celery') or make_celery(app)
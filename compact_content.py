@@ -0,0 +1,25 @@
+import sys
+import os
+import argparse
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from app import create_app
+from app.services.blob_store import BlobStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Move inline response and overview text into compressed blobs')
+    parser.add_argument('--batch-size', type=int, default=500, help='Rows migrated per committed chunk')
+
+    args = parser.parse_args()
+    app = create_app(os.getenv('FLASK_CONFIG', 'default'))
+
+    with app.app_context():
+        moved = BlobStore().compact(args.batch_size)
+        for table, count in moved.items():
+            print(f"✅ {table}: {count} rows compacted")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,6 +4,8 @@ from dotenv import load_dotenv
 
 # Load environment variables from .env file
 basedir = os.path.abspath(os.path.dirname(__file__))
+# Local state files (caches, shared state) live in the Flask instance folder, not the source tree
+instancedir = os.path.join(basedir, 'instance')
 load_dotenv(os.path.join(basedir, '.env'))
 
 
@@ -21,6 +23,80 @@ class Config:
     OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
     ANTHROPIC_API_KEY = os.environ.get('ANTHROPIC_API_KEY')
 
+    # Pooled LLM HTTP clients (shared per process)
+    LLM_HTTP_POOL_SIZE = int(os.environ.get('LLM_HTTP_POOL_SIZE', 20))
+    LLM_HTTP_KEEPALIVE = int(os.environ.get('LLM_HTTP_KEEPALIVE', 10))
+    LLM_HTTP_TIMEOUT = float(os.environ.get('LLM_HTTP_TIMEOUT', 60))
+    LLM_HTTP_CONNECT_TIMEOUT = float(os.environ.get('LLM_HTTP_CONNECT_TIMEOUT', 10))
+    LLM_MAX_RETRIES = int(os.environ.get('LLM_MAX_RETRIES', 2))
+
+    # AI Search Fan-out Configuration
+    AI_SEARCH_MAX_WORKERS = int(os.environ.get('AI_SEARCH_MAX_WORKERS', 16))
+    AI_SEARCH_TIMEOUT = float(os.environ.get('AI_SEARCH_TIMEOUT', 30))
+
+    # Web page downloads for AI overviews: pooled keep-alive connections, at most PER_HOST at a
+    # time per host, and one DEADLINE (seconds) for all of an overview's pages
+    PAGE_FETCH_WORKERS = int(os.environ.get('PAGE_FETCH_WORKERS', 16))
+    PAGE_FETCH_PER_HOST = int(os.environ.get('PAGE_FETCH_PER_HOST', 2))
+    PAGE_FETCH_TIMEOUT = float(os.environ.get('PAGE_FETCH_TIMEOUT', 10))
+    PAGE_FETCH_DEADLINE = float(os.environ.get('PAGE_FETCH_DEADLINE', 8))
+    PAGE_FETCH_MAX_BYTES = int(os.environ.get('PAGE_FETCH_MAX_BYTES', 2 * 1024 * 1024))
+    # AI overview results by normalized query: fresh for the TTL, then served stale for up to
+    # STALE_TTL more seconds while a background refresh regenerates them
+    OVERVIEW_CACHE_TTL = int(os.environ.get('OVERVIEW_CACHE_TTL', 6 * 3600))
+    OVERVIEW_CACHE_STALE_TTL = int(os.environ.get('OVERVIEW_CACHE_STALE_TTL', 18 * 3600))
+    OVERVIEW_CACHE_MEMORY_ENTRIES = int(os.environ.get('OVERVIEW_CACHE_MEMORY_ENTRIES', 512))
+    OVERVIEW_CACHE_SWEEP_INTERVAL = int(os.environ.get('OVERVIEW_CACHE_SWEEP_INTERVAL', 600))  # 0 disables
+    OVERVIEW_CACHE_SWEEP_BATCH = int(os.environ.get('OVERVIEW_CACHE_SWEEP_BATCH', 500))
+    # Extracted page text cached on disk by URL; fresh for the TTL of the most specific matching
+    # domain (seconds), then revalidated with a conditional GET
+    URL_CACHE_ENABLED = os.environ.get('URL_CACHE_ENABLED', 'true').lower() == 'true'
+    URL_CACHE_PATH = os.environ.get('URL_CACHE_PATH') or os.path.join(instancedir, 'url_cache.db')
+    URL_CACHE_TTL = int(os.environ.get('URL_CACHE_TTL', 6 * 3600))
+    URL_CACHE_DOMAIN_TTLS = {'wikipedia.org': 3 * 24 * 3600, 'github.com': 24 * 3600, 'reddit.com': 3600,
+                             'news.ycombinator.com': 900}
+    URL_CACHE_MAX_BYTES = int(os.environ.get('URL_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+
+    # Shared state (rate limits, caches) across gunicorn workers: memory, sqlite or redis
+    REDIS_URL = os.environ.get('REDIS_URL') or 'redis://localhost:6379/0'
+    STATE_BACKEND = os.environ.get('STATE_BACKEND') or ('redis' if os.environ.get('REDIS_URL') else 'sqlite')
+    STATE_SQLITE_PATH = os.environ.get('STATE_SQLITE_PATH') or os.path.join(instancedir, 'shared_state.db')
+
+    # Provider rate limits, keyed by 'provider:model', 'provider' or 'default'
+    RATE_LIMITS = {
+        'default': {'rpm': 60, 'tpm': 60000, 'max_concurrency': 4},
+        'openai': {'rpm': 500, 'tpm': 90000, 'max_concurrency': 8},
+        'anthropic': {'rpm': 50, 'tpm': 40000, 'max_concurrency': 4},
+    }
+    # Longest wait for a provider slot; calls made by the AI search fan-out also stop waiting at their
+    # own AI_SEARCH_TIMEOUT deadline
+    RATE_LIMIT_WAIT_TIMEOUT = float(os.environ.get('RATE_LIMIT_WAIT_TIMEOUT', 60))
+
+    # LLM response cache: in-process LRU in front of a persistent sqlite/redis tier
+    LLM_CACHE_BACKEND = os.environ.get('LLM_CACHE_BACKEND') or STATE_BACKEND
+    LLM_CACHE_SQLITE_PATH = os.environ.get('LLM_CACHE_SQLITE_PATH') or os.path.join(instancedir, 'llm_cache.db')
+    LLM_CACHE_TTL = int(os.environ.get('LLM_CACHE_TTL', 24 * 3600))
+    LLM_CACHE_MEMORY_ENTRIES = int(os.environ.get('LLM_CACHE_MEMORY_ENTRIES', 1024))
+    LLM_CACHE_MAX_ENTRIES = int(os.environ.get('LLM_CACHE_MAX_ENTRIES', 50000))
+
+    # Single-flight coalescing of identical in-flight AI queries
+    SINGLE_FLIGHT_CROSS_PROCESS = os.environ.get('SINGLE_FLIGHT_CROSS_PROCESS', 'true').lower() == 'true'
+    SINGLE_FLIGHT_LOCK_TTL = float(os.environ.get('SINGLE_FLIGHT_LOCK_TTL', 120))
+    SINGLE_FLIGHT_WAIT_TIMEOUT = float(os.environ.get('SINGLE_FLIGHT_WAIT_TIMEOUT', 90))
+
+    # Query budgets: USD per 1K tokens by platform, and daily/per-run spend limits
+    QUERY_PRICING = {'chatgpt': 0.002, 'claude': 0.015}
+    QUERY_BUDGET_TENANT_DAILY = float(os.environ.get('QUERY_BUDGET_TENANT_DAILY', 2.0))  # Per user
+    QUERY_BUDGET_GLOBAL_DAILY = float(os.environ.get('QUERY_BUDGET_GLOBAL_DAILY', 50.0))
+    QUERY_BUDGET_MONITOR_RUN = float(os.environ.get('QUERY_BUDGET_MONITOR_RUN', 0.06))  # One brand monitoring run
+    QUERY_BUDGET_COMPETITOR_RUN = float(os.environ.get('QUERY_BUDGET_COMPETITOR_RUN', 0.25))
+
+    # Incremental monitoring: stored answers younger than the TTL (seconds, by BrandQuery priority,
+    # scaled per platform) are re-scored instead of asked again
+    FRESHNESS_ENABLED = os.environ.get('FRESHNESS_ENABLED', 'true').lower() == 'true'
+    FRESHNESS_TTL_BY_PRIORITY = {5: 3600, 4: 3 * 3600, 3: 6 * 3600, 2: 12 * 3600, 1: 24 * 3600}
+    FRESHNESS_PLATFORM_FACTORS = {'perplexity': 0.5}  # Search-backed answers change faster
+
     # Cache Configuration
     CACHE_TYPE = 'SimpleCache'
     CACHE_DEFAULT_TIMEOUT = 300
@@ -29,6 +105,30 @@ class Config:
     CELERY_BROKER_URL = os.environ.get('REDIS_URL') or 'redis://localhost:6379/0'
     CELERY_RESULT_BACKEND = os.environ.get('REDIS_URL') or 'redis://localhost:6379/0'
 
+    # Background jobs: celery (broker above), thread (in-process pool) or eager (inline, for tests)
+    JOB_BACKEND = os.environ.get('JOB_BACKEND') or ('celery' if os.environ.get('REDIS_URL') else 'thread')
+    JOB_THREAD_WORKERS = int(os.environ.get('JOB_THREAD_WORKERS', 4))
+    JOB_SCHEDULE_INTERVAL = int(os.environ.get('JOB_SCHEDULE_INTERVAL', 60))  # Seconds between schedule checks
+    # Run the schedule dispatcher in-process when there is no celery beat
+    JOB_SCHEDULER_ENABLED = os.environ.get('JOB_SCHEDULER_ENABLED', 'false').lower() == 'true'
+    # Offline re-analysis of stored responses (run_backfill.py); 0 workers means one per CPU
+    BACKFILL_BATCH_SIZE = int(os.environ.get('BACKFILL_BATCH_SIZE', 1000))
+    BACKFILL_WORKERS = int(os.environ.get('BACKFILL_WORKERS', 0)) or None
+
+    # Planned monitoring runs ask and commit this many brands' prompts at a time
+    MONITOR_RUN_CHUNK_BRANDS = int(os.environ.get('MONITOR_RUN_CHUNK_BRANDS', 20))
+
+    # Competitor analysis prompts sent through one fan-out (each runs on every platform)
+    COMPETITOR_BATCH_PROMPTS = int(os.environ.get('COMPETITOR_BATCH_PROMPTS', 10))
+    # Starting a competitor analysis resumes the brand's last unfinished one if it is this recent
+    COMPETITOR_RESUME_HOURS = int(os.environ.get('COMPETITOR_RESUME_HOURS', 24))
+
+    # Fair sharing between tenants: jobs and provider calls are served round-robin per user,
+    # with at most this many running per user; weights give some users more turns per round
+    JOB_TENANT_CONCURRENCY = int(os.environ.get('JOB_TENANT_CONCURRENCY', 2))
+    FAIR_TENANT_CALL_CONCURRENCY = int(os.environ.get('FAIR_TENANT_CALL_CONCURRENCY', 12))
+    FAIR_TENANT_WEIGHTS = {}  # {user_id: weight}, default 1
+
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -39,8 +139,38 @@ class ProductionConfig(Config):
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
 
 
+class BenchmarkConfig(Config):
+    # Throwaway database and in-process state so benchmark runs never touch real data
+    SQLALCHEMY_DATABASE_URI = os.environ.get('BENCHMARK_DATABASE_URL') or \
+                              'sqlite:///' + os.path.join(instancedir, 'benchmark.db')
+    STATE_BACKEND = 'memory'
+    LLM_CACHE_BACKEND = 'memory'
+    SINGLE_FLIGHT_CROSS_PROCESS = False
+    QUERY_BUDGET_TENANT_DAILY = None
+    QUERY_BUDGET_GLOBAL_DAILY = None
+    FRESHNESS_ENABLED = False  # Every iteration measures a full monitoring run
+    URL_CACHE_ENABLED = False  # Every overview downloads and parses its pages
+
+
+class TestingConfig(Config):
+    # In-memory database and state, no provider keys (mock responses); background jobs run inline
+    TESTING = True
+    OPENAI_API_KEY = None
+    ANTHROPIC_API_KEY = None
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    STATE_BACKEND = 'memory'
+    LLM_CACHE_BACKEND = 'memory'
+    SINGLE_FLIGHT_CROSS_PROCESS = False
+    JOB_BACKEND = 'eager'
+    JOB_SCHEDULER_ENABLED = False
+    OVERVIEW_CACHE_SWEEP_INTERVAL = 0
+    URL_CACHE_ENABLED = False
+
+
 config = {
     'development': DevelopmentConfig,
     'production': ProductionConfig,
+    'benchmark': BenchmarkConfig,
+    'testing': TestingConfig,
     'default': DevelopmentConfig
 }
\ No newline at end of file
@@ -0,0 +1,28 @@
+"""Add an idempotency key to batch jobs
+
+Revision ID: a8c5d2e4f6b7
+Revises: f7b4c9d1e3a6
+Create Date: 2026-10-16 23:45:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8c5d2e4f6b7'
+down_revision = 'f7b4c9d1e3a6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('batch_jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('idempotency_key', sa.String(length=64), nullable=True))
+        batch_op.create_unique_constraint('uq_batch_jobs_idempotency_key', ['idempotency_key'])
+
+
+def downgrade():
+    with op.batch_alter_table('batch_jobs', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_batch_jobs_idempotency_key', type_='unique')
+        batch_op.drop_column('idempotency_key')
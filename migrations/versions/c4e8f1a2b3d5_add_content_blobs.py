@@ -0,0 +1,56 @@
+"""Add content-addressed blob storage for responses and overviews
+
+Revision ID: c4e8f1a2b3d5
+Revises: b7c2d9e1f3a4
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e8f1a2b3d5'
+down_revision = 'b7c2d9e1f3a4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('content_blobs',
+    sa.Column('hash', sa.String(length=64), nullable=False),
+    sa.Column('codec', sa.String(length=10), nullable=False),
+    sa.Column('data', sa.LargeBinary(), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('hash')
+    )
+
+    with op.batch_alter_table('search_queries', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('response_hash', sa.String(length=64), nullable=True))
+        batch_op.create_index(batch_op.f('ix_search_queries_response_hash'), ['response_hash'], unique=False)
+        batch_op.create_foreign_key('fk_search_queries_response_hash', 'content_blobs', ['response_hash'], ['hash'])
+
+    with op.batch_alter_table('ai_overviews', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('overview_hash', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('search_results_hash', sa.String(length=64), nullable=True))
+        batch_op.alter_column('overview_text', existing_type=sa.Text(), nullable=True)
+        batch_op.create_foreign_key('fk_ai_overviews_overview_hash', 'content_blobs', ['overview_hash'], ['hash'])
+        batch_op.create_foreign_key('fk_ai_overviews_search_results_hash', 'content_blobs',
+                                    ['search_results_hash'], ['hash'])
+
+
+def downgrade():
+    with op.batch_alter_table('ai_overviews', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_ai_overviews_search_results_hash', type_='foreignkey')
+        batch_op.drop_constraint('fk_ai_overviews_overview_hash', type_='foreignkey')
+        batch_op.alter_column('overview_text', existing_type=sa.Text(), nullable=False)
+        batch_op.drop_column('search_results_hash')
+        batch_op.drop_column('overview_hash')
+
+    with op.batch_alter_table('search_queries', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_search_queries_response_hash', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_search_queries_response_hash'))
+        batch_op.drop_column('response_hash')
+
+    op.drop_table('content_blobs')
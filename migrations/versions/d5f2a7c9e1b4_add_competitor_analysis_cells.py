@@ -0,0 +1,40 @@
+"""Add per-cell checkpoints for competitor analysis jobs
+
+Revision ID: d5f2a7c9e1b4
+Revises: c4e8f1a2b3d5
+Create Date: 2026-10-16 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5f2a7c9e1b4'
+down_revision = 'c4e8f1a2b3d5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('competitor_analysis_cells',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('job_id', sa.Integer(), nullable=False),
+    sa.Column('competitor', sa.String(length=100), nullable=True),
+    sa.Column('query_text', sa.String(length=500), nullable=False),
+    sa.Column('ai_platform', sa.String(length=50), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('response_hash', sa.String(length=64), nullable=True),
+    sa.Column('tokens_used', sa.Integer(), nullable=True),
+    sa.Column('cached', sa.Boolean(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('completed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['job_id'], ['background_jobs.id'], ),
+    sa.ForeignKeyConstraint(['response_hash'], ['content_blobs.hash'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('job_id', 'query_text', 'ai_platform', name='uq_competitor_cells_job_query_platform')
+    )
+
+
+def downgrade():
+    op.drop_table('competitor_analysis_cells')
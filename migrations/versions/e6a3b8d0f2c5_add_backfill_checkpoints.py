@@ -0,0 +1,60 @@
+"""Record the brand of stored responses and add backfill checkpoints
+
+Existing responses get the brand_id of their user's only brand. Rows of users with
+several brands stay NULL, since the brand they were analyzed for was not recorded; the
+search results page lists them for every brand of their user.
+
+Revision ID: e6a3b8d0f2c5
+Revises: d5f2a7c9e1b4
+Create Date: 2026-10-16 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6a3b8d0f2c5'
+down_revision = 'd5f2a7c9e1b4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('backfill_checkpoints',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('phase', sa.String(length=20), nullable=True),
+    sa.Column('end_id', sa.Integer(), nullable=True),
+    sa.Column('last_id', sa.Integer(), nullable=True),
+    sa.Column('last_brand_id', sa.Integer(), nullable=True),
+    sa.Column('last_day', sa.Date(), nullable=True),
+    sa.Column('stats', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('completed_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+
+    with op.batch_alter_table('search_queries', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('brand_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_search_queries_brand_id', 'brands', ['brand_id'], ['id'])
+        batch_op.create_index('ix_search_queries_brand_created', ['brand_id', 'created_at'], unique=False)
+
+    # Older rows belong to their user's brand when the user has exactly one
+    op.execute("""
+        UPDATE search_queries
+        SET brand_id = (SELECT brands.id FROM brands WHERE brands.user_id = search_queries.user_id)
+        WHERE brand_id IS NULL
+          AND user_id IN (SELECT user_id FROM brands GROUP BY user_id HAVING COUNT(*) = 1)
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('search_queries', schema=None) as batch_op:
+        batch_op.drop_index('ix_search_queries_brand_created')
+        batch_op.drop_constraint('fk_search_queries_brand_id', type_='foreignkey')
+        batch_op.drop_column('brand_id')
+
+    op.drop_table('backfill_checkpoints')
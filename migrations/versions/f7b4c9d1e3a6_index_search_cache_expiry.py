@@ -0,0 +1,29 @@
+"""Index search cache expiry and drop entries keyed by the old MD5 hash
+
+Revision ID: f7b4c9d1e3a6
+Revises: e6a3b8d0f2c5
+Create Date: 2026-10-16 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f7b4c9d1e3a6'
+down_revision = 'e6a3b8d0f2c5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keys are now sha256 of the normalized query; MD5-keyed rows can never be hit again
+    op.execute("DELETE FROM search_cache WHERE length(query_hash) = 32")
+
+    with op.batch_alter_table('search_cache', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_search_cache_expires_at'), ['expires_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('search_cache', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_search_cache_expires_at'))
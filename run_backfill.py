@@ -0,0 +1,37 @@
+import sys
+import os
+import argparse
+import json
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from app import create_app
+from app.services.backfill import BackfillEngine
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Re-analyze stored AI responses and rebuild their metrics offline')
+    parser.add_argument('--name', default='mentions', help='Checkpoint name; rerunning the same name resumes it')
+    parser.add_argument('--batch-size', type=int, help='search_queries rows per chunk')
+    parser.add_argument('--workers', type=int, help='Analyzer processes (1 analyzes in this process)')
+    parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing anything')
+    parser.add_argument('--samples', type=int, default=20, help='Changed rows to include in the report')
+    parser.add_argument('--restart', action='store_true', help='Discard the checkpoint and start over')
+
+    args = parser.parse_args()
+    config_name = os.getenv('FLASK_CONFIG', 'default')
+    app = create_app(config_name)
+
+    with app.app_context():
+        engine = BackfillEngine(name=args.name,
+                                batch_size=args.batch_size or app.config['BACKFILL_BATCH_SIZE'],
+                                workers=args.workers if args.workers is not None else app.config['BACKFILL_WORKERS'],
+                                dry_run=args.dry_run, config_name=config_name, samples=args.samples)
+        report = engine.run(restart=args.restart)
+        if args.dry_run:
+            print("Dry run, nothing written:")
+        print(json.dumps(report, indent=2, default=str))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+import sys
+import os
+import argparse
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from app import create_app
+from app.services.batch_monitor import BatchMonitoringService
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run brand monitoring through provider batch jobs')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    submit_parser = subparsers.add_parser('submit', help='Submit a new monitoring run')
+    submit_parser.add_argument('--brand-id', type=int, action='append', dest='brand_ids',
+                               help='Limit the run to these brands (repeatable)')
+
+    poll_parser = subparsers.add_parser('poll', help='Poll a run and ingest it once finished')
+    poll_parser.add_argument('run_id', type=int)
+
+    subparsers.add_parser('resume', help='Resume every unfinished run')
+
+    args = parser.parse_args()
+    app = create_app(os.getenv('FLASK_CONFIG', 'default'))
+
+    with app.app_context():
+        service = BatchMonitoringService()
+
+        if args.command == 'submit':
+            run = service.submit_run(args.brand_ids)
+            print(f"✅ Submitted batch run {run.id}")
+            print(run.to_dict())
+        elif args.command == 'poll':
+            run = service.poll_run(args.run_id)
+            print(run.to_dict())
+        else:
+            for run in service.resume():
+                print(run.to_dict())
+
+
+if __name__ == '__main__':
+    main()
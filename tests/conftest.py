@@ -0,0 +1,29 @@
+import pytest
+
+from app import create_app
+from app.models import db, User, Brand
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def user(app):
+    user = User(email='owner@example.com', username='owner', first_name='Test', last_name='Owner')
+    user.set_password('password')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def brand(user):
+    brand = Brand(name='Acme', user_id=user.id, keywords=['widgets'], competitors=['Globex'])
+    db.session.add(brand)
+    db.session.commit()
+    return brand
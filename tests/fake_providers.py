@@ -0,0 +1,297 @@
+import hashlib
+import math
+import random
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+from typing import Callable, Dict, Optional
+
+
+class FakeRateLimitError(Exception):
+    """Stand-in for the SDKs' RateLimitError"""
+    status_code = 429
+
+
+class FakeAPIError(Exception):
+    """Stand-in for a provider 5xx"""
+    status_code = 500
+
+
+class LatencyProfile:
+    """Seeded latency distribution for fake providers, in seconds.
+
+    distribution is one of constant, uniform, exponential or lognormal; median sets the
+    typical latency and spread its variability (the lognormal sigma, or +/- fraction for uniform).
+    """
+
+    DISTRIBUTIONS = ('constant', 'uniform', 'exponential', 'lognormal')
+
+    def __init__(self, distribution: str = 'lognormal', median: float = 0.5, spread: float = 0.5,
+                 maximum: float = None, seed: int = None):
+        if distribution not in self.DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {distribution}")
+        self.distribution = distribution
+        self.median = median
+        self.spread = spread
+        self.maximum = maximum
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self) -> float:
+        with self._lock:
+            if self.distribution == 'constant':
+                value = self.median
+            elif self.distribution == 'uniform':
+                value = self._random.uniform(self.median * (1 - self.spread), self.median * (1 + self.spread))
+            elif self.distribution == 'exponential':
+                value = self._random.expovariate(math.log(2) / self.median) if self.median > 0 else 0.0
+            else:
+                value = self._random.lognormvariate(math.log(self.median), self.spread) if self.median > 0 else 0.0
+        if self.maximum is not None:
+            value = min(value, self.maximum)
+        return max(0.0, value)
+
+
+def _default_responder(prompt: str) -> str:
+    return (f"Here is an overview for the request. {prompt.strip()[:200]} "
+            "Several leading companies and platforms are active in this space.")
+
+
+class _FakeProvider:
+    """Shared behaviour for fake LLM clients: canned text, simulated latency and injected failures"""
+
+    def __init__(self, responder: Callable[[str], str] = None, rate_limit_every: int = 0,
+                 latency: LatencyProfile = None, error_rate: float = 0.0, rate_limit_rate: float = 0.0,
+                 seed: int = None):
+        self.responder = responder or _default_responder
+        self.rate_limit_every = rate_limit_every
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.calls = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _next_call(self):
+        with self._lock:
+            self.calls += 1
+            call_number = self.calls
+            roll = self._random.random()
+
+        if (self.rate_limit_every and call_number % self.rate_limit_every == 0) or roll < self.rate_limit_rate:
+            with self._lock:
+                self.rate_limited += 1
+            raise FakeRateLimitError('Rate limit exceeded (fake)')
+
+        if self.latency:
+            time.sleep(self.latency.sample())
+
+        if roll < self.rate_limit_rate + self.error_rate:
+            with self._lock:
+                self.errors += 1
+            raise FakeAPIError('Internal server error (fake)')
+
+    @staticmethod
+    def _prompt(messages) -> str:
+        return ' '.join(m.get('content', '') for m in messages if m.get('role') == 'user')
+
+
+class FakeOpenAIClient(_FakeProvider):
+    """Offline replacement for openai.OpenAI exposing chat.completions.create.
+
+    With stream=True the response is an iterator of delta chunks, one per word, each
+    token_latency seconds after the previous one.
+    """
+
+    def __init__(self, responder: Callable[[str], str] = None, rate_limit_every: int = 0,
+                 token_latency: float = 0.0, **kwargs):
+        super().__init__(responder, rate_limit_every, **kwargs)
+        self.token_latency = token_latency
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model: str, messages, temperature: float = None, max_tokens: Optional[int] = None,
+                stream: bool = False, **kwargs):
+        self._next_call()
+        prompt = self._prompt(messages)
+        content = self.responder(prompt)
+        if stream:
+            return self._stream(content)
+        return SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(message=SimpleNamespace(role='assistant', content=content))],
+            usage=SimpleNamespace(total_tokens=len(prompt) // 4 + len(content) // 4)
+        )
+
+    def _stream(self, content: str):
+        for index, word in enumerate(content.split(' ')):
+            if index and self.token_latency:
+                time.sleep(self.token_latency)
+            delta = SimpleNamespace(content=word if index == 0 else ' ' + word)
+            yield SimpleNamespace(choices=[SimpleNamespace(index=0, delta=delta, finish_reason=None)])
+
+
+class FakeAnthropicClient(_FakeProvider):
+    """Offline replacement for anthropic.Anthropic exposing messages.create"""
+
+    def __init__(self, responder: Callable[[str], str] = None, rate_limit_every: int = 0, **kwargs):
+        super().__init__(responder, rate_limit_every, **kwargs)
+        self.messages = SimpleNamespace(create=self._create)
+
+    def _create(self, model: str, max_tokens: int, messages, **kwargs):
+        self._next_call()
+        prompt = self._prompt(messages)
+        content = self.responder(prompt)
+        return SimpleNamespace(
+            model=model,
+            content=[SimpleNamespace(type='text', text=content)],
+            usage=SimpleNamespace(input_tokens=len(prompt) // 4, output_tokens=len(content) // 4)
+        )
+
+
+class FakeBatchProvider:
+    """Local stand-in for a provider batch endpoint, backed by a fake client.
+
+    Batches live at class level, so a fresh service instance can resume polling
+    batches submitted by an earlier one (as after a crash).
+    """
+
+    _batches = {}
+
+    def __init__(self, platform: str, client, polls_to_complete: int = 1, fail: bool = False):
+        self.platform = platform
+        self.client = client
+        self.polls_to_complete = polls_to_complete
+        self.fail = fail
+
+    def submit(self, requests, idempotency_key: str = None):
+        external_id = f'fakebatch_{uuid.uuid4().hex}'
+        self._batches[external_id] = {'requests': requests, 'polls': 0, 'idempotency_key': idempotency_key}
+        return external_id
+
+    def find(self, idempotency_key: str):
+        for external_id, batch in self._batches.items():
+            if idempotency_key and batch['idempotency_key'] == idempotency_key:
+                return external_id
+        return None
+
+    def poll(self, external_id: str):
+        batch = self._batches[external_id]
+        batch['polls'] += 1
+        if self.fail:
+            return 'failed', None
+        if batch['polls'] < self.polls_to_complete:
+            return 'in_progress', None
+
+        results = {}
+        for custom_id, body in batch['requests'].items():
+            try:
+                if self.platform == 'claude':
+                    message = self.client.messages.create(**body)
+                    results[custom_id] = {
+                        'response': message.content[0].text,
+                        'tokens_used': message.usage.input_tokens + message.usage.output_tokens
+                    }
+                else:
+                    response = self.client.chat.completions.create(**body)
+                    results[custom_id] = {
+                        'response': response.choices[0].message.content,
+                        'tokens_used': response.usage.total_tokens
+                    }
+            except Exception as e:
+                results[custom_id] = {'error': str(e)}
+        return 'completed', results
+
+
+class FakeHTTPResponse:
+    """Minimal requests.Response stand-in"""
+
+    def __init__(self, url: str, content: bytes, status_code: int = 200, headers: Dict = None):
+        self.url = url
+        self.content = content
+        self.status_code = status_code
+        self.headers = {'Content-Type': 'text/html; charset=utf-8', **(headers or {})}
+
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8', errors='replace')
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise FakeAPIError(f"{self.status_code} Error for url: {self.url}")
+
+    def iter_content(self, chunk_size: int = 1):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+    def close(self):
+        pass
+
+
+class FakeWeb:
+    """Offline web for the overview pipeline: synthetic search results and HTML pages.
+
+    search() stands in for SerpAPI and get() for requests.get; both share the latency
+    profile, and get() fails with error_rate. Pages carry an ETag and answer a matching
+    If-None-Match with an empty 304.
+    """
+
+    def __init__(self, latency: LatencyProfile = None, error_rate: float = 0.0, paragraphs: int = 12,
+                 seed: int = None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.paragraphs = paragraphs
+        self.searches = 0
+        self.fetches = 0
+        self.not_modified = 0
+        self.bytes_served = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _wait(self):
+        if self.latency:
+            time.sleep(self.latency.sample())
+
+    def search(self, query: str, num: int = 10):
+        with self._lock:
+            self.searches += 1
+        self._wait()
+        slug = '-'.join(query.lower().split())[:60]
+        return [{
+            'title': f"{query} - result {position}",
+            'url': f"https://site{position}.example.com/{slug}",
+            'snippet': f"Everything you need to know about {query}, from source {position}.",
+            'position': position
+        } for position in range(1, num + 1)]
+
+    def get(self, url: str, **kwargs) -> FakeHTTPResponse:
+        with self._lock:
+            self.fetches += 1
+            failed = self._random.random() < self.error_rate
+        self._wait()
+        if failed:
+            return FakeHTTPResponse(url, b'', status_code=503)
+
+        content = self.page(url).encode()
+        etag = '"%s"' % hashlib.sha1(content).hexdigest()[:16]
+        if (kwargs.get('headers') or {}).get('If-None-Match') == etag:
+            with self._lock:
+                self.not_modified += 1
+            return FakeHTTPResponse(url, b'', status_code=304, headers={'ETag': etag})
+        with self._lock:
+            self.bytes_served += len(content)
+        return FakeHTTPResponse(url, content, headers={'ETag': etag})
+
+    def page(self, url: str) -> str:
+        body = ''.join(
+            f"<p>Paragraph {index} about {url}. It covers the main points readers ask about, "
+            f"including pricing, features, reliability and how the options compare.</p>"
+            for index in range(self.paragraphs)
+        )
+        return ("<html><head><title>Fake page</title><style>p {margin: 0}</style></head><body>"
+                "<header><nav><a href='/'>Home</a> <a href='/about'>About</a></nav></header>"
+                f"<main><article><h1>{url}</h1>{body}</article></main>"
+                "<aside>Related links</aside><footer>Copyright</footer>"
+                "<script>var tracking = true;</script></body></html>")
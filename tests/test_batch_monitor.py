@@ -0,0 +1,82 @@
+import pytest
+
+from app.models import db, SearchQuery
+from app.models.batch_job import BatchRun
+from app.services.batch_monitor import BatchMonitoringService
+from tests.fake_providers import FakeAnthropicClient, FakeBatchProvider, FakeOpenAIClient
+
+
+class Crash(BaseException):
+    """The worker process dying mid-call"""
+
+
+class CrashAfterSubmit(FakeBatchProvider):
+    """Accepts the batch, then dies before the caller can store its id"""
+
+    def submit(self, requests, idempotency_key: str = None):
+        super().submit(requests, idempotency_key)
+        raise Crash()
+
+
+def make_service(polls_to_complete: int = 1, chatgpt_provider=FakeBatchProvider):
+    return BatchMonitoringService(providers={
+        'chatgpt': chatgpt_provider('chatgpt', FakeOpenAIClient(lambda prompt: 'Acme leads this space.'),
+                                    polls_to_complete=polls_to_complete),
+        'claude': FakeBatchProvider('claude', FakeAnthropicClient(lambda prompt: 'Globex and Acme compete.'),
+                                    polls_to_complete=polls_to_complete),
+    })
+
+
+def batches_with_key(idempotency_key):
+    return [batch for batch in FakeBatchProvider._batches.values() if batch['idempotency_key'] == idempotency_key]
+
+
+def test_submit_poll_and_ingest(brand):
+    service = make_service(polls_to_complete=2)
+    run = service.submit_run()
+    assert run.status == 'in_progress'
+    assert all(job.status == 'in_progress' and job.external_id for job in run.jobs)
+
+    run = service.poll_run(run.id)
+    assert run.status == 'in_progress'  # The fake needs two polls
+
+    run = service.poll_run(run.id)
+    assert run.status == 'completed'
+    assert run.ingested_brand_ids == [brand.id]
+
+    planned = run.brand_queries[str(brand.id)]
+    stored = db.session.query(SearchQuery).filter_by(brand_id=brand.id).all()
+    assert len(stored) == len(planned) * 2
+    assert {row.ai_platform for row in stored} == {'chatgpt', 'claude'}
+
+
+def test_failed_batch_still_ingests_the_other_platform(brand):
+    service = make_service()
+    service.providers['claude'].fail = True
+    run = service.poll_run(service.submit_run().id)
+
+    assert run.status == 'completed'
+    assert {job.platform: job.status for job in run.jobs} == {'chatgpt': 'completed', 'claude': 'failed'}
+    assert {row.ai_platform for row in db.session.query(SearchQuery).filter_by(brand_id=brand.id)} == {'chatgpt'}
+
+
+def test_resume_finds_a_batch_submitted_before_a_crash(brand):
+    with pytest.raises(Crash):
+        make_service(chatgpt_provider=CrashAfterSubmit).submit_run()
+    db.session.rollback()
+
+    run = db.session.query(BatchRun).one()
+    job = next(job for job in run.jobs if job.platform == 'chatgpt')
+    assert job.status == 'submitting' and job.external_id is None
+    assert len(batches_with_key(job.idempotency_key)) == 1
+
+    [run] = make_service().resume()
+    job = next(job for job in run.jobs if job.platform == 'chatgpt')
+    assert len(batches_with_key(job.idempotency_key)) == 1  # Found again, not sent twice
+    assert run.status == 'completed'
+
+
+def test_resume_skips_finished_runs(brand):
+    service = make_service()
+    service.poll_run(service.submit_run().id)
+    assert service.resume() == []
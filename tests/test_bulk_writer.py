@@ -0,0 +1,100 @@
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from sqlalchemy import event
+
+from app.models import db, AnalyticsData, BrandQuery
+from app.services.bulk_writer import BulkWriter
+
+
+def test_insert_returning_ids_matches_row_order(brand):
+    texts = [f'query {n}' for n in (5, 3, 9, 1, 7)]
+    ids = BulkWriter().insert_returning_ids(BrandQuery, [{'brand_id': brand.id, 'query_text': text}
+                                                         for text in texts], ('query_text',))
+    db.session.commit()
+
+    assert len(ids) == len(set(ids)) == len(texts)
+    stored = dict(db.session.query(BrandQuery.id, BrandQuery.query_text))
+    assert [stored[query_id] for query_id in ids] == texts
+
+
+@contextmanager
+def count_inserts():
+    """Count the INSERT statements sent to the database inside the block"""
+    inserts = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('INSERT'):
+            inserts.append(statement)
+
+    engine = db.session.get_bind()
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield inserts
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+
+def test_insert_returning_ids_uses_one_statement(brand):
+    with count_inserts() as inserts:
+        ids = BulkWriter().insert_returning_ids(BrandQuery, [{'brand_id': brand.id, 'query_text': f'query {n}'}
+                                                             for n in range(20)], ('query_text',))
+
+    assert len(set(ids)) == 20
+    assert len(inserts) == 1
+
+
+def test_large_batches_are_split_under_the_parameter_limit(brand):
+    # Four columns per row: six rows fit in 24 parameters
+    writer = BulkWriter(max_parameters=24)
+    today = date.today()
+    rows = [{'brand_id': brand.id, 'date': today - timedelta(days=n), 'ai_platform': 'chatgpt', 'total_mentions': n}
+            for n in range(20)]
+    with count_inserts() as inserts:
+        writer.upsert_analytics(rows)
+    assert len(inserts) == 4
+
+    texts = [f'query {n}' for n in range(20)]
+    with count_inserts() as inserts:
+        ids = writer.insert_returning_ids(BrandQuery, [{'brand_id': brand.id, 'query_text': text} for text in texts],
+                                          ('query_text',))
+    assert len(inserts) == 2
+    db.session.commit()
+
+    stored = dict(db.session.query(BrandQuery.id, BrandQuery.query_text))
+    assert [stored[query_id] for query_id in ids] == texts
+    assert db.session.query(AnalyticsData).count() == 20
+
+
+def test_insert_returning_ids_with_no_rows():
+    assert BulkWriter().insert_returning_ids(BrandQuery, [], ('query_text',)) == []
+
+
+def test_upsert_analytics_inserts_then_updates(brand):
+    writer = BulkWriter()
+    today = date.today()
+    writer.upsert_analytics([
+        {'brand_id': brand.id, 'date': today, 'ai_platform': 'chatgpt', 'total_mentions': 2},
+        {'brand_id': brand.id, 'date': today, 'ai_platform': 'claude', 'total_mentions': 1},
+    ])
+    db.session.commit()
+
+    writer.upsert_analytics([{'brand_id': brand.id, 'date': today, 'ai_platform': 'chatgpt', 'total_mentions': 5}])
+    db.session.commit()
+
+    rows = dict(db.session.query(AnalyticsData.ai_platform, AnalyticsData.total_mentions))
+    assert rows == {'chatgpt': 5, 'claude': 1}
+
+
+def test_insert_ignore_skips_existing_rows(brand):
+    writer = BulkWriter()
+    today = date.today()
+    writer.upsert_analytics([{'brand_id': brand.id, 'date': today, 'ai_platform': 'chatgpt', 'total_mentions': 2}])
+    writer.insert_ignore(AnalyticsData, [
+        {'brand_id': brand.id, 'date': today, 'ai_platform': 'chatgpt', 'total_mentions': 9},
+        {'brand_id': brand.id, 'date': today, 'ai_platform': 'claude', 'total_mentions': 3},
+    ], ('brand_id', 'date', 'ai_platform'))
+    db.session.commit()
+
+    rows = dict(db.session.query(AnalyticsData.ai_platform, AnalyticsData.total_mentions))
+    assert rows == {'chatgpt': 2, 'claude': 3}
@@ -0,0 +1,56 @@
+import pytest
+
+from app.models import db, Brand
+from app.models.background_job import BackgroundJob, CompetitorAnalysisCell
+from app.services.competitor_analysis import CompetitorAnalysisService
+
+
+@pytest.fixture
+def rival_brand(user):
+    brand = Brand(name='Acme', user_id=user.id, industry='CRM',
+                  competitors=['Globex', '', '  ', 'Globex', ' Initech '])
+    db.session.add(brand)
+    db.session.commit()
+    return brand
+
+
+@pytest.fixture
+def service(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'COMPETITOR_BATCH_PROMPTS', 4)
+    service = CompetitorAnalysisService()
+    batches = []
+    iter_platform_results = service.ai_service.iter_platform_results
+
+    def recording(queries, *args, **kwargs):
+        batches.append(list(queries))
+        return iter_platform_results(queries, *args, **kwargs)
+
+    monkeypatch.setattr(service.ai_service, 'iter_platform_results', recording)
+    service.batches = batches
+    return service
+
+
+def test_blank_and_duplicate_competitors_are_dropped(service, rival_brand):
+    results = service.analyze_competitors(rival_brand.id)
+    assert [competitor['name'] for competitor in results['competitors']] == ['Globex', 'Initech']
+
+
+def test_matrix_runs_in_batches(service, rival_brand):
+    service.analyze_competitors(rival_brand.id)
+    prompts = [query for batch in service.batches for query in batch]
+    assert len(service.batches) > 1
+    assert all(len(batch) <= 4 for batch in service.batches)
+    assert len(prompts) == len(set(prompts))
+
+
+def test_job_cells_run_in_batches(service, rival_brand):
+    job = BackgroundJob(job_type='competitor_analysis', brand_id=rival_brand.id, user_id=rival_brand.user_id)
+    db.session.add(job)
+    db.session.commit()
+
+    results = service.analyze_competitors(rival_brand.id, job=job)
+    assert [competitor['name'] for competitor in results['competitors']] == ['Globex', 'Initech']
+    assert all(len(batch) <= 4 for batch in service.batches)
+    cells = db.session.query(CompetitorAnalysisCell).filter_by(job_id=job.id)
+    assert {cell.competitor for cell in cells} <= {None, 'Globex', 'Initech'}
+    assert all(cell.status != 'pending' for cell in cells)
@@ -0,0 +1,70 @@
+import threading
+import time
+
+from app.services.fair_scheduler import FairScheduler, fair_context
+
+
+def run_in_order(scheduler, submissions):
+    """Queue (tenant, lane, label) items behind a blocker on a one-worker pool; return the run order"""
+    gate = threading.Event()
+    order = []
+    blocker = scheduler.submit(gate.wait, tenant='blocker')
+    time.sleep(0.05)  # Let the worker pick up the blocker
+    futures = [scheduler.submit(lambda label=label: order.append(label), tenant=tenant, lane=lane)
+               for tenant, lane, label in submissions]
+    gate.set()
+    blocker.result(timeout=5)
+    for future in futures:
+        future.result(timeout=5)
+    return order
+
+
+def test_tenants_take_turns():
+    submissions = [('a', 'batch', f'a{n}') for n in range(4)] + [('b', 'batch', f'b{n}') for n in range(2)]
+    order = run_in_order(FairScheduler(workers=1), submissions)
+    assert order == ['a0', 'b0', 'a1', 'b1', 'a2', 'a3']
+
+
+def test_weights_give_more_turns_per_round():
+    submissions = [('a', 'batch', f'a{n}') for n in range(4)] + [('b', 'batch', f'b{n}') for n in range(4)]
+    order = run_in_order(FairScheduler(workers=1, weights={'a': 2}), submissions)
+    assert order[:6] == ['a0', 'a1', 'b0', 'a2', 'a3', 'b1']
+
+
+def test_interactive_lane_runs_first():
+    submissions = [('a', 'batch', f'batch{n}') for n in range(3)] + [('b', 'interactive', 'click')]
+    order = run_in_order(FairScheduler(workers=1), submissions)
+    assert order[0] == 'click'
+
+
+def test_submit_uses_the_fair_context():
+    scheduler = FairScheduler(workers=1)
+    with fair_context('a', 'interactive'):
+        future = scheduler.submit(lambda: None)
+    future.result(timeout=5)
+    assert scheduler.metrics()['lanes']['interactive']['dispatched'] == 1
+
+
+def peak_concurrency(scheduler, count, tenant=None):
+    lock = threading.Lock()
+    state = {'running': 0, 'peak': 0}
+
+    def task():
+        with lock:
+            state['running'] += 1
+            state['peak'] = max(state['peak'], state['running'])
+        time.sleep(0.05)
+        with lock:
+            state['running'] -= 1
+
+    for future in [scheduler.submit(task, tenant=tenant) for _ in range(count)]:
+        future.result(timeout=5)
+    return state['peak']
+
+
+def test_tenant_concurrency_caps_one_tenant():
+    assert peak_concurrency(FairScheduler(workers=4, tenant_concurrency=2), 8, tenant='a') == 2
+
+
+def test_work_without_a_tenant_is_not_capped():
+    assert peak_concurrency(FairScheduler(workers=4, tenant_concurrency=2), 8) == 4
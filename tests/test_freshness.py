@@ -0,0 +1,36 @@
+from datetime import datetime, timedelta
+
+from app.models import db, Brand, SearchQuery
+from app.services.ai_search import AISearchService
+from app.services.freshness import FreshnessPolicy
+from tests.fake_providers import FakeOpenAIClient
+
+QUERY = 'Best CRM companies'
+
+
+def store_answer(brand, platform, text, hours_ago=1):
+    db.session.add(SearchQuery(query_text=QUERY, ai_platform=platform, inline_response_text=text,
+                               user_id=brand.user_id, brand_id=brand.id,
+                               created_at=datetime.utcnow() - timedelta(hours=hours_ago)))
+    db.session.commit()
+
+
+def test_only_the_brands_own_paid_answers_are_reused(app, brand):
+    other = Brand(name='Globex', user_id=brand.user_id)
+    db.session.add(other)
+    db.session.commit()
+    store_answer(brand, 'chatgpt', 'Acme and Globex lead the market.')
+    store_answer(brand, 'perplexity', 'A simulated answer mentioning Acme.')
+    store_answer(brand, 'claude', 'Acme is popular.', hours_ago=48)
+
+    ai_service = AISearchService(openai_client=FakeOpenAIClient())
+    policy = FreshnessPolicy()
+
+    fresh = policy.fresh_results(ai_service, brand, [QUERY])
+    assert list(fresh) == [(QUERY, 'chatgpt')]
+    result = fresh[(QUERY, 'chatgpt')]
+    assert result['reused'] and result['cached'] and result['tokens_used'] == 0
+    assert result['brand_analysis']['direct_mentions'] == 1
+
+    # The same user's other brand asks the same prompt, but Acme's answer is not reused for it
+    assert policy.fresh_results(ai_service, other, [QUERY]) == {}
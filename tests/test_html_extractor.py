@@ -0,0 +1,9 @@
+from app.utils.helpers import clean_text
+
+
+def test_clean_text_keeps_words_split_by_inline_tags():
+    assert clean_text('<p>Sales<b>force</b> rocks</p>') == 'Salesforce rocks'
+
+
+def test_clean_text_collapses_whitespace_between_blocks():
+    assert clean_text('<div><p>Acme  leads.</p>\n<p>Globex follows.</p></div>') == 'Acme leads. Globex follows.'
@@ -0,0 +1,111 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import ai_overview_service
+from app.services.ai_overview_service import AIOverviewService, SUMMARY_ERROR_TEXT
+from app.services.overview_cache import OverviewCache
+
+QUERY = 'what is a crm'
+SEARCH_RESULTS = [{'title': 'CRM', 'url': 'https://example.com/crm', 'snippet': 'About CRM', 'position': 1}]
+PAGES = [{'url': 'https://example.com/crm', 'title': 'CRM', 'content': 'A CRM tracks customers.',
+          'snippet': 'About CRM'}]
+
+
+class FakeCompletions:
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+
+    def create(self, stream=False, **kwargs):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError('model unavailable')
+        text = f'Summary {self.calls}'
+        if stream:
+            return iter([SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+
+
+@pytest.fixture
+def cache(app, monkeypatch):
+    cache = OverviewCache()
+    # Run background refreshes inline so the test can look at their outcome
+    monkeypatch.setattr(cache.refresher, 'submit', lambda func, tenant=None: func())
+    monkeypatch.setattr(ai_overview_service, 'get_overview_cache', lambda: cache)
+    return cache
+
+
+@pytest.fixture
+def service(cache, monkeypatch):
+    service = AIOverviewService('test-key', 'test-key')
+    completions = FakeCompletions()
+    monkeypatch.setattr(service, 'openai_client', SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+    monkeypatch.setattr(service, '_search_google', lambda query: SEARCH_RESULTS)
+    monkeypatch.setattr(service, '_extract_page_contents', lambda results: PAGES)
+    service.completions = completions
+    return service
+
+
+def test_failed_summary_is_shown_but_not_cached(service, cache, user):
+    service.completions.fail = True
+    overview = service.generate_overview(QUERY, user.id)
+    assert overview['overview_text'] == SUMMARY_ERROR_TEXT
+    assert cache.get(QUERY) is None
+
+    service.completions.fail = False
+    assert service.generate_overview(QUERY, user.id)['overview_text'] == 'Summary 2'
+    assert cache.get(QUERY)['overview_text'] == 'Summary 2'
+
+
+def test_failed_refresh_keeps_the_stale_entry(service, cache, user):
+    assert service.generate_overview(QUERY, user.id)['overview_text'] == 'Summary 1'
+    cache.ttl = 0
+    cache.memory.clear()
+
+    service.completions.fail = True
+    assert service.generate_overview(QUERY, user.id)['overview_text'] == 'Summary 1'
+    assert cache.stats()['refresh_errors'] == 1
+    assert cache.get(QUERY)['overview_text'] == 'Summary 1'
+
+
+def test_stream_fallback_is_not_cached(service, cache, user):
+    service.completions.fail = True
+    events = list(service.generate_overview_stream(QUERY, user.id))
+    assert [event for event, _ in events] == ['sources', 'token', 'overview']
+    assert events[1][1]['text'] == SUMMARY_ERROR_TEXT
+    assert cache.get(QUERY) is None
+
+
+def test_concurrent_stream_miss_waits_for_the_leader(app, service, cache, user, monkeypatch):
+    monkeypatch.setattr(service, '_create_overview_record', lambda query, user_id, result, elapsed: result)
+    leader = service.generate_overview_stream(QUERY, user.id)
+    assert next(leader)[0] == 'sources'
+
+    followed = []
+
+    def follow():
+        with app.app_context():
+            followed.extend(service.generate_overview_stream(QUERY, user.id))
+
+    follower = threading.Thread(target=follow)
+    follower.start()
+    time.sleep(0.2)
+    leader_events = list(leader)
+    follower.join(5)
+
+    assert service.completions.calls == 1
+    assert leader_events[-1][1]['overview_text'] == 'Summary 1'
+    assert followed[-1][1]['overview_text'] == 'Summary 1'
+    assert cache.single_flight.stats()['coalesced_local'] == 1
+
+
+def test_abandoned_stream_lets_the_next_request_generate(service, cache, user):
+    leader = service.generate_overview_stream(QUERY, user.id)
+    next(leader)
+    leader.close()
+
+    assert service.generate_overview(QUERY, user.id)['overview_text'] == 'Summary 1'
+    assert cache.get(QUERY)['overview_text'] == 'Summary 1'
@@ -0,0 +1,119 @@
+import time
+
+import pytest
+
+from app.services.fanout import FanoutEngine
+from app.services.rate_limiter import AIMDWindow, RateLimiter, RateLimitTimeout, take_tokens
+from app.services.shared_state import MemoryStateBackend
+from tests.fake_providers import FakeAPIError, FakeRateLimitError
+
+
+def make_limiter(**limits):
+    return RateLimiter(backend=MemoryStateBackend(), limits={'default': limits}, wait_timeout=5.0)
+
+
+def test_take_tokens_starts_full_and_refills():
+    state, wait = take_tokens(None, capacity=10, refill_per_second=1, amount=4, now=100.0)
+    assert wait == 0.0
+    assert state == {'tokens': 6, 'ts': 100.0}
+
+    state, wait = take_tokens(state, capacity=10, refill_per_second=1, amount=8, now=101.0)
+    assert wait == pytest.approx(1.0)
+    assert state['tokens'] == pytest.approx(7.0)  # Nothing taken while waiting
+
+    state, wait = take_tokens(state, capacity=10, refill_per_second=1, amount=8, now=102.0)
+    assert wait == 0.0
+    assert state['tokens'] == pytest.approx(0.0)
+
+
+def test_take_tokens_never_refills_past_capacity():
+    state, _ = take_tokens({'tokens': 2, 'ts': 0.0}, capacity=10, refill_per_second=1, amount=1, now=1000.0)
+    assert state['tokens'] == 9
+
+
+def test_window_halves_on_throttle_once_per_cooldown():
+    window = AIMDWindow(8, cooldown=60.0)
+    for _ in range(3):
+        assert window.acquire(0)
+        window.release(throttled=True)
+    assert window.limit == 4.0
+
+
+def test_window_widens_only_on_success():
+    window = AIMDWindow(8)
+    window.limit = 2.0
+
+    window.acquire(0)
+    window.release(succeeded=False)
+    assert window.limit == 2.0
+
+    window.acquire(0)
+    window.release()
+    assert window.limit == 2.5
+
+
+def test_window_acquire_times_out_when_full():
+    window = AIMDWindow(1)
+    assert window.acquire(0)
+    assert not window.acquire(0.05)
+
+
+def test_limiter_backs_off_on_429_but_not_on_other_errors():
+    limiter = make_limiter(rpm=1000, tpm=10 ** 6, max_concurrency=4)
+    window = limiter.window('openai', 'gpt')
+    window.limit = 2.0
+
+    with pytest.raises(FakeAPIError):
+        with limiter.acquire('openai', 'gpt'):
+            raise FakeAPIError('boom')
+    assert window.limit == 2.0
+
+    with pytest.raises(FakeRateLimitError):
+        with limiter.acquire('openai', 'gpt'):
+            raise FakeRateLimitError('slow down')
+    assert window.limit == 1.0
+    assert window.in_flight == 0
+
+
+def test_limiter_charges_tokens_beyond_the_estimate():
+    limiter = make_limiter(rpm=1000, tpm=1000, max_concurrency=4)
+    with limiter.acquire('openai', 'gpt', tokens=100) as lease:
+        lease.record_tokens(300)
+    state = limiter.backend.get('ratelimit:openai:gpt:tpm')
+    assert state['tokens'] == pytest.approx(700, abs=1)
+
+
+def test_limiter_raises_when_the_wait_exceeds_its_timeout():
+    limiter = make_limiter(rpm=1, tpm=10 ** 6, max_concurrency=4)
+    with limiter.acquire('openai', 'gpt'):
+        pass
+    with pytest.raises(RateLimitTimeout):
+        with limiter.acquire('openai', 'gpt', timeout=1.0):
+            pass
+
+
+def test_limiter_wait_is_capped_at_the_fanout_call_deadline():
+    limiter = make_limiter(rpm=60, tpm=10 ** 6, max_concurrency=1)
+    window = limiter.window('openai', 'gpt')
+    window.acquire(0)  # Hold the only slot
+
+    outcome = {}
+
+    def call():
+        started = time.monotonic()
+        try:
+            with limiter.acquire('openai', 'gpt'):
+                pass
+        except RateLimitTimeout as e:
+            outcome['error'] = e
+        outcome['waited'] = time.monotonic() - started
+        return {'success': 'error' not in outcome}
+
+    FanoutEngine(max_workers=1, timeout=0.2).run([('call', call)])
+    for _ in range(50):
+        if 'waited' in outcome:
+            break
+        time.sleep(0.02)
+    window.release()
+    assert isinstance(outcome.get('error'), RateLimitTimeout)
+    assert outcome['waited'] < 1.0  # Not the limiter's own 5s
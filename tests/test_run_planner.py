@@ -0,0 +1,70 @@
+import pytest
+
+from app.models import db, Brand, SearchQuery
+from app.models.background_job import BackgroundJob
+from app.services.job_queue import run_planned_jobs
+from app.services.run_planner import MonitoringRunPlanner
+
+
+@pytest.fixture
+def brands(user):
+    brands = [Brand(name=name, user_id=user.id, industry='CRM') for name in ('Acme', 'Globex', 'Initech')]
+    db.session.add_all(brands)
+    db.session.commit()
+    return brands
+
+
+def count_calls(planner):
+    calls = []
+    iter_platform_results = planner.ai_service.iter_platform_results
+
+    def counting(queries, *args, skip=None, **kwargs):
+        calls.append([query for query in queries
+                      if any((query, platform) not in (skip or ()) for platform in planner.ai_service.platform_names())])
+        return iter_platform_results(queries, *args, skip=skip, **kwargs)
+
+    planner.ai_service.iter_platform_results = counting
+    return calls
+
+
+def test_run_works_through_brands_in_chunks(brands):
+    planner = MonitoringRunPlanner(chunk_brands=2)
+    calls = count_calls(planner)
+    summaries = planner.run([brand.id for brand in brands])
+
+    assert set(summaries) == {brand.id for brand in brands}
+    assert len(calls) == 2
+    # Industry prompts shared with the first chunk are not asked again in the second
+    asked = [query for chunk in calls for query in chunk]
+    assert len(asked) == len(set(asked))
+    assert 'Best CRM companies' in calls[0] and 'Best CRM companies' not in calls[1]
+
+    stored = {brand.id: db.session.query(SearchQuery).filter_by(brand_id=brand.id).count() for brand in brands}
+    assert all(stored.values())
+
+
+def test_failed_chunk_keeps_the_brands_already_stored(app, brands, monkeypatch):
+    jobs = [BackgroundJob(job_type='monitor_brand', brand_id=brand.id, user_id=brand.user_id, status='queued')
+            for brand in brands]
+    db.session.add_all(jobs)
+    db.session.commit()
+    job_ids = [job.id for job in jobs]
+    failing_brand_id = brands[2].id
+
+    store_results = MonitoringRunPlanner._store_chunk
+
+    def store_or_fail(self, chunk, *args, **kwargs):
+        if failing_brand_id in chunk:
+            raise RuntimeError('database went away')
+        return store_results(self, chunk, *args, **kwargs)
+
+    monkeypatch.setattr(MonitoringRunPlanner, '_store_chunk', store_or_fail)
+    monkeypatch.setitem(app.config, 'MONITOR_RUN_CHUNK_BRANDS', 1)
+    run_planned_jobs(job_ids)
+
+    statuses = {job.brand_id: (job.status, job.result is not None)
+                for job in db.session.query(BackgroundJob).filter(BackgroundJob.id.in_(job_ids))}
+    assert statuses == {brands[0].id: ('completed', True), brands[1].id: ('completed', True),
+                        failing_brand_id: ('failed', False)}
+    assert db.session.query(SearchQuery).filter_by(brand_id=brands[0].id).count()
+    assert not db.session.query(SearchQuery).filter_by(brand_id=failing_brand_id).count()
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import db
+from app.models.background_job import BackgroundJob, MonitoringSchedule
+from app.services.job_queue import JobQueue
+
+
+@pytest.fixture
+def queue(app):
+    return JobQueue(backend='eager')
+
+
+def add_schedule(brand, minutes_ago: int = 1, **fields):
+    schedule = MonitoringSchedule(brand_id=brand.id, interval_minutes=60,
+                                  next_run_at=datetime.utcnow() - timedelta(minutes=minutes_ago), **fields)
+    db.session.add(schedule)
+    db.session.commit()
+    return schedule
+
+
+def test_due_schedule_is_claimed_once(queue, brand):
+    schedule = add_schedule(brand)
+    now = datetime.utcnow()
+
+    jobs = queue.dispatch_due_schedules(now)
+    assert [(job.brand_id, job.schedule_id, job.status) for job in jobs] == [(brand.id, schedule.id, 'completed')]
+
+    db.session.refresh(schedule)
+    assert schedule.last_run_at == now
+    assert schedule.next_run_at == now + timedelta(minutes=60)
+
+    # A second dispatcher at the same tick finds the slot already claimed
+    assert queue.dispatch_due_schedules(now) == []
+    assert db.session.query(BackgroundJob).count() == 1
+
+
+def test_schedules_not_due_or_paused_are_left_alone(queue, brand):
+    add_schedule(brand, minutes_ago=-30)
+    add_schedule(brand, is_active=False)
+    assert queue.dispatch_due_schedules() == []
+
+
+def test_schedule_skips_a_tick_while_its_last_job_is_running(queue, brand):
+    schedule = add_schedule(brand)
+    db.session.add(BackgroundJob(job_type='monitor_brand', brand_id=brand.id, schedule_id=schedule.id,
+                                 status='running'))
+    db.session.commit()
+
+    assert queue.dispatch_due_schedules() == []
+    db.session.refresh(schedule)
+    assert schedule.next_run_at > datetime.utcnow()  # The slot is still used up
+
+
+@pytest.fixture
+def client(app, user):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user.id)
+        session['_fresh'] = True
+    return client
+
+
+@pytest.mark.parametrize('interval', ['soon', None, [60], 5])
+def test_create_schedule_rejects_bad_intervals(client, brand, interval):
+    response = client.post(f'/api/brand/{brand.id}/schedules', json={'interval_minutes': interval})
+    assert response.status_code == 400
+    assert 'interval_minutes' in response.get_json()['error']
+
+
+def test_create_and_update_schedule(client, brand):
+    response = client.post(f'/api/brand/{brand.id}/schedules', json={'interval_minutes': '90'})
+    assert response.status_code == 201
+    schedule_id = response.get_json()['schedule']['id']
+
+    response = client.put(f'/api/schedules/{schedule_id}', json={'interval_minutes': 'daily'})
+    assert response.status_code == 400
+
+    response = client.put(f'/api/schedules/{schedule_id}', json={'interval_minutes': 120, 'is_active': False})
+    assert response.status_code == 200
+    assert db.session.get(MonitoringSchedule, schedule_id).interval_minutes == 120